@@ -25,24 +25,44 @@ try:
     import json
     import http.client
     
+    # 與 mcp_config.json 的 http.port / server.url_path 對應
+    config_path = os.path.join(project_root, "mcp_config.json")
+    config = {}
+    if os.path.exists(config_path):
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    HTTP_PORT = config.get("http", {}).get("port", 65297)
+    URL_PATH = config.get("server", {}).get("url_path", "/mcp/")
+    
     async def check_connection():
         """Check MCP server connection and workspace status"""
         try:
-            # Simulate MCP call to analyze_workspace
-            # In production, this would use actual MCP client
-            conn = http.client.HTTPConnection("127.0.0.1", 65535, timeout=5)
+            # MCP Streamable HTTP：以 JSON-RPC tools/call 呼叫 analyze_workspace
+            conn = http.client.HTTPConnection("127.0.0.1", HTTP_PORT, timeout=5)
             
-            request_data = json.dumps({"action": "analyze_workspace"})
-            headers = {'Content-Type': 'application/json'}
+            request_data = json.dumps({
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "tools/call",
+                "params": {"name": "analyze_workspace", "arguments": {}}
+            })
+            headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
             
-            conn.request("POST", "/mcp/", request_data, headers)
+            conn.request("POST", URL_PATH, request_data, headers)
             response = conn.getresponse()
-            result = json.loads(response.read().decode())
+            reply = json.loads(response.read().decode())
+            text = reply.get("result", {}).get("content", [{}])[0].get("text", "")
+            try:
+                result = json.loads(text)
+            except ValueError:
+                print(f"❌ MCP Connection: OK, but workspace unavailable: {text}")
+                return 1
+            workspace = result.get("workspace") or {}
             
             if response.status == 200:
                 print("✅ MCP Connection: SUCCESS")
-                print(f"📊 Workspace: {result.get('workspaceName', 'Unknown')}")
-                print(f"📄 File: {result.get('workspaceFileName', 'Not saved')}")
+                print(f"📊 Workspace: {workspace.get('name') or 'Unknown'}")
+                print(f"📄 File: {workspace.get('fileName') or 'Not saved'}")
                 print(f"🔢 Nodes: {result.get('nodeCount', 0)}")
                 print(f"🔗 Connectors: {result.get('connectorCount', 0)}")
                 return 0
@@ -87,6 +87,16 @@ namespace DynamoMCPListener
         /// </summary>
         public const int ALL_SCOPE_MAX_RESULTS = 200;
 
+        /// <summary>
+        /// 是否向 Python 端協商 permessage-deflate 壓縮
+        /// </summary>
+        public static bool COMPRESSION_ENABLED = true;
+
+        /// <summary>
+        /// 小於此位元組數的訊息不壓縮
+        /// </summary>
+        public static int COMPRESSION_THRESHOLD = 1024;
+
         static MCPConfig()
         {
             LoadConfig();
@@ -125,6 +135,17 @@ namespace DynamoMCPListener
                         if (serverParams["port"] != null) SERVER_PORT = serverParams["port"].ToObject<int>();
                         if (serverParams["websocket_port"] != null) WEBSOCKET_PORT = serverParams["websocket_port"].ToObject<int>();
                     }
+
+                    if (jobj["compression"] != null)
+                    {
+                        // dynamo 區段可覆寫全域設定 (與 Python 端 _compression_settings 相同規則)
+                        var compression = jobj["compression"];
+                        var dynamoParams = compression["dynamo"];
+                        var enabled = dynamoParams?["enabled"] ?? compression["enabled"];
+                        var threshold = dynamoParams?["threshold"] ?? compression["threshold"];
+                        if (enabled != null) COMPRESSION_ENABLED = enabled.ToObject<bool>();
+                        if (threshold != null) COMPRESSION_THRESHOLD = threshold.ToObject<int>();
+                    }
                 }
             }
             catch (System.Exception ex)
@@ -38,6 +38,14 @@ namespace DynamoMCPListener
             {
                 var data = JObject.Parse(jsonLine);
                 var errors = new List<string>();
+                // 逐節點/逐連線結果，供 Python 端只對失敗的節點降級重試
+                var nodeResults = new Dictionary<string, object>();
+                var connectorResults = new List<object>();
+                // 反向操作 (undo) 所需資訊：被 upsert 節點的原狀態、被新連線取代的既有連線
+                var previousNodes = new List<JObject>();
+                var replacedConnectors = new List<object>();
+                var batchConnectors = new HashSet<Guid>();
+                var createdKeys = new HashSet<string>();
 
                 // 0. Handle Actions (like clear_graph)
                 string action = data["action"]?.ToString();
@@ -63,7 +71,8 @@ namespace DynamoMCPListener
                         fullName = n.GetType().FullName,
                         creationName = n.GetType().GetProperty("CreationName")?.GetValue(n)?.ToString() ?? n.Name,
                         x = n.X,
-                        y = n.Y
+                        y = n.Y,
+                        value = GetNodeValue(n)
                     }).ToList();
 
                     var connectors = _dynamoModel.CurrentWorkspace.Connectors.Select(c => new
@@ -101,10 +110,21 @@ namespace DynamoMCPListener
                     CreateGroup(data);
                     return "{\"status\": \"ok\", \"message\": \"Group created\"}";
                 }
+
+                if (action == "create_groups")
+                {
+                    return CreateGroups(data);
+                }
                 
                 // === MCP Resources Layer: Structured Data Queries ===
                 if (action == "get_nodes_structured")
                 {
+                    var query = data["query"] as JObject;
+                    if (query != null)
+                    {
+                        return GetNodesStructuredFiltered(query);
+                    }
+
                     var nodes = _dynamoModel.CurrentWorkspace.Nodes.Select(n => {
                         string stateStr = "Active";
                         try { stateStr = n.State.ToString(); } catch { }
@@ -400,14 +420,57 @@ namespace DynamoMCPListener
                     });
                 }
                 
+                // 0.5 Delete (undo 反向操作：先刪連線、再刪節點)
+                if (data["deleteConnectors"] != null)
+                {
+                    foreach (var c in data["deleteConnectors"])
+                    {
+                        try
+                        {
+                            DeleteConnection(c);
+                        }
+                        catch (Exception ex)
+                        {
+                            string msg = $"[DeleteConnection Failed] {c["from"]}->{c["to"]}: {ex.Message}";
+                            MCPLogger.Error(msg, ex);
+                            errors.Add(msg);
+                        }
+                    }
+                }
+
+                if (data["deleteNodes"] != null)
+                {
+                    var guidsToDelete = new List<Guid>();
+                    foreach (var idToken in data["deleteNodes"])
+                    {
+                        string idStr = idToken?.ToString();
+                        if (TryResolveNodeGuid(idStr, out Guid guid) &&
+                            _dynamoModel.CurrentWorkspace.Nodes.Any(nd => nd.GUID == guid))
+                        {
+                            guidsToDelete.Add(guid);
+                        }
+                        if (!string.IsNullOrEmpty(idStr)) _nodeIdMap.Remove(idStr);
+                    }
+                    if (guidsToDelete.Any())
+                    {
+                        _dynamoModel.ExecuteCommand(new DynamoModel.DeleteModelCommand(guidsToDelete));
+                    }
+                    MCPLogger.Info($"[GraphHandler] Deleted {guidsToDelete.Count} nodes.");
+                }
+
                 // 1. Create Nodes
                 if (data["nodes"] != null)
                 {
+                    int nodeIndex = 0;
                     foreach (var n in data["nodes"])
                     {
+                        string nodeKey = n["id"]?.ToString() ?? $"#{nodeIndex}";
+                        nodeIndex++;
                         try 
                         {
-                            CreateNode(n);
+                            string nodeStatus = CreateNode(n, previousNodes);
+                            nodeResults[nodeKey] = new { status = nodeStatus };
+                            if (nodeStatus == "created") createdKeys.Add(nodeKey);
                         }
                         catch (Exception ex)
                         {
@@ -415,6 +478,9 @@ namespace DynamoMCPListener
                             string msg = $"[CreateNode Failed] {nodeName} (ID: {n["id"]}): {ex.Message}";
                             MCPLogger.Error($"Critical Failure creating node '{nodeName}':", ex);
                             errors.Add(msg);
+                            nodeResults[nodeKey] = new { status = "failed", error = ex.Message };
+                            // 未建立的節點不保留 ID 對應，重試時重新配置
+                            if (n["id"] != null) _nodeIdMap.Remove(n["id"].ToString());
                         }
                     }
                 }
@@ -422,27 +488,34 @@ namespace DynamoMCPListener
                 // 2. Create Connectors
                 if (data["connectors"] != null)
                 {
+                    int connectorIndex = 0;
                     foreach (var c in data["connectors"])
                     {
                         try
                         {
-                            CreateConnection(c);
+                            int toPort = CreateConnection(c, replacedConnectors, batchConnectors);
+                            connectorResults.Add(new { index = connectorIndex, status = "ok", toPort = toPort });
                         }
                         catch (Exception ex)
                         {
                             string msg = $"[CreateConnection Failed] {c["from"]}->{c["to"]}: {ex.Message}";
                             MCPLogger.Error(msg, ex);
                             errors.Add(msg);
+                            connectorResults.Add(new { index = connectorIndex, status = "failed", error = ex.Message });
                         }
+                        connectorIndex++;
                     }
                 }
 
+                // 同批次先建立後更新的節點不是既有節點，undo 時直接刪除
+                previousNodes.RemoveAll(p => createdKeys.Contains(p["id"]?.ToString() ?? ""));
+                var undo = new { previousNodes = previousNodes, replacedConnectors = replacedConnectors };
                 if (errors.Any())
                 {
-                    return JsonConvert.SerializeObject(new { status = "error", message = "Partial failure", errors = errors });
+                    return JsonConvert.SerializeObject(new { status = "error", message = "Partial failure", errors = errors, nodeResults = nodeResults, connectorResults = connectorResults, undo = undo });
                 }
 
-                return "{\"status\": \"ok\"}";
+                return JsonConvert.SerializeObject(new { status = "ok", connectorResults = connectorResults, undo = undo });
             }
             catch (Exception ex)
             {
@@ -451,7 +524,8 @@ namespace DynamoMCPListener
             }
         }
 
-        private void CreateNode(JToken n)
+        /// <summary>建立或更新節點；回傳 "created" / "updated"，無法建立時拋出例外</summary>
+        private string CreateNode(JToken n, List<JObject> previousNodes = null)
         {
             string nodeName = n["name"]?.ToString();
             string nodeIdStr = n["id"]?.ToString();
@@ -473,7 +547,8 @@ namespace DynamoMCPListener
             {
                 // [UPDATE MODE] Node exists, just update position and values
                 MCPLogger.Info($"[Upsert] Node {dynamoGuid} exists. Updating properties only.");
-                
+                previousNodes?.Add(CapturePreviousState(existingNode, nodeIdStr, nodeName, n));
+
                 // Update Position
                 var updatePosCmd = new DynamoModel.UpdateModelValueCommand(Guid.Empty, dynamoGuid, "Position", $"{x},{y}");
                 _dynamoModel.ExecuteCommand(updatePosCmd);
@@ -508,7 +583,7 @@ namespace DynamoMCPListener
                 }
 
                 HandlePreview(n, dynamoGuid);
-                return; // Exit, do NOT create new node
+                return "updated"; // Exit, do NOT create new node
             }
 
             // === 1. CREATE MODE (Node does not exist) ===
@@ -528,7 +603,7 @@ namespace DynamoMCPListener
                 }
                 
                 HandlePreview(n, dynamoGuid);
-                return;
+                return "created";
             }
 
             if (nodeName == "Python Script" || nodeName.Contains("PythonScript"))
@@ -546,6 +621,11 @@ namespace DynamoMCPListener
                     } catch {}
                 }
 
+                if (!created)
+                {
+                    throw new InvalidOperationException("Python Script node could not be created");
+                }
+
                 if (created)
                 {
                     var node = _dynamoModel.CurrentWorkspace.Nodes.FirstOrDefault(nd => nd.GUID == dynamoGuid);
@@ -564,7 +644,7 @@ namespace DynamoMCPListener
                     }
                 }
                 HandlePreview(n, dynamoGuid);
-                return;
+                return "created";
             }
 
             // Standard Node Creation
@@ -576,6 +656,12 @@ namespace DynamoMCPListener
 
             var nativeCmd = new DynamoModel.CreateNodeCommand(new List<Guid> { dynamoGuid }, finalCreationName, x, y, false, false);
             _dynamoModel.ExecuteCommand(nativeCmd);
+
+            // CreateNodeCommand 找不到型別時不會拋出例外，需確認節點確實存在
+            if (!_dynamoModel.CurrentWorkspace.Nodes.Any(nd => nd.GUID == dynamoGuid))
+            {
+                throw new InvalidOperationException($"Node type '{finalCreationName}' could not be created");
+            }
             
             if (n["value"] != null)
             {
@@ -588,6 +674,62 @@ namespace DynamoMCPListener
             }
 
             HandlePreview(n, dynamoGuid);
+            return "created";
+        }
+
+        /// <summary>
+        /// 節點的使用者可編輯內容：Code Block 程式碼、Python 腳本或輸入節點 (Number / String / Slider / Boolean) 的值
+        /// 供工作區指紋偵測 UI 端的編輯；其他節點回傳 null
+        /// </summary>
+        private string GetNodeValue(NodeModel node)
+        {
+            try
+            {
+                var type = node.GetType();
+                var prop = type.GetProperty("Code") ?? type.GetProperty("Script")
+                    ?? (type.Namespace != null && type.Namespace.EndsWith(".Input") ? type.GetProperty("Value") : null);
+                var value = prop?.GetValue(node);
+                if (value == null) return null;
+                return value is bool b ? (b ? "true" : "false")
+                    : Convert.ToString(value, System.Globalization.CultureInfo.InvariantCulture);
+            }
+            catch
+            {
+                return null;
+            }
+        }
+
+        /// <summary>
+        /// upsert 前的節點狀態：位置，以及本次會被覆寫的值 (與更新時相同的屬性)
+        /// name 沿用請求中的名稱，反向操作送回時走相同的更新分支
+        /// </summary>
+        private JObject CapturePreviousState(NodeModel node, string nodeIdStr, string nodeName, JToken n)
+        {
+            var previous = new JObject { ["id"] = nodeIdStr, ["name"] = nodeName, ["x"] = node.X, ["y"] = node.Y };
+            try
+            {
+                if (n["value"] != null)
+                {
+                    string propName = nodeName == "Code Block" ? "Code" : GetValuePropertyName(node.CreationName) ?? "Value";
+                    var value = node.GetType().GetProperty(propName)?.GetValue(node);
+                    if (value != null)
+                    {
+                        previous["value"] = value is bool b ? (b ? "true" : "false")
+                            : Convert.ToString(value, System.Globalization.CultureInfo.InvariantCulture);
+                    }
+                }
+                bool isPython = nodeName == "Python Script" || (nodeName?.Contains("PythonScript") ?? false);
+                if (isPython && (n["script"] != null || n["pythonCode"] != null))
+                {
+                    var script = (node.GetType().GetProperty("Script") ?? node.GetType().GetProperty("Code"))?.GetValue(node);
+                    if (script != null) previous["pythonCode"] = script.ToString();
+                }
+            }
+            catch (Exception ex)
+            {
+                MCPLogger.Warning($"[Upsert] Failed to capture previous value of {node.GUID}: {ex.Message}");
+            }
+            return previous;
         }
 
         // Helper for Python Code Update to reuse logic
@@ -758,7 +900,11 @@ namespace DynamoMCPListener
             return null;
         }
 
-        private void CreateConnection(JToken c)
+        /// <summary>
+        /// 建立連線並回傳實際使用的輸入埠索引 (toPortName 解析後)
+        /// replaced 收集被新連線取代的既有連線 (不含本批次建立的連線)，batchConnectors 為本批次已建立的連線
+        /// </summary>
+        private int CreateConnection(JToken c, List<object> replaced = null, HashSet<Guid> batchConnectors = null)
         {
             string fromIdStr = c["from"]?.ToString();
             string toIdStr = c["to"]?.ToString();
@@ -792,6 +938,9 @@ namespace DynamoMCPListener
             }
 
             // ?��?????�令 (?�別?��? Begin ??End)
+            // 輸入埠只接受一條連線，記下原本的連線以判斷是否被取代
+            var existing = toNode?.InPorts.FirstOrDefault(p => p.Index == toIdx)?.Connectors.ToList() ?? new List<ConnectorModel>();
+
             try
             {
                 _dynamoModel.ExecuteCommand(new DynamoModel.MakeConnectionCommand(fromId, fromIdx, PortType.Output, DynamoModel.MakeConnectionCommand.Mode.Begin));
@@ -801,6 +950,125 @@ namespace DynamoMCPListener
             {
                 throw new Exception($"MakeConnectionCommand Failed ({fromIdStr} -> {toIdStr}): {ex.Message}");
             }
+
+            var current = _dynamoModel.CurrentWorkspace.Connectors.ToList();
+            if (replaced != null)
+            {
+                var remaining = new HashSet<Guid>(current.Select(conn => conn.GUID));
+                foreach (var old in existing.Where(conn => !remaining.Contains(conn.GUID) && (batchConnectors == null || !batchConnectors.Contains(conn.GUID))))
+                {
+                    replaced.Add(new
+                    {
+                        from = old.Start.Owner.GUID.ToString(),
+                        fromPort = old.Start.Index,
+                        to = old.End.Owner.GUID.ToString(),
+                        toPort = old.End.Index
+                    });
+                }
+            }
+            var created = current.FirstOrDefault(conn =>
+                conn.Start.Owner.GUID == fromId && conn.Start.Index == fromIdx &&
+                conn.End.Owner.GUID == toId && conn.End.Index == toIdx);
+            if (created != null) batchConnectors?.Add(created.GUID);
+            return toIdx;
+        }
+
+        /// <summary>
+        /// get_nodes_structured 的下推查詢：篩選 (nameContains/state/bbox)、分頁 (offset/limit) 與欄位投影 (fields)
+        /// 未請求的欄位 (例如 inputs/outputs port 清單) 完全不會被計算與序列化
+        /// </summary>
+        private string GetNodesStructuredFiltered(JObject query)
+        {
+            string nameContains = query["nameContains"]?.ToString();
+            string stateFilter = query["state"]?.ToString();
+            var bbox = query["bbox"] as JObject;
+            int offset = Math.Max(0, query["offset"]?.ToObject<int>() ?? 0);
+            int? limit = query["limit"]?.ToObject<int?>();
+            var fields = query["fields"]?.ToObject<List<string>>();
+            Func<string, bool> want = f => fields == null || fields.Count == 0 || fields.Contains(f);
+
+            double minX = bbox?["minX"]?.ToObject<double>() ?? double.NegativeInfinity;
+            double maxX = bbox?["maxX"]?.ToObject<double>() ?? double.PositiveInfinity;
+            double minY = bbox?["minY"]?.ToObject<double>() ?? double.NegativeInfinity;
+            double maxY = bbox?["maxY"]?.ToObject<double>() ?? double.PositiveInfinity;
+
+            Func<NodeModel, string> stateOf = n => {
+                try { return n.State.ToString(); } catch { return "Active"; }
+            };
+
+            var filtered = _dynamoModel.CurrentWorkspace.Nodes.Where(n =>
+                (string.IsNullOrEmpty(nameContains) || (n.Name ?? "").IndexOf(nameContains, StringComparison.OrdinalIgnoreCase) >= 0) &&
+                (string.IsNullOrEmpty(stateFilter) || stateOf(n).IndexOf(stateFilter, StringComparison.OrdinalIgnoreCase) >= 0) &&
+                n.X >= minX && n.X <= maxX && n.Y >= minY && n.Y <= maxY
+            ).ToList();
+
+            IEnumerable<NodeModel> page = filtered.Skip(offset);
+            if (limit.HasValue) page = page.Take(Math.Max(0, limit.Value));
+
+            var nodes = page.Select(n => {
+                var d = new Dictionary<string, object>();
+                string stateStr = (want("state") || want("errorMessage")) ? stateOf(n) : null;
+                if (want("id")) d["id"] = n.GUID.ToString();
+                if (want("name")) d["name"] = n.Name;
+                if (want("fullName")) d["fullName"] = n.GetType().FullName;
+                if (want("x")) d["x"] = n.X;
+                if (want("y")) d["y"] = n.Y;
+                if (want("state")) d["state"] = stateStr;
+                if (want("isSelected")) d["isSelected"] = n.IsSelected;
+                if (want("inputs")) d["inputs"] = n.InPorts.Select(p => new
+                {
+                    name = p.Name,
+                    type = p.PortType.ToString(),
+                    isConnected = p.IsConnected
+                }).ToList();
+                if (want("outputs")) d["outputs"] = n.OutPorts.Select(p => new
+                {
+                    name = p.Name,
+                    type = p.PortType.ToString()
+                }).ToList();
+                if (want("errorMessage")) d["errorMessage"] = stateStr.Contains("Error") ? stateStr : null;
+                return d;
+            }).ToList();
+
+            return JsonConvert.SerializeObject(new
+            {
+                status = "ok",
+                filtered = true,
+                total = filtered.Count,
+                offset = offset,
+                count = nodes.Count,
+                nodes = nodes
+            });
+        }
+
+        private bool TryResolveNodeGuid(string idStr, out Guid guid)
+        {
+            guid = Guid.Empty;
+            if (string.IsNullOrEmpty(idStr)) return false;
+            if (_nodeIdMap.TryGetValue(idStr, out guid)) return true;
+            return Guid.TryParse(idStr, out guid);
+        }
+
+        private void DeleteConnection(JToken c)
+        {
+            string fromIdStr = c["from"]?.ToString();
+            string toIdStr = c["to"]?.ToString();
+            int fromIdx = c["fromPort"]?.ToObject<int>() ?? 0;
+            int toIdx = c["toPort"]?.ToObject<int>() ?? 0;
+
+            if (!TryResolveNodeGuid(fromIdStr, out Guid fromId) || !TryResolveNodeGuid(toIdStr, out Guid toId))
+            {
+                throw new Exception($"Unknown node ID ({fromIdStr} -> {toIdStr})");
+            }
+
+            var connector = _dynamoModel.CurrentWorkspace.Connectors.FirstOrDefault(conn =>
+                conn.Start.Owner.GUID == fromId && conn.Start.Index == fromIdx &&
+                conn.End.Owner.GUID == toId && conn.End.Index == toIdx);
+
+            // 連線已不存在 (例如端點節點已被刪除) 視為成功
+            if (connector == null) return;
+
+            _dynamoModel.ExecuteCommand(new DynamoModel.DeleteModelCommand(connector.GUID));
         }
 
         private void LoadCommonNodesCache()
@@ -855,6 +1123,43 @@ namespace DynamoMCPListener
         }
 
         private void CreateGroup(JToken data)
+        {
+            CreateGroupCore(data, BuildNodeLookup());
+        }
+
+        /// <summary>
+        /// 批次建立多個群組：節點查找表只建立一次，整批在同一次往返中完成
+        /// </summary>
+        private string CreateGroups(JToken data)
+        {
+            var groups = data["groups"] as JArray ?? new JArray();
+            var lookup = BuildNodeLookup();
+            var results = new List<object>();
+            int created = 0;
+
+            foreach (var group in groups)
+            {
+                int count = CreateGroupCore(group, lookup);
+                if (count > 0) created++;
+                results.Add(new { title = group["title"]?.ToString(), nodeCount = count });
+            }
+
+            MCPLogger.Info($"[CreateGroups] Created {created}/{groups.Count} groups in one batch.");
+            return JsonConvert.SerializeObject(new { status = "ok", created = created, requested = groups.Count, groups = results });
+        }
+
+        private Dictionary<Guid, NodeModel> BuildNodeLookup()
+        {
+            var lookup = new Dictionary<Guid, NodeModel>();
+            foreach (var n in _dynamoModel.CurrentWorkspace.Nodes)
+                lookup[n.GUID] = n;
+            return lookup;
+        }
+
+        /// <summary>
+        /// 建立單一群組，回傳實際加入群組的節點數 (0 表示未建立)
+        /// </summary>
+        private int CreateGroupCore(JToken data, Dictionary<Guid, NodeModel> lookup)
         {
             var nodeIds = data["nodeIds"]?.ToObject<List<string>>() ?? new List<string>();
             string title = data["title"]?.ToString() ?? "New Group";
@@ -870,14 +1175,13 @@ namespace DynamoMCPListener
                 else if (_nodeIdMap.TryGetValue(idStr, out Guid mapped)) guid = mapped;
                 else continue;
 
-                var node = _dynamoModel.CurrentWorkspace.Nodes.FirstOrDefault(n => n.GUID == guid);
-                if (node != null) nodesToGroup.Add(node);
+                if (lookup.TryGetValue(guid, out NodeModel node)) nodesToGroup.Add(node);
             }
 
             if (!nodesToGroup.Any())
             {
-                MCPLogger.Warning("[CreateGroup] No valid nodes found.");
-                return;
+                MCPLogger.Warning($"[CreateGroup] No valid nodes found for '{title}'.");
+                return 0;
             }
 
             // Calculate bounding box for group position
@@ -911,6 +1215,7 @@ namespace DynamoMCPListener
             }
 
             MCPLogger.Info($"[CreateGroup] Created group '{title}' with {nodesToGroup.Count} nodes at ({minX:F0}, {minY:F0}).");
+            return nodesToGroup.Count;
         }
     }
 }
@@ -1,4 +1,5 @@
 using System;
+using System.IO;
 using System.Linq;
 using System.Net.WebSockets;
 using System.Text;
@@ -19,6 +20,7 @@ namespace DynamoMCPListener
         private readonly GraphHandler _handler;
         private readonly string _sessionId;
         private CancellationTokenSource _cts;
+        private bool _awaitingHandshakeReply;
 
         public event Action<bool> ConnectionStatusChanged;
 
@@ -48,11 +50,17 @@ namespace DynamoMCPListener
                 {
                     MCPLogger.Info($"[WS] Attempting to connect to {_serverUri}");
                     _ws = new ClientWebSocket();
+                    if (MCPConfig.COMPRESSION_ENABLED)
+                    {
+                        // permessage-deflate：由 Python 端決定實際視窗大小，接收端自動解壓縮
+                        _ws.Options.DangerousDeflateOptions = new WebSocketDeflateOptions();
+                    }
                     await _ws.ConnectAsync(_serverUri, token);
                     MCPLogger.Info("[WS] Connected successfully.");
                     ConnectionStatusChanged?.Invoke(true);
 
                     // 1. Handshake
+                    _awaitingHandshakeReply = true;
                     await SendHandshake();
 
                     // 2. Receive Loop
@@ -81,7 +89,10 @@ namespace DynamoMCPListener
                 action = "handshake",
                 sessionId = _sessionId,
                 fileName = _vm.Model.CurrentWorkspace.FileName ?? "Home",
-                processId = System.Diagnostics.Process.GetCurrentProcess().Id
+                dynamoVersion = _vm.Model.Version, // 伺服器端依版本快取節點 creationName
+                processId = System.Diagnostics.Process.GetCurrentProcess().Id,
+                // GraphHandler 以 JObject 處理指令，MessagePack 在此只會多一次 JSON 轉換，Dynamo 端固定使用 JSON
+                encodings = new[] { "json" }
             };
             await SendMessageAsync(JsonConvert.SerializeObject(handshake));
         }
@@ -98,12 +109,21 @@ namespace DynamoMCPListener
                 }
                 else
                 {
-                    string message = Encoding.UTF8.GetString(buffer, 0, result.Count);
                     // Handle large messages split into Multiple frames
+                    var stream = new MemoryStream();
+                    stream.Write(buffer, 0, result.Count);
                     while (!result.EndOfMessage)
                     {
                         result = await _ws.ReceiveAsync(new ArraySegment<byte>(buffer), token);
-                        message += Encoding.UTF8.GetString(buffer, 0, result.Count);
+                        stream.Write(buffer, 0, result.Count);
+                    }
+
+                    // 收齊所有 frame 後再解碼，避免多位元組字元被切斷
+                    string message = Encoding.UTF8.GetString(stream.GetBuffer(), 0, (int)stream.Length);
+
+                    if (_awaitingHandshakeReply && TryHandleHandshakeReply(message))
+                    {
+                        continue;
                     }
 
                     _ = Task.Run(() => ProcessMessage(message));
@@ -114,6 +134,22 @@ namespace DynamoMCPListener
             }
         }
 
+        private bool TryHandleHandshakeReply(string message)
+        {
+            _awaitingHandshakeReply = false;
+            try
+            {
+                var reply = JObject.Parse(message);
+                if (reply["status"]?.ToString() != "connected") return false;
+                MCPLogger.Info("[WS] Handshake accepted");
+                return true;
+            }
+            catch
+            {
+                return false;
+            }
+        }
+
         private async Task ProcessMessage(string json)
         {
             try
@@ -148,7 +184,10 @@ namespace DynamoMCPListener
         {
             if (_ws?.State != WebSocketState.Open) return;
             var bytes = Encoding.UTF8.GetBytes(message);
-            await _ws.SendAsync(new ArraySegment<byte>(bytes), WebSocketMessageType.Text, true, CancellationToken.None);
+            // 小訊息 (如 status_update) 壓縮效益低，直接送出
+            var flags = WebSocketMessageFlags.EndOfMessage;
+            if (bytes.Length < MCPConfig.COMPRESSION_THRESHOLD) flags |= WebSocketMessageFlags.DisableCompression;
+            await _ws.SendAsync(new ReadOnlyMemory<byte>(bytes), WebSocketMessageType.Text, flags, CancellationToken.None);
         }
 
         private async Task ReportStatus()
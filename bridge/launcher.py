@@ -10,6 +10,7 @@ import time
 import os
 import socket
 import signal
+import json
 from pathlib import Path
 
 class ServerLauncher:
@@ -17,6 +18,25 @@ class ServerLauncher:
         self.server_process = None
         self.project_root = Path(__file__).parent.parent
         self.server_py = self.project_root / "bridge" / "python" / "server.py"
+        # 與 server.py 相同：環境變數 DYNAMO_MCP_SOCKET 優先於 mcp_config.json 的 server.unix_socket
+        self.unix_socket = os.environ.get("DYNAMO_MCP_SOCKET") or self._load_config().get("server", {}).get("unix_socket")
+    
+    def _load_config(self):
+        config_path = self.project_root / "mcp_config.json"
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def is_socket_served(self):
+        """檢查 Unix Domain Socket 是否已有 server.py 在監聽"""
+        if not self.unix_socket or not hasattr(socket, "AF_UNIX") or not os.path.exists(self.unix_socket):
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        result = sock.connect_ex(self.unix_socket)
+        sock.close()
+        return result == 0
     
     def is_port_available(self, port=65296):
         """檢查埠口是否已被佔用"""
@@ -34,7 +54,11 @@ class ServerLauncher:
             print(f"[ERROR] 找不到 server.py: {self.server_py}", file=sys.stderr)
             sys.exit(1)
         
-        # 檢查埠口
+        # 檢查 Unix Socket 與埠口
+        if self.is_socket_served():
+            print(f"[OK] Unix socket {self.unix_socket} already served, server.py is running", file=sys.stderr)
+            return True
+        
         if not self.is_port_available(65296):
             print("[OK] Port 65296 already in use, server.py is running", file=sys.stderr)
             return True
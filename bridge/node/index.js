@@ -22,8 +22,18 @@ const { spawn } = require("child_process");
 const path = require("path");
 const net = require("net");
 
+// MessagePack 為選用相依：未安裝時維持 JSON text frame
+let msgpack = null;
+try {
+    msgpack = require("@msgpack/msgpack");
+} catch (e) {
+    msgpack = null;
+}
+
 // 配置
-const PYTHON_WS_URL = "ws://127.0.0.1:65296"; // MCP Bridge port
+// 設定 DYNAMO_MCP_SOCKET 時改走 Unix Domain Socket (須與 server.py 使用相同路徑)
+const BRIDGE_UNIX_SOCKET = process.platform !== "win32" ? process.env.DYNAMO_MCP_SOCKET : undefined;
+const PYTHON_WS_URL = BRIDGE_UNIX_SOCKET ? `ws+unix://${BRIDGE_UNIX_SOCKET}:/` : "ws://127.0.0.1:65296"; // MCP Bridge port
 const RECONNECT_INTERVAL = 5000; // 5 seconds
 const REQUEST_TIMEOUT = 30000; // 30 seconds
 const PYTHON_STARTUP_TIMEOUT = 5000; // 5 seconds to wait for Python server
@@ -47,6 +57,7 @@ let isConnected = false;
 let pendingRequests = new Map(); // { requestId: { resolve, reject, timer } }
 let requestCounter = 0;
 let pythonProcess = null; // Python server 子程序
+let wireEncoding = "json"; // 與 Python 協商後的訊息編碼
 
 /**
  * 連接至 Python WebSocket Manager
@@ -57,15 +68,17 @@ function connectToPython() {
 
         wsClient = new WebSocket(PYTHON_WS_URL);
 
-        wsClient.on("open", () => {
+        wsClient.on("open", async () => {
             console.error("[MCP Bridge] ✅ Connected to Python WebSocket Manager");
             isConnected = true;
+            wireEncoding = "json";
+            await sendHello();
             resolve();
         });
 
-        wsClient.on("message", (data) => {
+        wsClient.on("message", (data, isBinary) => {
             try {
-                const response = JSON.parse(data.toString());
+                const response = isBinary ? msgpack.decode(data) : JSON.parse(data.toString());
                 console.error(`[MCP Bridge] ← Received from Python:`, JSON.stringify(response).substring(0, 200));
 
                 // 處理回應
@@ -108,6 +121,25 @@ function connectToPython() {
     });
 }
 
+/**
+ * 以 bridge/hello 協商訊息編碼並要求結構化工具結果 (由本端統一序列化為 MCP text)
+ * 舊版 Python 端回傳 Unknown method 時維持 JSON 與字串結果
+ */
+async function sendHello() {
+    try {
+        const result = await sendToPython("bridge/hello", {
+            encodings: msgpack ? ["msgpack", "json"] : ["json"],
+            structuredResults: true
+        });
+        if (msgpack && result && result.encoding === "msgpack") {
+            wireEncoding = "msgpack";
+        }
+        console.error(`[MCP Bridge] Wire encoding: ${wireEncoding}, structured results: ${!!(result && result.structuredResults)}`);
+    } catch (error) {
+        console.error(`[MCP Bridge] Hello negotiation failed, using legacy format: ${error.message}`);
+    }
+}
+
 /**
  * 透過 WebSocket 向 Python 發送請求
  */
@@ -133,7 +165,7 @@ async function sendToPython(method, params) {
         }, REQUEST_TIMEOUT);
 
         pendingRequests.set(requestId, { resolve, reject, timer });
-        wsClient.send(JSON.stringify(request));
+        wsClient.send(wireEncoding === "msgpack" ? msgpack.encode(request) : JSON.stringify(request));
     });
 }
 
@@ -171,7 +203,7 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
 
         console.error(`[MCP Bridge] ✅ Tool executed successfully`);
 
-        return {
+        const reply = {
             content: [
                 {
                     type: "text",
@@ -179,6 +211,11 @@ server.setRequestHandler(CallToolRequestSchema, async (request) => {
                 },
             ],
         };
+        // 參數驗證失敗 (tool_registry 回傳 invalidArguments) 標記為工具錯誤
+        if (result && typeof result === "object" && result.invalidArguments) {
+            reply.isError = true;
+        }
+        return reply;
     } catch (error) {
         console.error(`[MCP Bridge] ❌ Tool execution failed: ${error.message}`);
 
@@ -209,12 +246,31 @@ function isPortAvailable(port) {
     });
 }
 
+/**
+ * 檢查 Unix Domain Socket 是否已有 server.py 在監聽
+ */
+function isSocketServed(socketPath) {
+    return new Promise((resolve) => {
+        const probe = net.connect(socketPath);
+        probe.once('connect', () => {
+            probe.end();
+            resolve(true);
+        });
+        probe.once('error', () => resolve(false));
+    });
+}
+
 /**
  * 啟動 Python Server
  */
 async function startPythonServer() {
     console.error("[MCP Bridge] Checking Python server status...");
     
+    if (BRIDGE_UNIX_SOCKET && await isSocketServed(BRIDGE_UNIX_SOCKET)) {
+        console.error(`[MCP Bridge] ✅ Unix socket ${BRIDGE_UNIX_SOCKET} already served, assuming server.py is running`);
+        return true;
+    }
+    
     // 檢查埠口是否已被佔用
     const portAvailable = await isPortAvailable(65296);
     
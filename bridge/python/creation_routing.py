@@ -0,0 +1,273 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+節點建立路徑學習 (Track A / Track B Routing)
+- 依節點名稱記錄原生建立 (軌道 B) 與 Code Block 降級 (軌道 A) 的成功/失敗次數
+- 原生建立連續失敗 min_failures 次且軌道 A 成功多於失敗時，後續直接以 CODE_BLOCK 策略建立，省去一次失敗往返
+- 直接路由每累積 reprobe_after 次便改回原生建立一次 (安裝套件或升級 Dynamo 後可自動恢復)
+- 統計寫入本機 JSON 檔 (暫存檔 + os.replace)，並可匯出為 common_nodes.json 的 creationStrategy 修補
+  (patch_creation_strategies 只改寫該欄位的值，檔案其餘格式原樣保留，避免版本控制中的整檔差異)
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+TRACK_NATIVE = "B"
+TRACK_CODE_BLOCK = "A"
+STRATEGY_CODE_BLOCK = "CODE_BLOCK"
+
+_MAX_ERROR_LENGTH = 300
+
+
+def _new_entry() -> dict:
+    return {
+        "native": {"ok": 0, "failed": 0},
+        "codeBlock": {"ok": 0, "failed": 0},
+        "nativeStreak": 0,   # 原生建立連續失敗次數
+        "routed": 0,         # 上次原生嘗試後直接路由的次數
+        "lastError": None,
+        "updated": 0
+    }
+
+
+class RoutingTable:
+    def __init__(self, path: str, min_failures: int = 2, reprobe_after: int = 25, enabled: bool = True):
+        self.path = path
+        self.min_failures = max(1, min_failures)
+        self.reprobe_after = reprobe_after
+        self.enabled = enabled
+        self._entries: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.routed = 0
+        if enabled:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            # 損毀的統計檔不影響建立流程，重新累積即可
+            return
+        for name, stored in (data.get("nodes") or {}).items():
+            entry = _new_entry()
+            for key in ("native", "codeBlock"):
+                entry[key].update({k: int(v) for k, v in (stored.get(key) or {}).items() if k in ("ok", "failed")})
+            entry["nativeStreak"] = int(stored.get("nativeStreak", 0))
+            entry["routed"] = int(stored.get("routed", 0))
+            entry["lastError"] = stored.get("lastError")
+            entry["updated"] = stored.get("updated", 0)
+            self._entries[name] = entry
+
+    def _learned(self, entry: dict) -> bool:
+        code_block = entry["codeBlock"]
+        return entry["nativeStreak"] >= self.min_failures and code_block["ok"] > code_block["failed"]
+
+    def record(self, name: str, track: str, ok: bool, error: Optional[str] = None):
+        """記錄一次建立結果；track 為 B (原生) 或 A (Code Block)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entries.setdefault(name, _new_entry())
+            entry["native" if track == TRACK_NATIVE else "codeBlock"]["ok" if ok else "failed"] += 1
+            if track == TRACK_NATIVE:
+                entry["nativeStreak"] = 0 if ok else entry["nativeStreak"] + 1
+                entry["routed"] = 0
+            if not ok and error:
+                entry["lastError"] = str(error)[:_MAX_ERROR_LENGTH]
+            entry["updated"] = int(time.time())
+            self._dirty = True
+
+    def route(self, name: str) -> Optional[str]:
+        """
+        學得的策略：CODE_BLOCK 或 None (依靜態 metadata)；只查詢，不更新計數
+        直接路由已達 reprobe_after 次時回傳 None，讓下一次改走原生建立重新探測 (原生結果經 record 歸零計數)
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or not self._learned(entry):
+                return None
+            if self.reprobe_after and entry["routed"] >= self.reprobe_after:
+                return None
+            return STRATEGY_CODE_BLOCK
+
+    def mark_routed(self, name: str):
+        """節點確實依學得的策略轉為軌道 A 建立時呼叫 (無法轉換而維持原生建立的節點不計)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None or not self._learned(entry):
+                return
+            entry["routed"] += 1
+            self.routed += 1
+            self._dirty = True
+
+    def save(self):
+        """有變更時寫回統計檔；寫入失敗只影響持久化"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": 1, "nodes": self._entries}
+            text = json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+            raise
+
+    def reset(self, name: Optional[str] = None):
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
+            self._dirty = True
+
+    def suggestions(self, metadata: dict) -> List[dict]:
+        """
+        與 common_nodes.json 的 creationStrategy 不一致的學習結果
+        原生持續失敗 -> CODE_BLOCK；靜態為 CODE_BLOCK 但原生最近一次成功 -> NATIVE_DIRECT / NATIVE_WITH_OVERLOAD
+        """
+        result = []
+        with self._lock:
+            for name, entry in sorted(self._entries.items()):
+                info = metadata.get(name)
+                if info is None:
+                    continue
+                current = info.get("creationStrategy", "NATIVE_DIRECT")
+                if self._learned(entry):
+                    learned = STRATEGY_CODE_BLOCK
+                elif current == STRATEGY_CODE_BLOCK and entry["native"]["ok"] > 0 and entry["nativeStreak"] == 0:
+                    learned = "NATIVE_WITH_OVERLOAD" if info.get("overloads") else "NATIVE_DIRECT"
+                else:
+                    continue
+                if learned != current:
+                    result.append({"name": name, "creationStrategy": learned, "current": current,
+                                   "native": dict(entry["native"]), "codeBlock": dict(entry["codeBlock"]),
+                                   "lastError": entry["lastError"]})
+        return result
+
+    def get_table(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: {**entry, "native": dict(entry["native"]), "codeBlock": dict(entry["codeBlock"]),
+                           "strategy": STRATEGY_CODE_BLOCK if self._learned(entry) else None}
+                    for name, entry in sorted(self._entries.items())}
+
+    def get_info(self) -> dict:
+        with self._lock:
+            return {"enabled": self.enabled, "path": self.path, "nodes": len(self._entries),
+                    "learned": sum(1 for entry in self._entries.values() if self._learned(entry)),
+                    "routed": self.routed}
+
+
+# ==========================================
+# common_nodes.json 就地修補
+# ==========================================
+
+_decoder = json.JSONDecoder()
+
+
+def _skip_separators(text: str, i: int) -> int:
+    while i < len(text) and (text[i].isspace() or text[i] == ","):
+        i += 1
+    return i
+
+
+def _top_level_keys(segment: str) -> Dict[str, Tuple[int, int]]:
+    """JSON 物件文字第一層的 {key: (key 起點, 值起點)}"""
+    keys, depth, i = {}, 0, 0
+    while i < len(segment):
+        ch = segment[i]
+        if ch == '"':
+            key, end = _decoder.raw_decode(segment, i)
+            if depth == 1:
+                j = end
+                while segment[j].isspace():
+                    j += 1
+                if segment[j] == ":":
+                    j += 1
+                    while segment[j].isspace():
+                        j += 1
+                    keys[key] = (i, j)
+            i = end
+            continue
+        if ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+        i += 1
+    return keys
+
+
+def _patch_entry(segment: str, strategy: str) -> Optional[str]:
+    """改寫單一節點物件的 creationStrategy；缺少時插入在 "name" 之後，縮排與 "name" 相同"""
+    keys = _top_level_keys(segment)
+    literal = json.dumps(strategy, ensure_ascii=False)
+    if "creationStrategy" in keys:
+        start = keys["creationStrategy"][1]
+        _, end = _decoder.raw_decode(segment, start)
+        return segment[:start] + literal + segment[end:]
+    if "name" not in keys:
+        return None
+    key_start, value_start = keys["name"]
+    _, value_end = _decoder.raw_decode(segment, value_start)
+    line_start = segment.rfind("\n", 0, key_start) + 1
+    indent = segment[line_start:key_start]
+    if line_start and not indent.strip():
+        newline = "\r\n" if segment[line_start - 2:line_start] == "\r\n" else "\n"
+        separator = f",{newline}{indent}"
+    else:
+        separator = ", "
+    return segment[:value_end] + f'{separator}"creationStrategy": {literal}' + segment[value_end:]
+
+
+def patch_creation_strategies(text: str, strategies: Dict[str, str]) -> Tuple[str, List[str]]:
+    """
+    只改寫 common_nodes.json (節點物件陣列) 中指定節點的 creationStrategy 值
+    縮排、鍵順序、換行與其他節點原樣保留；回傳 (新文字, 實際變更的節點名稱)
+    """
+    start = text.index("[") + 1
+    pieces, last, applied = [], 0, []
+    i = _skip_separators(text, start)
+    while i < len(text) and text[i] != "]":
+        entry, end = _decoder.raw_decode(text, i)
+        name = entry.get("name") if isinstance(entry, dict) else None
+        if name in strategies and entry.get("creationStrategy") != strategies[name]:
+            patched = _patch_entry(text[i:end], strategies[name])
+            if patched is not None:
+                pieces.append(text[last:i])
+                pieces.append(patched)
+                last = end
+                applied.append(name)
+        i = _skip_separators(text, end)
+    pieces.append(text[last:])
+    return "".join(pieces), applied
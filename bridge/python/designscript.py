@@ -0,0 +1,645 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+DesignScript 靜態分析 (Code Block 內容)
+- 輕量 tokenizer + 遞迴下降 parser，涵蓋 Code Block 常用語法：
+  賦值 / 型別標註、def 函式、三元運算、範圍 (a..b..#n)、串列 [..]、字典 {k: v}、
+  呼叫 / 成員 / 索引、複寫導引 (<1> / <1L>)、@L2 層級、[Imperative]{...} 區塊 (僅檢查括號平衡)
+- 推導 Code Block 的埠：未在區塊內賦值的變數成為輸入埠 (依出現順序)，每個頂層非 def 敘述一個輸出埠
+  含 [Imperative] 區塊或無法判斷是類別還是變數的大寫名稱 (如 Pt.X) 時，輸入埠視為未知 (ports_known)
+- 語法錯誤分為確定 (字串 / 註解未結束、括號不平衡等) 與不確定 (parser 未涵蓋的語法)，後者僅供警告
+- 收集 Class.Method(...) 呼叫，供依 common_nodes.json 解析函式名稱與參數數量
+- 分析結果依文字雜湊快取 (LRU)；與 C# 端相同，結尾未加分號時自動補上
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+KEYWORDS = {"def", "return", "true", "false", "null", "if", "else", "elseif", "for", "while", "in", "break", "continue"}
+LANGUAGE_BLOCKS = {"Imperative", "Associative"}
+# Dynamo 內建程式庫常用類別；Name.member 的 Name 在此集合 (或節點註冊表) 內時視為類別，否則可能是輸入變數
+KNOWN_CLASSES = frozenset({
+    "Arc", "BoundingBox", "Circle", "Color", "Cone", "CoordinateSystem", "Cuboid", "Curve", "Cylinder", "DateTime",
+    "Dictionary", "Directory", "Edge", "Ellipse", "Face", "File", "Geometry", "Line", "List", "Math", "Mesh",
+    "NurbsCurve", "NurbsSurface", "Object", "Plane", "Point", "PolyCurve", "PolySurface", "Polygon", "Rectangle",
+    "Solid", "Sphere", "String", "Surface", "Topology", "Vector", "Vertex",
+})
+_BRACKETS = {"(": ")", "[": "]", "{": "}"}
+
+# 由長到短比對
+_OPERATORS = ("..", "==", "!=", "<=", ">=", "&&", "||", "@@", "=>",
+              "+", "-", "*", "/", "%", "<", ">", "=", "!", "?", ":", ".", ",", ";",
+              "(", ")", "[", "]", "{", "}", "#", "~", "@", "&", "|")
+
+NUMBER, STRING, CHAR, IDENT, OP, END = "number", "string", "char", "ident", "op", "end"
+
+
+class DesignScriptError(Exception):
+    """definite=False 表示 parser 不認得此語法，但不一定是 Dynamo 的語法錯誤"""
+    def __init__(self, message: str, line: int, column: int, definite: bool = True):
+        super().__init__(message)
+        self.message = message
+        self.line = line
+        self.column = column
+        self.definite = definite
+
+
+class Token:
+    __slots__ = ("kind", "value", "line", "column")
+
+    def __init__(self, kind: str, value: str, line: int, column: int):
+        self.kind = kind
+        self.value = value
+        self.line = line
+        self.column = column
+
+    def __repr__(self):
+        return f"Token({self.kind}, {self.value!r}, {self.line}:{self.column})"
+
+
+def check_brackets(tokens: List[Token]):
+    """括號不平衡為確定的語法錯誤"""
+    stack: List[Token] = []
+    for t in tokens:
+        if t.kind != OP:
+            continue
+        if t.value in _BRACKETS:
+            stack.append(t)
+        elif t.value in _BRACKETS.values():
+            if not stack or _BRACKETS[stack[-1].value] != t.value:
+                raise DesignScriptError(f"Unmatched '{t.value}'", t.line, t.column)
+            stack.pop()
+    if stack:
+        raise DesignScriptError(f"Unclosed '{stack[-1].value}'", stack[-1].line, stack[-1].column)
+
+
+def tokenize(text: str) -> List[Token]:
+    tokens: List[Token] = []
+    i, n = 0, len(text)
+    line, line_start = 1, 0
+    while i < n:
+        ch = text[i]
+        col = i - line_start + 1
+        if ch == "\n":
+            line += 1
+            line_start = i + 1
+            i += 1
+        elif ch in " \t\r\ufeff":
+            i += 1
+        elif text.startswith("//", i):
+            while i < n and text[i] != "\n":
+                i += 1
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            if end < 0:
+                raise DesignScriptError("Unterminated block comment", line, col)
+            line += text.count("\n", i, end)
+            if "\n" in text[i:end]:
+                line_start = text.rfind("\n", i, end) + 1
+            i = end + 2
+        elif ch.isdigit() or (ch == "." and i + 1 < n and text[i + 1].isdigit() and not text.startswith("..", i)):
+            start = i
+            while i < n and text[i].isdigit():
+                i += 1
+            # 1..5 為範圍而非小數
+            if i < n and text[i] == "." and not text.startswith("..", i) and i + 1 < n and text[i + 1].isdigit():
+                i += 1
+                while i < n and text[i].isdigit():
+                    i += 1
+            if i < n and text[i] in "eE" and (i + 1 < n and (text[i + 1].isdigit() or
+                                                          (text[i + 1] in "+-" and i + 2 < n and text[i + 2].isdigit()))):
+                i += 2
+                while i < n and text[i].isdigit():
+                    i += 1
+            tokens.append(Token(NUMBER, text[start:i], line, col))
+        elif ch == '"' or ch == "'":
+            # 字串可跨行 (Code Block 內的多行文字)
+            quote, start, start_line = ch, i, line
+            i += 1
+            while i < n and text[i] != quote:
+                if text[i] == "\\":
+                    i += 1
+                elif text[i] == "\n":
+                    line += 1
+                    line_start = i + 1
+                i += 1
+            if i >= n:
+                raise DesignScriptError("Unterminated string literal", start_line, col)
+            i += 1
+            tokens.append(Token(STRING if quote == '"' else CHAR, text[start:i], start_line, col))
+        elif ch.isalpha() or ch == "_":
+            start = i
+            while i < n and (text[i].isalnum() or text[i] == "_"):
+                i += 1
+            tokens.append(Token(IDENT, text[start:i], line, col))
+        else:
+            for op in _OPERATORS:
+                if text.startswith(op, i):
+                    tokens.append(Token(OP, op, line, col))
+                    i += len(op)
+                    break
+            else:
+                raise DesignScriptError(f"Unexpected character '{ch}'", line, col)
+    tokens.append(Token(END, "", line, i - line_start + 1))
+    return tokens
+
+
+class Analysis:
+    """單段 Code Block 文字的分析結果 (可快取)"""
+    __slots__ = ("error", "inputs", "outputs", "calls", "functions", "qualifiers", "language_blocks")
+
+    def __init__(self):
+        self.error: Optional[dict] = None    # {line, column, message, definite}
+        self.inputs: List[str] = []          # 輸入埠 (變數名稱，依出現順序)
+        self.outputs: List[Optional[str]] = []  # 每個輸出埠對應的變數 (無名稱的運算式為 None)
+        self.calls: List[Tuple[str, int, int]] = []  # (Class.Method, 參數數量, 行號)
+        self.functions: List[str] = []       # 區塊內定義的函式
+        self.qualifiers: List[str] = []      # 以 Name.member 使用、未在區塊內賦值的大寫名稱 (類別或輸入變數)
+        self.language_blocks = 0             # [Imperative] / [Associative] 區塊數 (內部名稱不推導)
+
+    def ports_known(self, classes: Iterable[str] = ()) -> bool:
+        """輸入埠是否可確定：無語言區塊，且每個大寫限定名稱都是已知類別"""
+        if self.error is not None or self.language_blocks:
+            return False
+        return all(q in KNOWN_CLASSES or q in classes for q in self.qualifiers)
+
+    def to_dict(self) -> dict:
+        if self.error is not None:
+            return {"valid": False, "error": self.error}
+        return {"valid": True, "inputs": list(self.inputs), "outputs": len(self.outputs),
+                "outputNames": list(self.outputs), "functions": list(self.functions), "portsKnown": self.ports_known(),
+                "calls": [{"name": c[0], "args": c[1], "line": c[2]} for c in self.calls]}
+
+
+class _Parser:
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.pos = 0
+        self.refs: Dict[str, None] = {}  # 頂層運算式引用的名稱 (保持順序)
+        self.assigned = set()
+        self.calls: List[Tuple[str, int, int]] = []
+        self.functions: List[str] = []
+        self.qualifiers: Dict[str, None] = {}  # 頂層 Name.member 的大寫 Name (保持順序)
+        self.language_blocks = 0
+        self.scope: Optional[set] = None  # 函式本體內的區域名稱
+
+    # ---- token 工具 ----
+
+    @property
+    def tok(self) -> Token:
+        return self.tokens[self.pos]
+
+    def peek(self, offset: int = 1) -> Token:
+        return self.tokens[min(self.pos + offset, len(self.tokens) - 1)]
+
+    def at(self, value: str, offset: int = 0) -> bool:
+        t = self.peek(offset) if offset else self.tok
+        return t.kind == OP and t.value == value
+
+    def advance(self) -> Token:
+        t = self.tok
+        self.pos += 1
+        return t
+
+    def expect(self, value: str) -> Token:
+        if not self.at(value):
+            self.fail(f"Expected '{value}'")
+        return self.advance()
+
+    def fail(self, message: str):
+        t = self.tok
+        found = "end of code" if t.kind == END else f"'{t.value}'"
+        raise DesignScriptError(f"{message}, found {found}", t.line, t.column, definite=False)
+
+    def type_suffix(self):
+        """型別名稱後的陣列階層：int[] / double[][] / var[]..[]"""
+        while self.at("[") and self.at("]", 1):
+            self.advance()
+            self.advance()
+            if self.at("..") and self.at("[", 1) and self.at("]", 2):
+                self.advance()
+
+    # ---- 敘述 ----
+
+    def program(self) -> List[Optional[str]]:
+        outputs = []
+        while self.tok.kind != END:
+            if self.at(";"):
+                self.advance()
+                continue
+            if self.tok.kind == IDENT and self.tok.value == "def":
+                self.function_def()
+                continue
+            outputs.append(self.statement())
+        return outputs
+
+    def statement(self) -> Optional[str]:
+        """回傳賦值的變數名稱 (運算式敘述為 None)"""
+        t = self.tok
+        # 型別標註：a : double = 1; / a : int[] = ...
+        if t.kind == IDENT and self.at(":", 1) and self.peek(2).kind == IDENT:
+            name = self.advance().value
+            self.advance()
+            self.advance()
+            self.type_suffix()
+            self.expect("=")
+            self.expression()
+            self.expect(";")
+            self._assign(name)
+            return name
+        start = self.pos
+        target = self.expression()
+        if self.at("="):
+            if target is None:
+                raise DesignScriptError("Invalid assignment target", self.tokens[start].line, self.tokens[start].column)
+            self.advance()
+            self.expression()
+            self.expect(";")
+            self._assign(target)
+            return target
+        self.expect(";")
+        return None
+
+    def _assign(self, name: str):
+        if self.scope is not None:
+            self.scope.add(name)
+        else:
+            self.assigned.add(name)
+
+    def function_def(self):
+        self.advance()
+        if self.tok.kind != IDENT:
+            self.fail("Expected function name")
+        name = self.advance().value
+        self.functions.append(name)
+        outer, self.scope = self.scope, set()
+        self.expect("(")
+        while not self.at(")"):
+            if self.tok.kind != IDENT:
+                self.fail("Expected parameter name")
+            self.scope.add(self.advance().value)
+            if self.at(":"):
+                self.advance()
+                if self.tok.kind != IDENT:
+                    self.fail("Expected parameter type")
+                self.advance()
+                self.type_suffix()
+            if self.at("="):
+                self.advance()
+                self.expression()
+            if not self.at(")"):
+                self.expect(",")
+        self.advance()
+        if self.at(":"):  # 回傳型別
+            self.advance()
+            if self.tok.kind != IDENT:
+                self.fail("Expected return type")
+            self.advance()
+            self.type_suffix()
+        if self.at("="):
+            self.advance()
+            self.expression()
+            self.expect(";")
+        else:
+            self.expect("{")
+            while not self.at("}"):
+                if self.tok.kind == END:
+                    self.fail("Expected '}'")
+                if self.tok.kind == IDENT and self.tok.value == "return":
+                    self.advance()
+                    if self.at("="):
+                        self.advance()
+                    self.expression()
+                    self.expect(";")
+                elif self.at(";"):
+                    self.advance()
+                else:
+                    self.statement()
+            self.advance()
+        self.scope = outer
+
+    # ---- 運算式 (回傳可作為賦值目標的變數名稱，否則 None) ----
+
+    def expression(self) -> Optional[str]:
+        name = self.logic_or()
+        if self.at("?"):
+            self.advance()
+            self.expression()
+            self.expect(":")
+            self.expression()
+            return None
+        return name
+
+    def _binary(self, operators: tuple, operand) -> Optional[str]:
+        name = operand()
+        while self.tok.kind == OP and self.tok.value in operators:
+            self.advance()
+            operand()
+            name = None
+        return name
+
+    def logic_or(self):
+        return self._binary(("||",), self.logic_and)
+
+    def logic_and(self):
+        return self._binary(("&&",), self.equality)
+
+    def equality(self):
+        return self._binary(("==", "!="), self.relational)
+
+    def relational(self):
+        return self._binary(("<", ">", "<=", ">="), self.range)
+
+    def range(self):
+        name = self.additive()
+        count = 0
+        while self.at("..") and count < 2:
+            self.advance()
+            if self.at("#") or self.at("~"):
+                self.advance()
+            self.additive()
+            name = None
+            count += 1
+        return name
+
+    def additive(self):
+        return self._binary(("+", "-"), self.multiplicative)
+
+    def multiplicative(self):
+        return self._binary(("*", "/", "%"), self.unary)
+
+    def unary(self):
+        if self.at("-") or self.at("!") or self.at("+"):
+            self.advance()
+            self.unary()
+            return None
+        return self.postfix()
+
+    def postfix(self) -> Optional[str]:
+        start = self.tok
+        name, qualified = self.primary()
+        if name is not None:
+            # 名稱後接 ( 為函式呼叫；大寫開頭後接 . 視為類別 (如 Point.ByCoordinates)；其餘為變數引用
+            if not self.at("(") and not (self.at(".") and name[:1].isupper()):
+                self._reference(name)
+            elif self.at(".") and self.scope is None:
+                self.qualifiers.setdefault(name)
+        while True:
+            if self.at("("):
+                args = self.arguments()
+                if qualified and "." in qualified:
+                    self.calls.append((qualified, args, start.line))
+                name, qualified = None, None
+            elif self.at("."):
+                self.advance()
+                if self.tok.kind != IDENT:
+                    self.fail("Expected member name")
+                member = self.advance().value
+                qualified = f"{qualified}.{member}" if qualified else None
+                name = None
+            elif self.at("["):
+                self.advance()
+                self.expression()
+                self.expect("]")
+                qualified = None
+            elif self.at("<") and self.peek().kind == NUMBER and (
+                    self.at(">", 2) or (self.peek(2).kind == IDENT and self.peek(2).value == "L" and self.at(">", 3))):
+                # 複寫導引 xs<1> / xs<1L>
+                self.advance()
+                self.advance()
+                if self.tok.kind == IDENT:
+                    self.advance()
+                self.advance()
+                name, qualified = None, None
+            elif (self.at("@") or self.at("@@")) and self.peek().kind == IDENT:
+                self.advance()
+                self.advance()
+                name, qualified = None, None
+            else:
+                break
+        return name
+
+    def _reference(self, name: str):
+        if self.scope is not None:
+            return  # 函式本體無法存取 Code Block 輸入埠，不推導
+        self.refs.setdefault(name)
+
+    def arguments(self) -> int:
+        self.expect("(")
+        count = 0
+        while not self.at(")"):
+            self.expression()
+            count += 1
+            if not self.at(")"):
+                self.expect(",")
+        self.advance()
+        return count
+
+    def primary(self) -> Tuple[Optional[str], Optional[str]]:
+        t = self.tok
+        if t.kind in (NUMBER, STRING, CHAR):
+            self.advance()
+            return None, None
+        if t.kind == IDENT:
+            if t.value in ("true", "false", "null"):
+                self.advance()
+                return None, None
+            if t.value in KEYWORDS:
+                self.fail("Unexpected keyword")
+            self.advance()
+            return t.value, t.value
+        if self.at("("):
+            self.advance()
+            self.expression()
+            self.expect(")")
+            return None, None
+        if self.at("[") and self.peek().kind == IDENT and self.peek().value in LANGUAGE_BLOCKS and self.at("]", 2):
+            self.language_block()
+            return None, None
+        if self.at("["):
+            self.advance()
+            while not self.at("]"):
+                self.expression()
+                if not self.at("]"):
+                    self.expect(",")
+            self.advance()
+            return None, None
+        if self.at("{"):
+            self.advance()
+            while not self.at("}"):
+                self.expression()
+                if not self.at(":"):
+                    t = self.tok
+                    raise DesignScriptError("List literals use [ ] since Dynamo 2.0; { } requires key: value pairs",
+                                            t.line, t.column)
+                self.advance()
+                self.expression()
+                if not self.at("}"):
+                    self.expect(",")
+            self.advance()
+            return None, None
+        self.fail("Expected an expression")
+
+    def language_block(self):
+        """[Imperative]{ ... }：只檢查括號平衡，不推導內部名稱 (輸入埠因此視為未知)"""
+        self.language_blocks += 1
+        self.advance()
+        self.advance()
+        self.advance()
+        opening = self.expect("{")
+        depth = 1
+        while depth:
+            t = self.advance()
+            if t.kind == END:
+                raise DesignScriptError("Unterminated language block", opening.line, opening.column)
+            if t.kind == OP and t.value == "{":
+                depth += 1
+            elif t.kind == OP and t.value == "}":
+                depth -= 1
+
+
+def analyze(text: str) -> Analysis:
+    """分析 Code Block 文字 (與 C# 端相同，結尾自動補分號)"""
+    result = Analysis()
+    code = text.rstrip()
+    if code and not code.endswith(";"):
+        code += ";"
+    try:
+        tokens = tokenize(code)
+        parser = _Parser(tokens)
+        try:
+            result.outputs = parser.program()
+        except DesignScriptError as e:
+            if not e.definite:
+                check_brackets(tokens)  # 括號不平衡時改報確定的錯誤位置
+            raise
+    except DesignScriptError as e:
+        result.error = {"line": e.line, "column": e.column, "message": e.message, "definite": e.definite}
+        return result
+    defined = parser.assigned | set(parser.functions)
+    result.inputs = [name for name in parser.refs if name not in defined]
+    result.qualifiers = [name for name in parser.qualifiers if name not in defined and name not in parser.refs]
+    result.language_blocks = parser.language_blocks
+    result.calls = parser.calls
+    result.functions = parser.functions
+    return result
+
+
+# ==========================================
+# 函式名稱解析 (依 common_nodes.json)
+# ==========================================
+
+class FunctionRegistry:
+    """Class -> {Method: 可接受的參數數量}；資料來源不完整，未知名稱只列為警告"""
+
+    def __init__(self, metadata: Dict[str, dict]):
+        self.classes: Dict[str, Dict[str, set]] = {}
+        for name, info in (metadata or {}).items():
+            if "." not in name:
+                continue
+            cls, method = name.split(".", 1)
+            arities = {len(info.get("inputs") or [])} | {len(o.get("inputs") or []) for o in info.get("overloads", [])}
+            self.classes.setdefault(cls, {}).setdefault(method, set()).update(arities)
+
+    def resolve(self, analysis: Analysis) -> List[dict]:
+        warnings = []
+        for qualified, args, line in analysis.calls:
+            cls, _, method = qualified.partition(".")
+            methods = self.classes.get(cls)
+            if methods is None or "." in method:
+                continue
+            if method not in methods:
+                warnings.append({"code": "unknown_function", "line": line,
+                                 "message": f"{qualified} is not in the node registry (known: {', '.join(f'{cls}.{m}' for m in sorted(methods))})"})
+            elif args not in methods[method]:
+                warnings.append({"code": "argument_count", "line": line,
+                                 "message": f"{qualified} called with {args} argument(s); registry overloads take {', '.join(map(str, sorted(methods[method])))}"})
+        return warnings
+
+
+# ==========================================
+# 分析快取
+# ==========================================
+
+class DesignScriptAnalyzer:
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Analysis]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def analyze(self, text: str) -> Analysis:
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        result = analyze(text)
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return result
+
+    def get_info(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+# ==========================================
+# Python 值 -> DesignScript 字面值
+# ==========================================
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+
+
+def is_number_literal(text: str) -> bool:
+    """完整為一個數值字面值 (可含負號與指數)，如 -5、1e3、.5"""
+    body = text.strip()
+    if body[:1] in "+-":
+        body = body[1:].lstrip()
+    try:
+        tokens = tokenize(body)
+    except DesignScriptError:
+        return False
+    return len(tokens) == 2 and tokens[0].kind == NUMBER
+
+
+def to_literal(value, raw_expression=None) -> str:
+    """
+    將 Python 值轉為 DesignScript 字面值
+    字串若為數值，或 raw_expression(value) 為真 (呼叫端判定為運算式)，原樣輸出；否則加引號並跳脫
+    """
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return repr(value) if value == value and value not in (float("inf"), float("-inf")) else "null"
+    if isinstance(value, (list, tuple)):
+        return "[" + ", ".join(to_literal(v, raw_expression) for v in value) + "]"
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"\"{_escape(str(k))}\": {to_literal(v, raw_expression)}" for k, v in value.items()) + "}"
+    text = str(value)
+    if is_number_literal(text) or (raw_expression is not None and raw_expression(text)):
+        return text.strip().rstrip(";")
+    return f"\"{_escape(text)}\""
@@ -0,0 +1,336 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Graph Analytics Engine
+以 CSR (Compressed Sparse Row) 鄰接陣列表示節點圖，所有分析皆為 O(V + E)：
+拓撲排序、循環偵測、最長相依鏈、不可達/無效節點、扇入扇出熱點、連通分量，
+以及供 auto_group 使用的分群：union-find 連通分量 (analyze 亦共用)、相依深度分層、標籤傳播社群偵測
+CSR 以標準庫 array 儲存，不需額外相依
+"""
+
+import heapq
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 預設視為「輸出端」的節點名稱 (用於判斷無效節點)
+DEFAULT_SINK_NAMES = ("Watch", "Watch 3D", "Watch Image")
+
+
+class CSRGraph:
+    """
+    有向圖的 CSR 表示
+    - indptr[i] : indptr[i+1] 為節點 i 的下游鄰居在 indices 中的範圍
+    - rindptr / rindices 為反向 (上游) 鄰接
+    """
+
+    __slots__ = ("ids", "names", "n", "m", "indptr", "indices", "rindptr", "rindices")
+
+    def __init__(self, ids: Sequence[str], names: Sequence[str], edges: Iterable[Tuple[int, int]]):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.n = len(self.ids)
+        src, dst = array("l"), array("l")
+        for a, b in edges:
+            src.append(a)
+            dst.append(b)
+        self.m = len(src)
+        self.indptr, self.indices = _build_csr(self.n, src, dst)
+        self.rindptr, self.rindices = _build_csr(self.n, dst, src)
+
+    @classmethod
+    def from_graph(cls, nodes: List[dict], connectors: List[dict]) -> "CSRGraph":
+        """由節點與連線清單建立 (get_graph_status 或 instructions 格式皆可)"""
+        index: Dict[str, int] = {}
+        ids, names = [], []
+        for n in nodes:
+            nid = str(n.get("id"))
+            if nid in index:
+                continue
+            index[nid] = len(ids)
+            ids.append(nid)
+            names.append(str(n.get("name", "")))
+        edges = []
+        for c in connectors:
+            a = index.get(str(c.get("from")))
+            b = index.get(str(c.get("to")))
+            if a is not None and b is not None:
+                edges.append((a, b))
+        return cls(ids, names, edges)
+
+    def successors(self, i: int):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def predecessors(self, i: int):
+        return self.rindices[self.rindptr[i]:self.rindptr[i + 1]]
+
+    def out_degree(self) -> list:
+        return _degrees(self.indptr)
+
+    def in_degree(self) -> list:
+        return _degrees(self.rindptr)
+
+
+def _build_csr(n: int, src: array, dst: array):
+    """以計數排序建立 CSR，時間 O(V + E)"""
+    counts = [0] * (n + 1)
+    for a in src:
+        counts[a + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    indptr = array("l", counts)
+    cursor = list(counts[:n])
+    indices = array("l", bytes(array("l").itemsize * len(src)))
+    for a, b in zip(src, dst):
+        indices[cursor[a]] = b
+        cursor[a] += 1
+    return indptr, indices
+
+
+def _degrees(indptr) -> list:
+    return [indptr[i + 1] - indptr[i] for i in range(len(indptr) - 1)]
+
+
+def topological_order(g: CSRGraph) -> Tuple[List[int], List[int]]:
+    """Kahn 演算法；回傳 (拓撲順序, 因循環而無法排序的節點)"""
+    indeg = g.in_degree()
+    queue = deque(i for i in range(g.n) if indeg[i] == 0)
+    order = []
+    while queue:
+        i = queue.popleft()
+        order.append(i)
+        for j in g.successors(i):
+            indeg[j] -= 1
+            if indeg[j] == 0:
+                queue.append(j)
+    remaining = [i for i in range(g.n) if indeg[i] > 0]
+    return order, remaining
+
+
+def strongly_connected_cycles(g: CSRGraph) -> List[List[int]]:
+    """迭代式 Tarjan 演算法，回傳所有構成循環的強連通分量 (大小 > 1 或自我迴圈)"""
+    index_of = [-1] * g.n
+    low = [0] * g.n
+    on_stack = [False] * g.n
+    stack: List[int] = []
+    cycles = []
+    counter = 0
+
+    for root in range(g.n):
+        if index_of[root] != -1:
+            continue
+        work = [(root, g.indptr[root])]
+        index_of[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            v, ptr = work[-1]
+            if ptr < g.indptr[v + 1]:
+                work[-1] = (v, ptr + 1)
+                w = g.indices[ptr]
+                if index_of[w] == -1:
+                    index_of[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, g.indptr[w]))
+                elif on_stack[w]:
+                    low[v] = min(low[v], index_of[w])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[v])
+            if low[v] == index_of[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                if len(component) > 1 or v in g.successors(v):
+                    cycles.append(component)
+    return cycles
+
+
+def longest_chain(g: CSRGraph, order: Optional[List[int]] = None) -> List[int]:
+    """在拓撲順序上做 DP 求最長相依鏈 (忽略循環內的節點)"""
+    if order is None:
+        order, _ = topological_order(g)
+    if not order:
+        return []
+    dist = [0] * g.n
+    prev = [-1] * g.n
+    for i in order:
+        for j in g.successors(i):
+            if dist[i] + 1 > dist[j]:
+                dist[j] = dist[i] + 1
+                prev[j] = i
+    end = max(order, key=lambda i: dist[i])
+    chain = [end]
+    while prev[chain[-1]] != -1:
+        chain.append(prev[chain[-1]])
+    chain.reverse()
+    return chain
+
+
+def union_find_components(g: CSRGraph) -> List[int]:
+    """以 union-find (路徑壓縮 + 依大小合併) 計算弱連通分量，標籤依首次出現順序編號"""
+    parent = list(range(g.n))
+    size = [1] * g.n
+
+    def find(i: int) -> int:
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    for a in range(g.n):
+        for b in g.successors(a):
+            ra, rb = find(a), find(b)
+            if ra == rb:
+                continue
+            if size[ra] < size[rb]:
+                ra, rb = rb, ra
+            parent[rb] = ra
+            size[ra] += size[rb]
+
+    relabel: Dict[int, int] = {}
+    return [relabel.setdefault(find(i), len(relabel)) for i in range(g.n)]
+
+
+def dependency_depths(g: CSRGraph) -> List[int]:
+    """
+    每個節點的相依深度 (來源節點為 0，其餘為最長上游路徑長度)
+    循環內無法排序的節點放在最深一層之後
+    """
+    order, cyclic = topological_order(g)
+    depth = [0] * g.n
+    for i in order:
+        for j in g.successors(i):
+            if depth[i] + 1 > depth[j]:
+                depth[j] = depth[i] + 1
+    if cyclic:
+        deepest = max((depth[i] for i in order), default=-1) + 1
+        for i in cyclic:
+            depth[i] = deepest
+    return depth
+
+
+def label_propagation(g: CSRGraph, max_iter: int = 20) -> List[int]:
+    """
+    無向標籤傳播社群偵測：每個節點採用鄰居中最常見的標籤 (平手取最小標籤)
+    依固定順序非同步更新，結果可重現；每輪 O(V + E)
+    """
+    labels = list(range(g.n))
+    for _ in range(max_iter):
+        changed = False
+        for i in range(g.n):
+            counts: Dict[int, int] = {}
+            for j in g.successors(i):
+                counts[labels[j]] = counts.get(labels[j], 0) + 1
+            for j in g.predecessors(i):
+                counts[labels[j]] = counts.get(labels[j], 0) + 1
+            if not counts:
+                continue
+            best = max(counts.values())
+            if counts.get(labels[i]) == best:
+                continue
+            labels[i] = min(lbl for lbl, c in counts.items() if c == best)
+            changed = True
+        if not changed:
+            break
+    relabel: Dict[int, int] = {}
+    return [relabel.setdefault(lbl, len(relabel)) for lbl in labels]
+
+
+def _reach(g: CSRGraph, seeds: Iterable[int], forward: bool) -> List[bool]:
+    seen = [False] * g.n
+    queue = deque()
+    for s in seeds:
+        if not seen[s]:
+            seen[s] = True
+            queue.append(s)
+    neighbours = g.successors if forward else g.predecessors
+    while queue:
+        i = queue.popleft()
+        for j in neighbours(i):
+            if not seen[j]:
+                seen[j] = True
+                queue.append(j)
+    return seen
+
+
+def _top_k(values: List[int], k: int) -> List[int]:
+    if k <= 0:
+        return []
+    return heapq.nlargest(k, range(len(values)), key=values.__getitem__)
+
+
+def analyze(g: CSRGraph, top: int = 10, sink_names: Sequence[str] = DEFAULT_SINK_NAMES, max_items: int = 100) -> dict:
+    """執行全部分析並回傳精簡摘要"""
+    def ref(i: int) -> dict:
+        return {"id": g.ids[i], "name": g.names[i]}
+
+    def capped(items: List[int]) -> dict:
+        return {"count": len(items), "nodes": [ref(i) for i in items[:max_items]]}
+
+    order, cyclic = topological_order(g)
+    cycles = strongly_connected_cycles(g) if cyclic else []
+    chain = longest_chain(g, order)
+    labels = union_find_components(g)
+    outdeg, indeg = g.out_degree(), g.in_degree()
+
+    component_sizes: Dict[int, int] = {}
+    for lbl in labels:
+        component_sizes[lbl] = component_sizes.get(lbl, 0) + 1
+    sizes = sorted(component_sizes.values(), reverse=True)
+
+    isolated = [i for i in range(g.n) if indeg[i] == 0 and outdeg[i] == 0]
+    sources = [i for i in range(g.n) if indeg[i] == 0]
+    from_sources = _reach(g, sources, forward=True)
+    unreachable = [i for i in range(g.n) if not from_sources[i]]
+
+    sink_set = set(sink_names)
+    sinks = [i for i in range(g.n) if g.names[i] in sink_set]
+    if sinks:
+        to_sinks = _reach(g, sinks, forward=False)
+        dead = [i for i in range(g.n) if not to_sinks[i] and indeg[i] + outdeg[i] > 0]
+    else:
+        dead = []
+
+    return {
+        "nodeCount": g.n,
+        "edgeCount": g.m,
+        "isDAG": not cyclic,
+        "cycles": {
+            "count": len(cycles),
+            "components": [[ref(i) for i in comp[:max_items]] for comp in cycles[:max_items]]
+        },
+        "longestChain": {"length": max(0, len(chain) - 1), "nodes": [ref(i) for i in chain[:max_items]]},
+        "components": {"count": len(sizes), "largestSizes": sizes[:top]},
+        "isolated": capped(isolated),
+        "unreachable": capped(unreachable),
+        "deadEnds": {**capped(dead), "sinkNames": list(sink_names), "sinksFound": len(sinks)},
+        "hotspots": {
+            "fanIn": [{**ref(i), "degree": indeg[i]} for i in _top_k(indeg, top) if indeg[i] > 0],
+            "fanOut": [{**ref(i), "degree": outdeg[i]} for i in _top_k(outdeg, top) if outdeg[i] > 0]
+        },
+        "topologicalOrder": [g.ids[i] for i in order]
+    }
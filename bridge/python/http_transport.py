@@ -0,0 +1,277 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+精簡 HTTP/1.1 伺服器 (asyncio streams，無額外相依)
+- 持久連線：HTTP/1.1 預設 keep-alive，閒置超過 keep_alive_timeout 才關閉
+  (閒置時間只計算等待請求行與標頭；本文另以 body_timeout 限制，大型上傳不會被當成閒置連線切斷)
+- Pipelining：同一連線上的請求依序讀取、依序回應，用戶端可連續送出多個請求不必等待
+- Server-Sent Events：以 chunked 傳輸串流事件，結束後連線仍可重用
+"""
+
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+MAX_HEADER_BYTES = 64 * 1024
+DEFAULT_MAX_BODY = 16 * 1024 * 1024
+DEFAULT_BODY_TIMEOUT = 60.0
+
+STATUS_TEXT = {
+    200: "OK", 202: "Accepted", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 406: "Not Acceptable", 408: "Request Timeout",
+    413: "Payload Too Large", 415: "Unsupported Media Type", 500: "Internal Server Error",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or STATUS_TEXT.get(status, ""))
+        self.status = status
+
+
+class HttpRequest:
+    __slots__ = ("method", "target", "path", "query", "version", "headers", "body")
+
+    def __init__(self, method: str, target: str, version: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.target = target
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return "keep-alive" in connection
+        return "close" not in connection
+
+    def accepts(self, media_type: str) -> bool:
+        accept = self.headers.get("accept", "*/*")
+        return media_type in accept or "*/*" in accept
+
+
+async def read_request(reader: asyncio.StreamReader, max_body: int = DEFAULT_MAX_BODY,
+                       head_timeout: Optional[float] = None,
+                       body_timeout: Optional[float] = None) -> Optional[HttpRequest]:
+    """
+    讀取一個請求；連線在請求之間正常關閉時回傳 None
+    head_timeout: 等待請求行與標頭的上限 (逾時拋出 asyncio.TimeoutError，視為閒置)
+    body_timeout: 讀取本文的上限 (逾時回應 408)
+    """
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), head_timeout)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise HttpError(400, "Incomplete request head")
+    except asyncio.LimitOverrunError:
+        raise HttpError(400, "Request head too large")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        read_body = _read_chunked(reader, max_body)
+    else:
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > max_body:
+            raise HttpError(413)
+        read_body = reader.readexactly(length) if length else None
+    body = b""
+    if read_body is not None:
+        try:
+            body = await asyncio.wait_for(read_body, body_timeout)
+        except asyncio.TimeoutError:
+            raise HttpError(408, "Request body timeout")
+    return HttpRequest(method.upper(), target, version, headers, body)
+
+
+async def _read_chunked(reader: asyncio.StreamReader, max_body: int) -> bytes:
+    chunks, total = [], 0
+    while True:
+        try:
+            size = int((await reader.readuntil(b"\r\n")).split(b";", 1)[0].strip(), 16)
+        except ValueError:
+            raise HttpError(400, "Invalid chunk size")
+        if size == 0:
+            await reader.readuntil(b"\r\n")  # 略過 trailer 結尾
+            return b"".join(chunks)
+        total += size
+        if total > max_body:
+            raise HttpError(413)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+class ResponseWriter:
+    """單一請求的回應：一般回應 (send) 或 SSE 串流 (start_stream / event / end_stream)"""
+
+    def __init__(self, writer: asyncio.StreamWriter, keep_alive: bool):
+        self._writer = writer
+        self.keep_alive = keep_alive
+        self.sent = False
+        self.streamed = False
+        self._streaming = False
+
+    def _head(self, status: int, headers: Dict[str, str]) -> bytes:
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        headers = {**headers, "Connection": "keep-alive" if self.keep_alive else "close"}
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def send(self, status: int, body: bytes = b"", content_type: str = "application/json",
+                   headers: Optional[Dict[str, str]] = None):
+        head = {"Content-Length": str(len(body))}
+        if body:
+            head["Content-Type"] = content_type
+        self._writer.write(self._head(status, {**head, **(headers or {})}) + body)
+        self.sent = True
+        await self._writer.drain()
+
+    async def start_stream(self, headers: Optional[Dict[str, str]] = None):
+        head = {"Content-Type": "text/event-stream", "Cache-Control": "no-cache", "Transfer-Encoding": "chunked"}
+        self._writer.write(self._head(200, {**head, **(headers or {})}))
+        self.sent = True
+        self.streamed = True
+        self._streaming = True
+        await self._writer.drain()
+
+    async def event(self, data: str, event: Optional[str] = None, event_id: Optional[str] = None):
+        lines = []
+        if event_id is not None:
+            lines.append(f"id: {event_id}")
+        if event:
+            lines.append(f"event: {event}")
+        lines.extend(f"data: {line}" for line in data.split("\n"))
+        payload = ("\n".join(lines) + "\n\n").encode("utf-8")
+        self._writer.write(b"%x\r\n%s\r\n" % (len(payload), payload))
+        await self._writer.drain()
+
+    async def end_stream(self):
+        if self._streaming:
+            self._writer.write(b"0\r\n\r\n")
+            self._streaming = False
+            await self._writer.drain()
+
+
+class HttpStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.open_connections = 0
+        self.requests = 0
+        self.reused = 0
+        self.streams = 0
+        self.errors = 0
+
+    def get_info(self) -> dict:
+        with self._lock:
+            return {
+                "connections": self.connections,
+                "openConnections": self.open_connections,
+                "requests": self.requests,
+                "keepAliveReuses": self.reused,
+                "sseStreams": self.streams,
+                "errors": self.errors
+            }
+
+
+Handler = Callable[[HttpRequest, ResponseWriter], Awaitable[None]]
+
+
+class HttpServer:
+    def __init__(self, handler: Handler, keep_alive_timeout: float = 30.0,
+                 max_body: int = DEFAULT_MAX_BODY, stats: Optional[HttpStats] = None,
+                 body_timeout: float = DEFAULT_BODY_TIMEOUT):
+        self.handler = handler
+        self.keep_alive_timeout = keep_alive_timeout
+        self.body_timeout = body_timeout
+        self.max_body = max_body
+        self.stats = stats or HttpStats()
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self._handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        stats = self.stats
+        with stats._lock:
+            stats.connections += 1
+            stats.open_connections += 1
+        served = 0
+        try:
+            while True:
+                try:
+                    # 第一個請求之後的等待即為 keep-alive 閒置時間；本文讀取另計 body_timeout
+                    request = await read_request(reader, self.max_body, self.keep_alive_timeout, self.body_timeout)
+                except asyncio.TimeoutError:
+                    break
+                except HttpError as e:
+                    await ResponseWriter(writer, keep_alive=False).send(e.status, str(e).encode("utf-8"), "text/plain")
+                    break
+                if request is None:
+                    break
+                with stats._lock:
+                    stats.requests += 1
+                    stats.reused += 1 if served else 0
+                served += 1
+                response = ResponseWriter(writer, request.keep_alive)
+                try:
+                    await self.handler(request, response)
+                except HttpError as e:
+                    if response.sent:
+                        break
+                    await response.send(e.status, str(e).encode("utf-8"), "text/plain")
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    raise
+                except Exception as e:
+                    with stats._lock:
+                        stats.errors += 1
+                    if response.sent:
+                        break
+                    response.keep_alive = False
+                    await response.send(500, str(e).encode("utf-8"), "text/plain")
+                if response.streamed:
+                    with stats._lock:
+                        stats.streams += 1
+                    await response.end_stream()
+                if not response.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            with stats._lock:
+                stats.open_connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
@@ -0,0 +1,315 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Instruction Graph Validator (指令圖預檢)
+在送往 Dynamo 前以單次線性掃描檢查批次指令，避免送出後才在 C# 端逐一失敗：
+- 重複的節點 ID (C# 端會覆寫 ID 對應，前一個節點變成無法連線的孤兒)
+- 連線端點缺漏或指向不存在的節點 (批次內、先前批次建立的字串 ID、工作區既有 GUID)
+- toPort 超出範圍、toPortName 不存在 (C# 端找不到名稱時會靜默改用索引)；有多載的節點依綁定的簽名檢查 (見 node_binding.py)
+- 連線形成循環 (Tarjan 強連通分量，含經由工作區既有連線構成的循環)
+- Python Script 節點的 pythonCode 語法與 IN/OUT 慣例 (見 python_code_check.py)
+- Code Block / Number 節點的 DesignScript 語法 (只有確定的錯誤阻擋送出)、函式名稱與推導出的輸入/輸出埠 (見 designscript.py)
+
+埠資訊取自 common_nodes.json 綁定的簽名，只檢查已知型別；未知型別交由 Dynamo 判斷
+"""
+
+import uuid
+from typing import Collection, Dict, List, Optional, Tuple
+
+from graph_analytics import CSRGraph, strongly_connected_cycles
+from python_code_check import PythonCodeChecker
+from designscript import DesignScriptAnalyzer, FunctionRegistry
+from node_binding import BindingError, SignatureBinder
+
+# C# GraphHandler 內建處理的節點：Code Block 的輸入埠由程式碼決定，不檢查
+_PYTHON_NAMES = ("Python Script", "PythonScript")
+_CODE_BLOCK_NAMES = ("Number", "Code Block")
+_WATCH_PORTS = (1, None)
+# uuid.UUID 接受的格式長度：32 位 hex、標準格式、{...}、urn:uuid:...
+_GUID_LENGTHS = (32, 36, 38, 45)
+
+
+def _guid_key(value) -> Optional[str]:
+    """GUID 形式的 ID 正規化為小寫標準格式 (與 get_graph_status 輸出一致)，否則回傳 None"""
+    if len(str(value)) not in _GUID_LENGTHS:
+        return None  # 一般字串 ID 不必進入 uuid 解析
+    try:
+        return str(uuid.UUID(str(value)))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def _is_python_node(name: str) -> bool:
+    return name == _PYTHON_NAMES[0] or _PYTHON_NAMES[1] in name
+
+
+def _port_index(value) -> Optional[int]:
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value)
+    return None
+
+
+class InstructionValidator:
+    def __init__(self, metadata: Dict[str, dict], max_errors: int = 50,
+                 python_checker: Optional[PythonCodeChecker] = None,
+                 designscript: Optional[DesignScriptAnalyzer] = None,
+                 binder: Optional[SignatureBinder] = None):
+        self.max_errors = max_errors
+        self.python_checker = python_checker or PythonCodeChecker()
+        self.designscript = designscript or DesignScriptAnalyzer()
+        self.functions = FunctionRegistry(metadata)
+        self.binder = binder or SignatureBinder(metadata)
+
+    def _node_ports(self, entry: dict) -> Optional[Tuple[int, Optional[frozenset]]]:
+        node = entry["spec"]
+        name = str(node.get("name") or "")
+        if entry.get("code") is not None:
+            # Code Block 的輸入埠即未在區塊內賦值的變數；含語言區塊或不明大寫名稱時埠數未知，不檢查
+            analysis = entry["code"]
+            if not analysis.ports_known(self.functions.classes):
+                return None
+            return len(analysis.inputs), frozenset(v.lower() for v in analysis.inputs)
+        if entry.get("signature") is not None:
+            signature = entry["signature"]
+            return len(signature.inputs), signature.port_names
+        if name == "Watch":
+            return _WATCH_PORTS
+        if _is_python_node(name):
+            count = _port_index(node.get("inputCount"))
+            if count is None or count < 1:
+                count = 1
+            return count, frozenset(f"in[{i}]" for i in range(count))
+        return None
+
+    @staticmethod
+    def external_refs(instruction: dict) -> Tuple[set, set]:
+        """回傳連線引用但不在本批次內的 ID：(GUID 形式, 字串形式)"""
+        local = set()
+        for node in instruction.get("nodes", []):
+            if isinstance(node, dict) and node.get("id") is not None:
+                local.add(str(node["id"]))
+                guid = _guid_key(node["id"])
+                if guid:
+                    local.add(guid)
+        guid_refs, name_refs = set(), set()
+        for c in instruction.get("connectors", []):
+            for end in ("from", "to"):
+                ref = c.get(end) if isinstance(c, dict) else None
+                if ref is None or ref == "" or str(ref) in local:
+                    continue
+                guid = _guid_key(ref)
+                if guid is None:
+                    name_refs.add(str(ref))
+                elif guid not in local:
+                    guid_refs.add(guid)
+        return guid_refs, name_refs
+
+    def validate(self, instruction: dict, workspace: Optional[dict] = None,
+                 known_ids: Optional[Collection[str]] = None) -> dict:
+        """
+        workspace: 目標 Session 的 get_graph_status 結果，用於確認 GUID 引用存在並偵測跨批次循環
+        known_ids: 先前批次建立的字串 ID (C# 端 ID 對應表)
+        兩者為 None 時，對應的外部引用只列為警告 (無法確認)
+        """
+        errors: List[dict] = []
+        warnings: List[dict] = []
+        dropped = 0
+
+        def error(code: str, message: str, **detail):
+            nonlocal dropped
+            if len(errors) < self.max_errors:
+                errors.append({"code": code, "message": message, **detail})
+            else:
+                dropped += 1
+
+        nodes = instruction.get("nodes", [])
+        connectors = instruction.get("connectors", [])
+        # 多載推斷需要接入的連線 (與 SignatureBinder.bind_instruction 相同的輸入，共用快取)
+        incoming: Dict[str, list] = {}
+        for c in connectors:
+            if isinstance(c, dict) and c.get("to") is not None:
+                incoming.setdefault(str(c["to"]), []).append(c)
+
+        # ---- 節點：ID 索引與重複檢查 ----
+        local: Dict[str, dict] = {}
+        for i, node in enumerate(nodes):
+            if not isinstance(node, dict):
+                error("invalid_node", f"nodes[{i}] is not an object", node=i)
+                continue
+            node_id = node.get("id")
+            signature = None
+            try:
+                signature = self.binder.bind(node, incoming.get(str(node_id), ()))
+            except BindingError as e:
+                error(e.code, f"nodes[{i}] ({node_id}): {e}", node=i, id=node_id)
+            if signature is not None and isinstance(node.get("params"), dict):
+                unknown = [p for p in node["params"] if str(p).lower() not in signature.port_names]
+                if unknown:
+                    warnings.append({"code": "unknown_param", "node": i, "id": node_id,
+                                     "message": f"nodes[{i}] ({node_id}): params {', '.join(map(str, unknown))} not in "
+                                                f"{signature.name}{f' ({signature.overload})' if signature.overload else ''} "
+                                                f"inputs ({', '.join(signature.inputs)}); they will be ignored"})
+            code = node.get("script") if node.get("script") is not None else node.get("pythonCode")
+            if isinstance(code, str) and _is_python_node(str(node.get("name") or "")):
+                # 與 C# 端相同：script 優先於 pythonCode
+                declared = _port_index(node.get("inputCount")) if node.get("inputCount") is not None else None
+                code_errors, code_warnings = self.python_checker.check(code, declared)
+                for e in code_errors:
+                    error(e.pop("code"), f"nodes[{i}] ({node_id}): {e.pop('message')}", node=i, id=node_id, **e)
+                warnings.extend({**w, "message": f"nodes[{i}] ({node_id}): {w['message']}", "node": i, "id": node_id}
+                                for w in code_warnings)
+            analysis = None
+            if node.get("value") is not None and node.get("name") in _CODE_BLOCK_NAMES:
+                analysis = self.designscript.analyze(str(node["value"]))
+                if analysis.error is not None:
+                    e = analysis.error
+                    message = f"nodes[{i}] ({node_id}): DesignScript error at line {e['line']}, column {e['column']}: {e['message']}"
+                    if e["definite"]:
+                        error("designscript_syntax", message, node=i, id=node_id, line=e["line"], column=e["column"])
+                    else:
+                        # parser 未涵蓋的語法不一定是錯誤，交由 Dynamo 判斷
+                        warnings.append({"code": "designscript_unparsed", "message": message, "node": i, "id": node_id,
+                                         "line": e["line"], "column": e["column"]})
+                    analysis = None
+                else:
+                    warnings.extend({**w, "message": f"nodes[{i}] ({node_id}): {w['message']}", "node": i, "id": node_id}
+                                    for w in self.functions.resolve(analysis))
+            if node_id is None:
+                continue
+            key = _guid_key(node_id) or str(node_id)
+            if key in local:
+                error("duplicate_node_id", f"Duplicate node id '{node_id}' (nodes[{local[key]['index']}] and nodes[{i}])",
+                      node=i, id=str(node_id))
+                continue
+            local[key] = {"index": i, "spec": node, "code": analysis, "signature": signature}
+
+        existing_guids = None
+        if workspace is not None:
+            existing_guids = {_guid_key(n.get("id")) or str(n.get("id")) for n in workspace.get("nodes", [])}
+        known = set(known_ids) if known_ids is not None else None
+
+        # ---- 連線：端點解析與埠檢查 ----
+        batch_edges = []
+        targeted_inputs = set()
+        unverified = set()
+        for i, c in enumerate(connectors):
+            if not isinstance(c, dict):
+                error("invalid_connector", f"connectors[{i}] is not an object", connector=i)
+                continue
+            ends = {}
+            for end in ("from", "to"):
+                ref = c.get(end)
+                if ref is None or ref == "":
+                    error("missing_endpoint", f"connectors[{i}] has no '{end}'", connector=i)
+                    continue
+                guid = _guid_key(ref)
+                key = guid or str(ref)
+                ends[end] = key
+                if key in local:
+                    continue
+                if guid is not None:
+                    if existing_guids is None:
+                        unverified.add(str(ref))
+                    elif guid not in existing_guids:
+                        error("dangling_connector", f"connectors[{i}].{end} '{ref}' does not match any node in the batch or workspace",
+                              connector=i, end=end, id=str(ref))
+                elif known is None:
+                    unverified.add(str(ref))
+                elif key not in known:
+                    error("dangling_connector", f"connectors[{i}].{end} '{ref}' does not match any node in the batch or earlier batches",
+                          connector=i, end=end, id=str(ref))
+
+            for field in ("fromPort", "toPort"):
+                index = _port_index(c.get(field))
+                if index is None or index < 0:
+                    error("invalid_port", f"connectors[{i}].{field} must be a non-negative integer, got {c.get(field)!r}",
+                          connector=i, field=field)
+
+            target = local.get(ends.get("to"))
+            if target is not None and not (existing_guids and ends["to"] in existing_guids):
+                # 工作區既有節點以 GUID 更新時，實際埠由既有型別決定，不檢查
+                ports = self._node_ports(target)
+                if ports is not None:
+                    count, names = ports
+                    to_port = _port_index(c.get("toPort"))
+                    port_name = c.get("toPortName")
+                    if port_name and names is not None and str(port_name).lower() not in names:
+                        error("unknown_port_name",
+                              f"connectors[{i}].toPortName '{port_name}' not found on {target['spec'].get('name')} (inputs: {', '.join(sorted(names))})",
+                              connector=i, id=ends["to"])
+                    elif not port_name and to_port is not None and to_port >= count:
+                        error("port_out_of_range",
+                              f"connectors[{i}].toPort {to_port} out of range for {target['spec'].get('name')} ({count} input(s))",
+                              connector=i, id=ends["to"])
+
+            source = local.get(ends.get("from"))
+            if source is not None and source["code"] is not None and not (existing_guids and ends["from"] in existing_guids):
+                from_port = _port_index(c.get("fromPort"))
+                outputs = len(source["code"].outputs)
+                if from_port is not None and from_port >= outputs:
+                    error("port_out_of_range",
+                          f"connectors[{i}].fromPort {from_port} out of range for {source['spec'].get('name')} ({outputs} output(s))",
+                          connector=i, id=ends["from"])
+
+            if "from" in ends and "to" in ends:
+                batch_edges.append({"from": ends["from"], "to": ends["to"]})
+                targeted_inputs.add((ends["to"], _port_index(c.get("toPort"))))
+
+        # ---- 循環：批次連線 + 工作區既有連線 (將被同一輸入埠取代的舊連線除外) ----
+        if batch_edges:
+            graph_ids = dict.fromkeys(local)
+            graph_edges = list(batch_edges)
+            for e in batch_edges:
+                graph_ids.setdefault(e["from"])
+                graph_ids.setdefault(e["to"])
+            if workspace is not None:
+                for c in workspace.get("connectors", []):
+                    src = _guid_key(c.get("from")) or str(c.get("from"))
+                    dst = _guid_key(c.get("to")) or str(c.get("to"))
+                    if (dst, _port_index(c.get("toPort"))) not in targeted_inputs:
+                        graph_ids.setdefault(src)
+                        graph_ids.setdefault(dst)
+                        graph_edges.append({"from": src, "to": dst})
+            csr = CSRGraph.from_graph([{"id": key} for key in graph_ids], graph_edges)
+            for component in strongly_connected_cycles(csr):
+                ids = [csr.ids[j] for j in component]
+                error("cycle", f"Connectors form a cycle through {len(ids)} node(s): {', '.join(ids[:10])}{' ...' if len(ids) > 10 else ''}",
+                      ids=ids[:50])
+
+        if unverified:
+            warnings.append({
+                "code": "unverified_reference",
+                "message": "Connector endpoints outside this batch could not be verified without a connected session",
+                "ids": sorted(unverified)[:50]
+            })
+
+        report = {
+            "valid": not errors,
+            "errors": errors,
+            "warnings": warnings,
+            "nodeCount": len(nodes),
+            "connectorCount": len(connectors)
+        }
+        if dropped:
+            report["truncatedErrors"] = dropped
+        return report
@@ -0,0 +1,127 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+JSON Codec 後端
+- 依序嘗試 orjson / ujson，皆未安裝時使用標準庫 json；可由 mcp_config.json 的 runtime.json_backend 指定
+- 輸出一律為 str (WebSocket text frame)，非 ASCII 字元不跳脫，與 json.dumps(ensure_ascii=False) 相同
+- 快速後端無法處理的輸入 (超過 64 位元的整數、Newtonsoft 輸出的 NaN/Infinity 等) 自動退回標準庫
+"""
+
+import json
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # orjson 為選用相依
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # ujson 為選用相依
+    ujson = None
+
+STDLIB = "json"
+ORJSON = "orjson"
+UJSON = "ujson"
+
+AVAILABLE_BACKENDS = tuple(name for name, module in ((ORJSON, orjson), (UJSON, ujson), (STDLIB, json))
+                           if module is not None)
+
+
+def _std_dumps(obj, indent: bool = False) -> str:
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+
+def _std_loads(raw):
+    return json.loads(raw)
+
+
+def _orjson_dumps(obj, indent: bool = False) -> str:
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+    try:
+        return orjson.dumps(obj, option=option).decode("utf-8")
+    except TypeError:
+        return _std_dumps(obj, indent)
+
+
+def _orjson_loads(raw):
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return json.loads(raw)
+
+
+def _ujson_dumps(obj, indent: bool = False) -> str:
+    try:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False, indent=2 if indent else 0)
+    except (TypeError, OverflowError):
+        return _std_dumps(obj, indent)
+
+
+def _ujson_loads(raw):
+    try:
+        return ujson.loads(raw)
+    except ValueError:
+        return json.loads(raw)
+
+
+_IMPLEMENTATIONS = {
+    STDLIB: (_std_dumps, _std_loads),
+    ORJSON: (_orjson_dumps, _orjson_loads),
+    UJSON: (_ujson_dumps, _ujson_loads),
+}
+
+_active = STDLIB
+_dumps, _loads = _IMPLEMENTATIONS[STDLIB]
+
+
+def select(name: Optional[str] = "auto") -> str:
+    """
+    切換後端並回傳實際使用的名稱
+    auto 取第一個可用的快速後端；指定的後端未安裝時退回標準庫
+    """
+    global _active, _dumps, _loads
+    name = (name or "auto").lower()
+    if name == "auto":
+        name = AVAILABLE_BACKENDS[0]
+    elif name not in AVAILABLE_BACKENDS:
+        name = STDLIB
+    _active = name
+    _dumps, _loads = _IMPLEMENTATIONS[name]
+    return name
+
+
+def dumps(obj, indent: bool = False) -> str:
+    return _dumps(obj, indent)
+
+
+def loads(raw):
+    return _loads(raw)
+
+
+def active_backend() -> str:
+    return _active
+
+
+def backend_info() -> dict:
+    module = {ORJSON: orjson, UJSON: ujson, STDLIB: json}[_active]
+    return {
+        "name": _active,
+        "version": getattr(module, "__version__", None),
+        "available": list(AVAILABLE_BACKENDS)
+    }
+
+
+select("auto")
@@ -0,0 +1,136 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Memory Bank 增量載入
+- 以 (mtime, size) 偵測 memory-bank/*.md 與 lessons/*.md 的變更，只重新讀取變更的檔案
+- 每次 refresh 建立新的摘要字典後一次替換引用，讀取端拿到的永遠是完整的快照
+- refresh 為同步函式，由伺服器以 asyncio.to_thread 在事件迴圈外定期執行 (輪詢 mtime，
+  Windows / Linux / macOS 行為一致，不需 inotify 等平台相依套件)
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# 摘要欄位 -> 核心文件檔名
+CORE_FILES = {
+    "projectBrief": "projectbrief.md",
+    "productContext": "productContext.md",
+    "systemPatterns": "systemPatterns.md",
+    "techContext": "techContext.md",
+    "activeContext": "activeContext.md",
+    "progress": "progress.md",
+}
+LESSONS_DIR = "lessons"
+
+
+def _parse_lesson(file_name: str, content: str) -> Optional[dict]:
+    """教訓檔案取第一行為標題、前 10 行為摘要；空檔案略過"""
+    if not content:
+        return None
+    lines = content.split('\n')
+    title = lines[0].strip('# ').strip() if lines else Path(file_name).stem
+    return {"file": file_name, "title": title, "summary": '\n'.join(lines[:10])}
+
+
+class MemoryBank:
+    def __init__(self, root: Path, log=None):
+        self.root = Path(root)
+        self._log = log or (lambda message: None)
+        self._stats: Dict[str, Tuple[int, int]] = {}   # 相對路徑 -> (mtime_ns, size)
+        self._contents: Dict[str, str] = {}
+        self._refresh_lock = threading.Lock()
+        # (摘要, 載入時間字串) 以單一 tuple 替換，讀取端不會看到新舊混合的狀態
+        self._snapshot: Tuple[Optional[dict], Optional[str]] = (None, None)
+        self.last_changes: dict = {}
+        self.refresh_count = 0
+
+    def snapshot(self) -> Tuple[Optional[dict], Optional[str]]:
+        return self._snapshot
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        found = {}
+        for rel in list(CORE_FILES.values()) + [f"{LESSONS_DIR}/{entry.name}" for entry in self._lesson_entries()]:
+            try:
+                st = os.stat(self.root / rel)
+            except OSError:
+                continue
+            found[rel] = (st.st_mtime_ns, st.st_size)
+        return found
+
+    def _lesson_entries(self) -> List[os.DirEntry]:
+        try:
+            with os.scandir(self.root / LESSONS_DIR) as it:
+                return [entry for entry in it if entry.name.endswith(".md") and entry.is_file()]
+        except OSError:
+            return []
+
+    def _read(self, rel: str) -> str:
+        try:
+            return (self.root / rel).read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError) as e:
+            self._log(f"[WARN] Failed to read {self.root / rel}: {e}")
+            return ""
+
+    def refresh(self, force: bool = False) -> dict:
+        """
+        重新讀取有變更的檔案並替換摘要；回傳 {status, changed, added, removed, loadTime, lessonsCount}
+        無變更時不重建摘要 (loadTime 維持上次載入時間)
+        """
+        with self._refresh_lock:
+            if not self.root.exists():
+                was_missing = self._snapshot[0] is not None and self._snapshot[0].get("status") == "error"
+                self._stats.clear()
+                self._contents.clear()
+                self._snapshot = ({"status": "error", "message": "memory-bank 資料夾不存在"}, None)
+                if not was_missing:
+                    self._log("[WARN] memory-bank/ directory not found")
+                return dict(self._snapshot[0])
+
+            current = self._scan()
+            added = sorted(rel for rel in current if rel not in self._stats)
+            removed = sorted(rel for rel in self._stats if rel not in current)
+            changed = sorted(rel for rel in current if rel in self._stats and (force or current[rel] != self._stats[rel]))
+            if not (added or removed or changed) and self._snapshot[0] is not None:
+                summary, load_time = self._snapshot
+                return {"status": "ok", "changed": [], "added": [], "removed": [], "loadTime": load_time,
+                        "lessonsCount": len(summary.get("lessons", []))}
+
+            for rel in added + changed:
+                self._contents[rel] = self._read(rel)
+            for rel in removed:
+                self._contents.pop(rel, None)
+            self._stats = current
+
+            now = time.time()
+            lesson_prefix = f"{LESSONS_DIR}/"
+            lessons = [_parse_lesson(rel[len(lesson_prefix):], self._contents[rel])
+                       for rel in sorted(self._contents) if rel.startswith(lesson_prefix)]
+            summary = {"status": "ok", "loadTime": now,
+                       **{key: self._contents.get(file_name, "") for key, file_name in CORE_FILES.items()},
+                       "lessons": [lesson for lesson in lessons if lesson is not None]}
+            load_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+            self._snapshot = (summary, load_time)
+            self.last_changes = {"changed": changed, "added": added, "removed": removed, "time": load_time}
+            self.refresh_count += 1
+            return {"status": "ok", "changed": changed, "added": added, "removed": removed,
+                    "loadTime": load_time, "lessonsCount": len(summary["lessons"])}
+
+    def get_info(self) -> dict:
+        summary, load_time = self._snapshot
+        return {"files": len(self._stats), "loadTime": load_time, "refreshes": self.refresh_count,
+                "lastChanges": dict(self.last_changes), "status": summary.get("status") if summary else None}
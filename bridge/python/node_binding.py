@@ -0,0 +1,157 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+多載綁定 (Overload Binding)
+將 common_nodes.json 內的節點規範綁定到具體的簽名 (fullName + 輸入埠清單)：
+- 指定 "overload" (如 "2D" / "3D") 時依 id 綁定，不存在的 id 回報錯誤
+- 未指定時選擇能涵蓋 params、toPortName 與 toPort 索引的最短簽名；沒有任何參數或連線時使用頂層預設簽名
+- bind_instruction 為整批的綁定階段：將推斷出的 overload id 與 fullName (creationName) 寫回節點，
+  之後的參數展開、指令預檢與軌道 A 代碼產生都以明確的 id 查詢同一份快取，結果一致
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class Signature(NamedTuple):
+    name: str
+    overload: Optional[str]     # overload id；頂層簽名若與某個 overload 相同則帶該 id
+    full_name: Optional[str]
+    inputs: Tuple[str, ...]
+    port_names: frozenset       # 小寫埠名稱 (C# 端 toPortName 不分大小寫)
+
+
+class BindingError(ValueError):
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class SignatureBinder:
+    def __init__(self, metadata: Dict[str, dict], max_entries: int = 1024):
+        self.max_entries = max_entries
+        # 名稱 -> (頂層預設簽名, overload 簽名...)
+        self._signatures: Dict[str, Tuple[Signature, ...]] = {}
+        for name, info in (metadata or {}).items():
+            overloads = [o for o in info.get("overloads", []) if isinstance(o, dict)]
+            default_id = next((o.get("id") for o in overloads if info.get("fullName") and o.get("fullName") == info.get("fullName")), None)
+            signatures = [self._signature(name, default_id, info.get("fullName"), info.get("inputs"))]
+            signatures += [self._signature(name, o.get("id"), o.get("fullName"), o.get("inputs")) for o in overloads]
+            self._signatures[name] = tuple(signatures)
+        self._cache: "OrderedDict[tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _signature(name: str, overload, full_name, inputs) -> Signature:
+        inputs = tuple(str(p) for p in (inputs or []))
+        return Signature(name, str(overload) if overload is not None else None, full_name, inputs,
+                         frozenset(p.lower() for p in inputs))
+
+    def signatures(self, name: str) -> Tuple[Signature, ...]:
+        return self._signatures.get(name, ())
+
+    def has_overloads(self, name: str) -> bool:
+        return isinstance(name, str) and len(self._signatures.get(name, ())) > 1
+
+    def bind(self, node: dict, incoming: Iterable[dict] = ()) -> Optional[Signature]:
+        """
+        綁定單一節點；不在 metadata 內回傳 None，指定了不存在的 overload 時拋出 BindingError
+        incoming: 接入此節點的連線 (用於推斷；節點已指定 overload 時忽略)
+        """
+        name = node.get("name")
+        signatures = self._signatures.get(name) if isinstance(name, str) else None
+        if not signatures:
+            return None
+        if len(signatures) == 1:
+            return signatures[0]
+        overload = node.get("overload")
+        if overload is not None:
+            key = (name, "id", str(overload))
+        else:
+            params = node.get("params")
+            used = {str(p).lower() for p in params} if isinstance(params, dict) else set()
+            max_index = -1
+            for c in incoming:
+                if c.get("toPortName"):
+                    used.add(str(c["toPortName"]).lower())
+                elif isinstance(c.get("toPort"), int):
+                    max_index = max(max_index, c["toPort"])
+            key = (name, "infer", frozenset(used), max_index)
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if cached is None:
+            cached = self._resolve(signatures, key)
+            with self._lock:
+                self._cache[key] = cached
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        if isinstance(cached, BindingError):
+            raise cached
+        return cached
+
+    @staticmethod
+    def _resolve(signatures: Tuple[Signature, ...], key: tuple):
+        if key[1] == "id":
+            wanted = key[2]
+            match = next((s for s in signatures[1:] if s.overload is not None and s.overload.lower() == wanted.lower()), None)
+            if match is None:
+                ids = ", ".join(s.overload for s in signatures[1:] if s.overload is not None)
+                return BindingError("unknown_overload", f"{signatures[0].name} has no overload '{wanted}' (available: {ids})")
+            return match
+        used, max_index = key[2], key[3]
+        if not used and max_index < 0:
+            return signatures[0]
+        candidates = [s for s in signatures if used <= s.port_names and max_index < len(s.inputs)]
+        if not candidates:
+            return signatures[0]
+        return min(candidates, key=lambda s: len(s.inputs))
+
+    def bind_instruction(self, instruction: dict) -> List[dict]:
+        """
+        綁定階段：有多載的節點寫回推斷出的 overload id 與 creationName (fullName)，回傳錯誤清單
+        已指定 creationName 的節點保留原值
+        """
+        nodes = [n for n in instruction.get("nodes", []) if isinstance(n, dict) and self.has_overloads(n.get("name"))]
+        if not nodes:
+            return []
+        incoming: Dict[str, list] = {}
+        for c in instruction.get("connectors", []):
+            if isinstance(c, dict) and c.get("to") is not None:
+                incoming.setdefault(str(c["to"]), []).append(c)
+        errors = []
+        for node in nodes:
+            try:
+                signature = self.bind(node, incoming.get(str(node.get("id")), ()))
+            except BindingError as e:
+                errors.append({"code": e.code, "message": f"Node '{node.get('id')}': {e}", "id": node.get("id")})
+                continue
+            if signature.overload is not None:
+                node["overload"] = signature.overload
+            if signature.full_name:
+                node.setdefault("creationName", signature.full_name)
+        return errors
+
+    def get_info(self) -> dict:
+        with self._lock:
+            return {"names": len(self._signatures), "entries": len(self._cache), "hits": self.hits, "misses": self.misses}
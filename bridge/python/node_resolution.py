@@ -0,0 +1,170 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+節點 creationName 解析快取 (BUG-003)
+- 外掛節點 (Custom Node) 以名稱字串建立時 Dynamo 常無法解析，唯一穩定的識別是 creationName (GUID)
+- 每個 Dynamo 版本一份：顯示名稱 / fullName / creationName -> creationName，由 list_nodes 搜尋結果填入
+- 同一名稱對應多個 creationName 時視為模稜兩可，回傳候選清單而不猜測
+- 搜尋無結果 (missing) 與有結果但無完全相符 (unmatched，照原樣送出) 的名稱只記在記憶體中
+  (安裝套件後重啟即重新查詢)；對照表寫入本機 JSON 檔
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+UNKNOWN_VERSION = "unknown"
+
+# C# 端自行處理或 Dynamo 可直接解析的節點名稱，不需查詢
+BUILTIN_NAMES = frozenset(("Number", "Code Block", "Python Script", "PythonScript", "Watch"))
+
+_GUID_RE = re.compile(r"^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$")
+
+
+def is_guid(name: str) -> bool:
+    return bool(_GUID_RE.match(name.strip("{}")))
+
+
+class _VersionIndex:
+    """單一 Dynamo 版本的對照表；entries 為持久化內容，其餘為衍生索引"""
+    __slots__ = ("entries", "exact", "folded", "missing", "unmatched")
+
+    def __init__(self):
+        self.entries: Dict[str, dict] = {}     # creationName -> {name, fullName}
+        self.exact: Dict[str, Set[str]] = {}   # 名稱 -> {creationName}
+        self.folded: Dict[str, Set[str]] = {}  # 小寫名稱 -> {creationName}
+        self.missing: Set[str] = set()
+        self.unmatched: Set[str] = set()
+
+    def add(self, creation_name: str, name: Optional[str], full_name: Optional[str]) -> bool:
+        added = creation_name not in self.entries
+        self.entries[creation_name] = {"name": name, "fullName": full_name}
+        for key in (name, full_name, creation_name):
+            if key:
+                self.exact.setdefault(key, set()).add(creation_name)
+                self.folded.setdefault(key.lower(), set()).add(creation_name)
+                self.missing.discard(key)
+                self.unmatched.discard(key)
+        return added
+
+    def lookup(self, name: str) -> Set[str]:
+        return self.exact.get(name) or self.folded.get(name.lower()) or set()
+
+
+class CreationNameCache:
+    def __init__(self, path: str, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self._versions: Dict[str, _VersionIndex] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.searches = 0
+        if enabled:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for version, entries in (data.get("versions") or {}).items():
+            index = self._versions.setdefault(version, _VersionIndex())
+            for creation_name, entry in entries.items():
+                index.add(creation_name, entry.get("name"), entry.get("fullName"))
+
+    def _index(self, version: Optional[str]) -> _VersionIndex:
+        return self._versions.setdefault(version or UNKNOWN_VERSION, _VersionIndex())
+
+    def add(self, version: Optional[str], nodes: Iterable[dict]) -> int:
+        """填入 list_nodes 的搜尋結果 ({name, fullName, creationName})；回傳新增筆數"""
+        added = 0
+        with self._lock:
+            index = self._index(version)
+            for node in nodes:
+                if not isinstance(node, dict):
+                    continue
+                creation_name = node.get("creationName") or node.get("fullName")
+                if creation_name and index.add(str(creation_name), node.get("name"), node.get("fullName")):
+                    added += 1
+            if added:
+                self._dirty = True
+        return added
+
+    def lookup(self, version: Optional[str], name: str) -> Tuple[Optional[str], List[dict]]:
+        """
+        回傳 (creationName, 候選清單)
+        唯一對應時 creationName 有值；模稜兩可時為 None 並附候選；未收錄時兩者皆空
+        """
+        with self._lock:
+            index = self._index(version)
+            found = index.lookup(name)
+            if len(found) == 1:
+                self.hits += 1
+                return next(iter(found)), []
+            self.misses += 1
+            return None, [{"creationName": c, **index.entries[c]} for c in sorted(found)]
+
+    def is_missing(self, version: Optional[str], name: str) -> bool:
+        with self._lock:
+            return name in self._index(version).missing
+
+    def mark_missing(self, version: Optional[str], name: str):
+        with self._lock:
+            self._index(version).missing.add(name)
+
+    def is_unmatched(self, version: Optional[str], name: str) -> bool:
+        with self._lock:
+            return name in self._index(version).unmatched
+
+    def mark_unmatched(self, version: Optional[str], name: str):
+        """搜尋有結果但沒有完全相符的名稱：照原樣送出，不再重複搜尋"""
+        with self._lock:
+            self._index(version).unmatched.add(name)
+
+    def save(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": 1, "versions": {v: index.entries for v, index in self._versions.items() if index.entries}}
+            text = json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True)
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+            raise
+
+    def get_info(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "versions": {v: {"entries": len(index.entries), "missing": len(index.missing), "unmatched": len(index.unmatched)}
+                             for v, index in self._versions.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+                "searches": self.searches
+            }
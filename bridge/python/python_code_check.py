@@ -0,0 +1,139 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Python Script 節點程式碼預檢
+- 以 ast 解析並編譯 pythonCode，語法錯誤 (含 return/break 位置錯誤) 附行號回報
+- 檢查 Dynamo 慣例：IN[k] 索引不得超出輸入埠數量、須對 OUT 賦值、不應覆寫 IN
+- 分析結果依程式碼雜湊快取 (LRU)，重複使用的範本只解析一次；輸入埠數量的比對每次重新計算
+
+以伺服器的 CPython 文法檢查，對應 Dynamo 2.13 起預設的 CPython3 引擎
+"""
+
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+
+class CodeAnalysis:
+    """單段程式碼與輸入埠數量無關的分析結果 (可快取)"""
+    __slots__ = ("syntax_error", "in_indices", "in_unpack", "assigns_out", "assigns_in")
+
+    def __init__(self):
+        self.syntax_error: Optional[dict] = None
+        self.in_indices: List[tuple] = []   # (索引, 行號)，僅常數索引
+        self.in_unpack: Optional[tuple] = None  # (解包數量, 行號)，如 a, b = IN
+        self.assigns_out = False
+        self.assigns_in: Optional[int] = None  # 覆寫 IN 的行號
+
+
+def _analyze(code: str) -> CodeAnalysis:
+    result = CodeAnalysis()
+    try:
+        tree = ast.parse(code, filename="<pythonCode>")
+        compile(tree, "<pythonCode>", "exec")
+    except SyntaxError as e:
+        result.syntax_error = {"line": e.lineno, "column": e.offset, "message": e.msg, "text": (e.text or "").strip()}
+        return result
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "IN":
+            index = node.slice
+            if isinstance(index, ast.Index):  # Python 3.8 以前的包裝
+                index = index.value
+            if isinstance(index, ast.Constant) and isinstance(index.value, int) and not isinstance(index.value, bool):
+                result.in_indices.append((index.value, node.lineno))
+        elif isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            if node.id == "OUT":
+                result.assigns_out = True
+            elif node.id == "IN" and result.assigns_in is None:
+                result.assigns_in = node.lineno
+        elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Name) and node.value.id == "IN":
+            for target in node.targets:
+                if isinstance(target, (ast.Tuple, ast.List)) and not any(isinstance(e, ast.Starred) for e in target.elts):
+                    result.in_unpack = (len(target.elts), node.lineno)
+        elif isinstance(node, ast.Global) and "OUT" in node.names:
+            result.assigns_out = True
+    return result
+
+
+class PythonCodeChecker:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, CodeAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def analyze(self, code: str) -> CodeAnalysis:
+        key = hashlib.sha1(code.encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        analysis = _analyze(code)
+        with self._lock:
+            self._cache[key] = analysis
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return analysis
+
+    def check(self, code: str, input_count: Optional[int] = None) -> tuple:
+        """
+        回傳 (errors, warnings)，每筆為 {code, message, line}
+        input_count 為 None (未宣告 inputCount) 時以 Dynamo 預設的 1 個輸入埠比對，超出僅列為警告
+        """
+        analysis = self.analyze(code)
+        errors, warnings = [], []
+        if analysis.syntax_error is not None:
+            e = analysis.syntax_error
+            errors.append({
+                "code": "python_syntax",
+                "message": f"SyntaxError at line {e['line']}: {e['message']}" + (f" ({e['text']})" if e["text"] else ""),
+                "line": e["line"],
+                "column": e["column"]
+            })
+            return errors, warnings
+
+        count = input_count if input_count is not None else 1
+        overflow = errors if input_count is not None else warnings
+        for index, line in analysis.in_indices:
+            if index >= count or index < -count:
+                overflow.append({
+                    "code": "python_input_index",
+                    "message": f"IN[{index}] at line {line} exceeds {count} input port(s)"
+                               + ("" if input_count is not None else "; set inputCount"),
+                    "line": line
+                })
+        if analysis.in_unpack is not None and analysis.in_unpack[0] != count:
+            overflow.append({
+                "code": "python_input_index",
+                "message": f"Unpacking IN into {analysis.in_unpack[0]} names at line {analysis.in_unpack[1]} but node has {count} input port(s)",
+                "line": analysis.in_unpack[1]
+            })
+        if analysis.assigns_in is not None:
+            warnings.append({"code": "python_assigns_in", "message": f"IN is reassigned at line {analysis.assigns_in}",
+                             "line": analysis.assigns_in})
+        if not analysis.assigns_out:
+            warnings.append({"code": "python_no_out", "message": "OUT is never assigned; the node will output null", "line": None})
+        return errors, warnings
+
+    def get_info(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
@@ -17,10 +17,30 @@ Dynamo MCP WebSocket Manager
 簡化版 - 只處理 WebSocket 連線（Dynamo 和 Node.js MCP Bridge）
 """
 
-import time, os, json, glob, asyncio, websockets, threading, uuid, subprocess, sys
-from typing import Any, Dict, Optional, List
+import time, os, json, glob, asyncio, websockets, threading, uuid, subprocess, sys, hashlib, socket, argparse, contextlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Optional, List
 from pathlib import Path
 
+from workspace_query import QueryError, GraphIndex, compile_query, query_uses_field, run_query
+from graph_analytics import (CSRGraph, DEFAULT_SINK_NAMES, analyze as analyze_csr_graph,
+                             union_find_components, dependency_depths, label_propagation)
+from workspace_model import CompactGraph
+from ws_compression import CompressionStats, DEFAULT_SETTINGS as COMPRESSION_DEFAULTS, build_serve_kwargs
+import json_codec
+from tool_registry import ToolRegistry
+from instruction_validator import InstructionValidator
+from python_code_check import PythonCodeChecker
+from designscript import DesignScriptAnalyzer, to_literal as to_ds_literal
+from creation_routing import RoutingTable, STRATEGY_CODE_BLOCK, TRACK_CODE_BLOCK, TRACK_NATIVE, patch_creation_strategies
+from node_resolution import BUILTIN_NAMES, CreationNameCache, is_guid
+from node_binding import BindingError, Signature, SignatureBinder
+from memory_bank import MemoryBank
+from http_transport import HttpError, HttpServer, HttpStats
+from wire_codec import (CodecStats, JSON, MSGPACK, SUPPORTED_ENCODINGS, negotiate as negotiate_encoding,
+                        encode as wire_encode, decode as wire_decode, encode_result as wire_encode_result)
+
 # 全域日誌函數
 def log(m): print(m, file=sys.stderr)
 
@@ -113,94 +133,508 @@ if not os.path.exists(SCRIPT_DIR):
     os.makedirs(SCRIPT_DIR)
 
 # ==========================================
-# Memory Bank 快取系統（混合策略）
+# 執行期後端 (JSON Codec / Event Loop)
 # ==========================================
 
-# 全域快取變數
-MEMORY_BANK_SUMMARY = None
-MEMORY_BANK_LOAD_TIME = None
+RUNTIME_CONFIG = CONFIG.get("runtime", {})
+JSON_BACKEND = json_codec.select(RUNTIME_CONFIG.get("json_backend", "auto"))
+EVENT_LOOP_SETTING = RUNTIME_CONFIG.get("event_loop", "asyncio")
+EVENT_LOOP_BACKEND = "asyncio"  # 於入口點依設定安裝後更新
 
-def _read_file_safe(file_path: Path) -> str:
-    """安全讀取檔案，失敗回傳空字串"""
+def _install_event_loop(name: str) -> str:
+    """
+    依設定安裝 Event Loop Policy 並回傳實際使用的名稱
+    uvloop 為選用相依且不支援 Windows；未安裝或平台不支援時維持預設 asyncio loop
+    """
+    name = (name or "asyncio").lower()
+    if name not in ("uvloop", "auto"):
+        return "asyncio"
     try:
-        if file_path.exists():
-            return file_path.read_text(encoding='utf-8')
-        return ""
-    except Exception as e:
-        log(f"[WARN] Failed to read {file_path}: {e}")
-        return ""
+        import uvloop
+    except ImportError:
+        if name == "uvloop":
+            log("[Runtime] uvloop requested but not installed, using asyncio")
+        return "asyncio"
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return "uvloop"
+
+def get_runtime_info() -> dict:
+    info = {"json": json_codec.backend_info(), "eventLoop": {"name": EVENT_LOOP_BACKEND, "setting": EVENT_LOOP_SETTING}}
+    if EVENT_LOOP_BACKEND == "uvloop":
+        import uvloop
+        info["eventLoop"]["version"] = uvloop.__version__
+    return info
 
-def _load_lessons(lessons_path: Path) -> list:
-    """載入所有 lessons/*.md 檔案標題與摘要"""
-    if not lessons_path.exists():
-        return []
-    
-    lessons = []
-    for md_file in sorted(lessons_path.glob("*.md")):
-        content = _read_file_safe(md_file)
-        if not content:
-            continue
-        
-        # 提取第一行標題與前 10 行作為摘要
-        lines = content.split('\n')
-        title = lines[0].strip('# ').strip() if lines else md_file.stem
-        summary = '\n'.join(lines[:10])
-        
-        lessons.append({
-            "file": md_file.name,
-            "title": title,
-            "summary": summary
-        })
-    
-    return lessons
+# ==========================================
+# 指令日誌 (Write-Ahead Journal)
+# ==========================================
 
-def load_memory_bank() -> dict:
+JOURNAL_CONFIG = CONFIG.get("journal", {})
+JOURNAL_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", JOURNAL_CONFIG.get("dir", ".journal")))
+
+def _connector_key(c: dict) -> tuple:
+    return (c.get("from"), c.get("fromPort", 0), c.get("to"), c.get("toPort", 0), c.get("toPortName"))
+
+class InstructionJournal:
     """
-    啟動時讀取並快取 memory-bank/ 資料夾摘要
-    Returns: 載入狀態字典
+    指令日誌 - 每個 Session 一個 append-only 的 JSONL 檔案
+    記錄每次成功套用的指令批次 (展開後的 payload、版本號、clientId)，
+    累積 compact_every 筆後壓縮為快照，供 Dynamo 崩潰後快速重播
+    事件迴圈上使用 *_async 方法：寫入 (fsync) 與壓縮在單一背景執行緒依提交順序執行
+    已建立節點 ID 的集合在第一次查詢時載入，之後隨 append / record_clear 更新，預檢不必重播日誌
     """
-    global MEMORY_BANK_SUMMARY, MEMORY_BANK_LOAD_TIME
-    
-    if not MEMORY_BANK_PATH.exists():
-        log("[WARN] memory-bank/ directory not found")
-        MEMORY_BANK_SUMMARY = {"status": "error", "message": "memory-bank 資料夾不存在"}
-        return MEMORY_BANK_SUMMARY
-    
-    try:
-        log("[Memory Bank] Loading memory bank...")
-        
-        # 讀取核心文件
-        summary = {
-            "status": "ok",
-            "loadTime": time.time(),
-            "projectBrief": _read_file_safe(MEMORY_BANK_PATH / "projectbrief.md"),
-            "productContext": _read_file_safe(MEMORY_BANK_PATH / "productContext.md"),
-            "systemPatterns": _read_file_safe(MEMORY_BANK_PATH / "systemPatterns.md"),
-            "techContext": _read_file_safe(MEMORY_BANK_PATH / "techContext.md"),
-            "activeContext": _read_file_safe(MEMORY_BANK_PATH / "activeContext.md"),
-            "progress": _read_file_safe(MEMORY_BANK_PATH / "progress.md"),
-            "lessons": _load_lessons(MEMORY_BANK_PATH / "lessons")
+    def __init__(self, base_dir: str, compact_every: int = 200, enabled: bool = True):
+        self.base_dir = base_dir
+        self.compact_every = compact_every
+        self.enabled = enabled
+        self._counts: Dict[str, int] = {}
+        self._known_ids: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _paths(self, session_id: str) -> tuple:
+        safe_id = "".join(ch for ch in str(session_id) if ch.isalnum() or ch in "-_") or "default"
+        return (os.path.join(self.base_dir, f"{safe_id}.jsonl"),
+                os.path.join(self.base_dir, f"{safe_id}.snapshot.json"))
+
+    def _write_entry(self, session_id: str, entry: dict):
+        if not self.enabled:
+            return
+        journal_path, _ = self._paths(session_id)
+        line = json_codec.dumps(entry)
+        with self._lock:
+            os.makedirs(self.base_dir, exist_ok=True)
+            if session_id not in self._counts:
+                self._counts[session_id] = self._count_lines(journal_path)
+            with open(journal_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._counts[session_id] += 1
+            needs_compaction = self._counts[session_id] >= self.compact_every
+        if needs_compaction:
+            self.compact(session_id)
+
+    @staticmethod
+    def _count_lines(path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r", encoding="utf-8") as f:
+            return sum(1 for _ in f)
+
+    def append(self, session_id: str, payload: dict, version: int, client_id: str):
+        """記錄一次成功套用的指令批次"""
+        self._write_entry(session_id, {
+            "op": "apply",
+            "version": version,
+            "clientId": client_id,
+            "time": time.time(),
+            "payload": payload
+        })
+        with self._lock:
+            known = self._known_ids.get(session_id)
+            if known is not None:
+                known.difference_update(str(i) for i in payload.get("deleteNodes", []))
+                known.update(str(n["id"]) for n in payload.get("nodes", []) if n.get("id") is not None)
+
+    def record_clear(self, session_id: str, version: int, client_id: str):
+        """記錄清空工作區，重播時會捨棄此前所有內容"""
+        self._write_entry(session_id, {
+            "op": "clear",
+            "version": version,
+            "clientId": client_id,
+            "time": time.time()
+        })
+        with self._lock:
+            self._known_ids[session_id] = set()
+
+    def known_ids(self, session_id: str) -> frozenset:
+        """日誌中目前存在的節點 ID (字串)；第一次查詢時重播日誌，之後由寫入端增量維護"""
+        with self._lock:
+            known = self._known_ids.get(session_id)
+            if known is None:
+                state = self._load_state(session_id)
+                known = self._known_ids[session_id] = {str(node_id) for node_id in state["nodes"]}
+            return frozenset(known)
+
+    @staticmethod
+    def _apply_entry(state: dict, entry: dict):
+        """將單筆日誌合併進圖狀態 (節點依 id upsert，與 C# 端行為一致)"""
+        op = entry.get("op")
+        if op == "clear":
+            state["nodes"].clear()
+            state["anonymousNodes"].clear()
+            state["connectors"].clear()
+        elif op == "apply":
+            payload = entry.get("payload", {})
+            # 反向操作 (undo) 的刪除先於建立，與 C# 端處理順序一致
+            for c in payload.get("deleteConnectors", []):
+                target = _connector_key(c)[:4]
+                for key in [k for k in state["connectors"] if k[:4] == target]:
+                    del state["connectors"][key]
+            deleted_ids = set(payload.get("deleteNodes", []))
+            for node_id in deleted_ids:
+                state["nodes"].pop(node_id, None)
+            if deleted_ids:
+                for key in [k for k in state["connectors"] if k[0] in deleted_ids or k[2] in deleted_ids]:
+                    del state["connectors"][key]
+            for node in payload.get("nodes", []):
+                node_id = node.get("id")
+                if node_id is None:
+                    state["anonymousNodes"].append(node)
+                elif node_id in state["nodes"]:
+                    state["nodes"][node_id] = {**state["nodes"][node_id], **node}
+                else:
+                    state["nodes"][node_id] = node
+            for c in payload.get("connectors", []):
+                state["connectors"][_connector_key(c)] = c
+        state["version"] = entry.get("version", state["version"])
+        state["lastClientId"] = entry.get("clientId", state.get("lastClientId"))
+
+    def _load_state(self, session_id: str) -> dict:
+        journal_path, snapshot_path = self._paths(session_id)
+        state = {"nodes": {}, "anonymousNodes": [], "connectors": {}, "version": 0, "lastClientId": None, "entries": 0}
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            state["nodes"] = {n["id"]: n for n in snapshot.get("nodes", []) if n.get("id") is not None}
+            state["anonymousNodes"] = [n for n in snapshot.get("nodes", []) if n.get("id") is None]
+            state["connectors"] = {_connector_key(c): c for c in snapshot.get("connectors", [])}
+            state["version"] = snapshot.get("version", 0)
+            state["lastClientId"] = snapshot.get("lastClientId")
+        if os.path.exists(journal_path):
+            with open(journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json_codec.loads(line)
+                    except json.JSONDecodeError:
+                        # 崩潰時可能留下寫到一半的最後一行，略過即可
+                        log(f"[Journal] Skipping corrupt entry in {journal_path}")
+                        continue
+                    self._apply_entry(state, entry)
+                    state["entries"] += 1
+        return state
+
+    def load(self, session_id: str) -> dict:
+        """讀取快照並重播日誌，回傳合併後的圖 {nodes, connectors, version, ...}"""
+        with self._lock:
+            state = self._load_state(session_id)
+        return {
+            "sessionId": session_id,
+            "version": state["version"],
+            "lastClientId": state["lastClientId"],
+            "journalEntries": state["entries"],
+            "nodes": list(state["nodes"].values()) + state["anonymousNodes"],
+            "connectors": list(state["connectors"].values())
         }
-        
-        MEMORY_BANK_SUMMARY = summary
-        MEMORY_BANK_LOAD_TIME = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(summary["loadTime"]))
-        
-        log(f"[Memory Bank] ✅ Loaded {len(summary['lessons'])} lessons")
-        log(f"[Memory Bank] Load time: {MEMORY_BANK_LOAD_TIME}")
-        
-        return {"status": "ok", "loadTime": MEMORY_BANK_LOAD_TIME, "lessonsCount": len(summary["lessons"])}
-        
-    except Exception as e:
-        error_msg = f"Failed to load memory bank: {e}"
-        log(f"[ERROR] {error_msg}")
-        MEMORY_BANK_SUMMARY = {"status": "error", "message": error_msg}
-        return MEMORY_BANK_SUMMARY
+
+    def compact(self, session_id: str):
+        """將快照與日誌合併為新快照，並截斷日誌檔"""
+        journal_path, snapshot_path = self._paths(session_id)
+        with self._lock:
+            state = self._load_state(session_id)
+            snapshot = {
+                "sessionId": session_id,
+                "version": state["version"],
+                "lastClientId": state["lastClientId"],
+                "compactedAt": time.time(),
+                "nodes": list(state["nodes"].values()) + state["anonymousNodes"],
+                "connectors": list(state["connectors"].values())
+            }
+            tmp_path = snapshot_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, snapshot_path)
+            open(journal_path, "w", encoding="utf-8").close()
+            self._counts[session_id] = 0
+        log(f"[Journal] Compacted {session_id}: {len(snapshot['nodes'])} nodes, {len(snapshot['connectors'])} connectors")
+
+    async def append_async(self, session_id: str, payload: dict, version: int, client_id: str):
+        await self._run(self.append, session_id, payload, version, client_id)
+
+    async def record_clear_async(self, session_id: str, version: int, client_id: str):
+        await self._run(self.record_clear, session_id, version, client_id)
+
+    async def load_async(self, session_id: str) -> dict:
+        return await self._run(self.load, session_id)
+
+    async def known_ids_async(self, session_id: str) -> frozenset:
+        with self._lock:
+            known = self._known_ids.get(session_id)
+            if known is not None:
+                return frozenset(known)
+        # 尚未載入：與寫入排在同一個背景執行緒，載入結果包含所有已提交的批次
+        return await self._run(self.known_ids, session_id)
+
+    def list_journals(self) -> list:
+        """列出所有已記錄的 Session，依最後修改時間由新到舊排序"""
+        if not os.path.isdir(self.base_dir):
+            return []
+        latest = {}
+        for f in os.listdir(self.base_dir):
+            if f.endswith(".snapshot.json"):
+                sid = f[:-len(".snapshot.json")]
+            elif f.endswith(".jsonl"):
+                sid = f[:-len(".jsonl")]
+            else:
+                continue
+            mtime = os.path.getmtime(os.path.join(self.base_dir, f))
+            latest[sid] = max(mtime, latest.get(sid, 0))
+        return [{"sessionId": sid, "lastModified": mtime}
+                for sid, mtime in sorted(latest.items(), key=lambda kv: kv[1], reverse=True)]
+
+instruction_journal = InstructionJournal(
+    JOURNAL_DIR,
+    compact_every=JOURNAL_CONFIG.get("compact_every", 200),
+    enabled=JOURNAL_CONFIG.get("enabled", True)
+)
+
+# ==========================================
+# 復原/重做 (Undo / Redo)
+# ==========================================
+
+UNDO_CONFIG = CONFIG.get("undo", {})
+
+def _compute_inverse(payload: dict, undo: dict) -> dict:
+    """
+    根據 Dynamo 端回報的套用前狀態 (回應的 undo 欄位) 計算指令批次的反向操作
+    - 新建的節點 → deleteNodes
+    - 既有節點 (upsert) → 還原原本的位置與被覆寫的值
+    - 新建的連線 → deleteConnectors (payload 的 toPort 已換成 toPortName 解析後的實際索引)
+    - 被新連線取代的輸入埠連線 → 重新建立
+    """
+    previous = {}
+    for node in undo.get("previousNodes", []):
+        # 同一節點在批次中更新多次時，第一筆才是套用前的狀態
+        previous.setdefault(str(node.get("id")), node)
+
+    delete_nodes = [n.get("id") for n in payload.get("nodes", []) if str(n.get("id")) not in previous]
+    delete_connectors = [{"from": c.get("from"), "fromPort": c.get("fromPort", 0), "to": c.get("to"), "toPort": c.get("toPort", 0)}
+                         for c in payload.get("connectors", [])]
+
+    return {
+        "deleteConnectors": delete_connectors,
+        "deleteNodes": delete_nodes,
+        "nodes": list(previous.values()),
+        "connectors": [dict(c) for c in undo.get("replacedConnectors", [])]
+    }
+
+def _merge_undo_info(*responses: dict) -> Optional[dict]:
+    """合併多次送出的 undo 資訊；任一回應缺少 undo 欄位 (舊版擴充套件) 時回傳 None"""
+    merged = {"previousNodes": [], "replacedConnectors": []}
+    for response in responses:
+        undo = response.get("undo")
+        if not isinstance(undo, dict):
+            return None
+        merged["previousNodes"].extend(undo.get("previousNodes") or [])
+        merged["replacedConnectors"].extend(undo.get("replacedConnectors") or [])
+    return merged
+
+def _resolved_connectors(connectors: list, response: dict) -> list:
+    """以回應的 connectorResults 將連線的 toPort 換成實際使用的輸入埠索引 (toPortName 已解析)"""
+    ports = {r.get("index"): r["toPort"] for r in response.get("connectorResults") or [] if isinstance(r.get("toPort"), int)}
+    if not ports:
+        return list(connectors)
+    return [{**c, "toPort": ports[i]} if i in ports else c for i, c in enumerate(connectors)]
+
+class UndoManager:
+    """
+    每個 Session 的復原/重做堆疊
+    每筆記錄保存正向 payload 與反向操作；synced_version 為堆疊最後一次對應的工作區版本，
+    若工作區版本已被堆疊以外的寫入推進，則拒絕 undo/redo (除非 force)
+    """
+    def __init__(self, max_depth: int = 50, enabled: bool = True):
+        self.max_depth = max_depth
+        self.enabled = enabled
+        self._undo: Dict[str, list] = {}
+        self._redo: Dict[str, list] = {}
+        self._synced_version: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def push(self, session_id: str, version: int, client_id: str, forward: dict, inverse: dict):
+        with self._lock:
+            stack = self._undo.setdefault(session_id, [])
+            stack.append({"version": version, "clientId": client_id, "forward": forward, "inverse": inverse})
+            if len(stack) > self.max_depth:
+                del stack[0]
+            self._redo[session_id] = []
+            self._synced_version[session_id] = version
+
+    def pop_undo(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            stack = self._undo.get(session_id)
+            return stack.pop() if stack else None
+
+    def pop_redo(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            stack = self._redo.get(session_id)
+            return stack.pop() if stack else None
+
+    def push_redo(self, session_id: str, entry: dict, version: int):
+        with self._lock:
+            self._redo.setdefault(session_id, []).append(entry)
+            self._synced_version[session_id] = version
+
+    def push_undo(self, session_id: str, entry: dict, version: int):
+        with self._lock:
+            self._undo.setdefault(session_id, []).append(entry)
+            self._synced_version[session_id] = version
+
+    def restore(self, session_id: str, entry: dict, to_redo: bool):
+        """指令送出失敗時將記錄放回原堆疊"""
+        with self._lock:
+            (self._redo if to_redo else self._undo).setdefault(session_id, []).append(entry)
+
+    def synced_version(self, session_id: str) -> Optional[int]:
+        with self._lock:
+            return self._synced_version.get(session_id)
+
+    def reset(self, session_id: str):
+        with self._lock:
+            self._undo.pop(session_id, None)
+            self._redo.pop(session_id, None)
+            self._synced_version.pop(session_id, None)
+
+    def get_info(self, session_id: str) -> dict:
+        with self._lock:
+            return {
+                "undoDepth": len(self._undo.get(session_id, [])),
+                "redoDepth": len(self._redo.get(session_id, []))
+            }
+
+undo_manager = UndoManager(
+    max_depth=UNDO_CONFIG.get("max_depth", 50),
+    enabled=UNDO_CONFIG.get("enabled", True)
+)
+
+# ==========================================
+# 冪等性快取 (Idempotency Cache)
+# ==========================================
+
+IDEMPOTENCY_CONFIG = CONFIG.get("idempotency", {})
+
+class IdempotencyCache:
+    """
+    execute_dynamo_instructions 的結果快取 (有上限的 LRU)
+    - 明確的 idempotencyKey：保留至被 LRU 淘汰
+    - 由內容雜湊推導的 key：僅保留 ttl_seconds，且只在工作區版本仍是該次寫入後的版本時命中
+      (期間有 undo / clear / replay 等其他寫入時重新執行，避免回傳過期的結果而未建立任何節點)
+    同一 key 仍在執行中時，重試會等待原本那次的結果
+    部分成功 (status == "partial") 也會快取：已建立的節點不會因重試而重複建立
+    """
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expiresAt | None, version | None, result)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+
+    @staticmethod
+    def make_key(explicit_key: Optional[str], session_id: str, request: dict) -> tuple:
+        if explicit_key:
+            return f"key:{session_id}:{explicit_key}", True
+        canonical = json.dumps({"sessionId": session_id, **request}, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return f"hash:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}", False
+
+    def _get(self, key: str, current_version: Optional[int]) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, version, result = entry
+        if (expires_at is not None and expires_at < time.time()) or \
+                (version is not None and current_version is not None and version != current_version):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _put(self, key: str, result: dict, explicit: bool):
+        expires_at = None if explicit else time.time() + self.ttl_seconds
+        version = None if explicit else result.get("version")
+        self._entries[key] = (expires_at, version, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def run(self, key: str, explicit: bool, factory, current_version: Optional[int] = None) -> tuple:
+        """
+        回傳 (result, replayed)；只快取 status 為 ok / partial 的結果，完全失敗的請求重試時會重新執行
+        current_version 為目標 Session 目前的工作區版本 (雜湊 key 用來判斷快取是否仍有效)
+        """
+        cached = self._get(key, current_version)
+        if cached is not None:
+            self.hits += 1
+            return cached, True
+        if key in self._inflight:
+            self.hits += 1
+            return await asyncio.shield(self._inflight[key]), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await factory()
+            if result.get("status") in ("ok", "partial"):
+                self._put(key, result, explicit)
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            # 等待中的重試收到同一個錯誤；原請求被取消時改以 RuntimeError 通知，不把取消傳給等待者
+            future.set_exception(RuntimeError("原請求已取消，請重試") if isinstance(e, asyncio.CancelledError) else e)
+            future.exception()  # 沒有等待者時不記錄 "exception was never retrieved"
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def get_info(self) -> dict:
+        return {"entries": len(self._entries), "inflight": len(self._inflight), "hits": self.hits}
+
+idempotency_cache = IdempotencyCache(
+    max_entries=IDEMPOTENCY_CONFIG.get("max_entries", 256),
+    ttl_seconds=IDEMPOTENCY_CONFIG.get("ttl_seconds", 60)
+)
+
+# ==========================================
+# Memory Bank 快取系統（混合策略）
+# ==========================================
+
+MEMORY_BANK_CONFIG = CONFIG.get("memory_bank", {})
+# 摘要快取：啟動時載入，之後由 watch_memory_bank 在事件迴圈外輪詢 mtime，只重讀變更的檔案
+memory_bank = MemoryBank(MEMORY_BANK_PATH, log=log)
+
+async def load_memory_bank(force: bool = False) -> dict:
+    """在執行緒中重新整理 Memory Bank，有變更時記錄變更的檔案"""
+    result = await asyncio.to_thread(memory_bank.refresh, force)
+    if result.get("status") == "ok" and (result["changed"] or result["added"] or result["removed"]):
+        changes = result["changed"] + result["added"] + result["removed"]
+        log(f"[Memory Bank] Reloaded {len(changes)} file(s): {', '.join(changes[:10])} ({result['lessonsCount']} lessons)")
+    return result
+
+async def watch_memory_bank():
+    """定期檢查 memory-bank/ 的變更；poll_interval <= 0 或 watch=false 時停用"""
+    interval = MEMORY_BANK_CONFIG.get("poll_interval", 2.0)
+    if not MEMORY_BANK_CONFIG.get("watch", True) or interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await load_memory_bank()
+        except Exception as e:
+            log(f"[WARN] Memory bank watcher: {e}")
 
 # ==========================================
 # 工具邏輯與輔助函式
 # ==========================================
 
 _common_nodes_metadata = None
+COMMON_NODES_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "DynamoViewExtension", "common_nodes.json"))
 
 def _load_guidelines() -> tuple[str, str]:
     g_content, q_content = "", ""
@@ -219,8 +653,7 @@ def _load_common_nodes_metadata() -> dict:
     global _common_nodes_metadata
     if _common_nodes_metadata is not None: return _common_nodes_metadata
     try:
-        metadata_path = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "DynamoViewExtension", "common_nodes.json"))
-        with open(metadata_path, "r", encoding="utf-8") as f:
+        with open(COMMON_NODES_PATH, "r", encoding="utf-8") as f:
             nodes_list = json.load(f)
         _common_nodes_metadata = {node["name"]: node for node in nodes_list}
         return _common_nodes_metadata
@@ -269,8 +702,91 @@ async def _list_resources() -> dict:
     """返回可用資源模板列表 (MCP resources/list)"""
     return {"resourceTemplates": RESOURCE_TEMPLATES}
 
-async def _read_resource(uri: str, session_id: str = None) -> dict:
-    """讀取指定 URI 的資源內容 (MCP resources/read)"""
+# 清單型資源可用的查詢參數 (欄位投影、篩選、分頁)
+RESOURCE_QUERY_KEYS = ("fields", "offset", "limit", "nameContains", "state", "bbox")
+
+def _normalize_resource_query(query: dict) -> tuple:
+    """
+    檢查並正規化查詢參數：offset/limit 須為非負整數 (接受 "10" 這類字串)、bbox 邊界須為數字、fields 須為字串清單
+    回傳 (query, error)；有誤時 error 為 {"error", "field"}，請求不會送往 Dynamo
+    """
+    query = {k: v for k, v in (query or {}).items() if k in RESOURCE_QUERY_KEYS and v is not None}
+    for key in ("offset", "limit"):
+        if key not in query:
+            continue
+        value = query[key]
+        try:
+            number = None if isinstance(value, (bool, float)) else int(value)
+        except (TypeError, ValueError):
+            number = None
+        if number is None or number < 0:
+            return query, {"error": f"Invalid query parameter '{key}': expected a non-negative integer, got {value!r}", "field": key}
+        query[key] = number
+    bbox = query.get("bbox")
+    if bbox is not None:
+        if not isinstance(bbox, dict):
+            return query, {"error": "Invalid query parameter 'bbox': expected an object {minX, minY, maxX, maxY}", "field": "bbox"}
+        for bound in ("minX", "minY", "maxX", "maxY"):
+            value = bbox.get(bound)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                return query, {"error": f"Invalid query parameter 'bbox.{bound}': expected a number, got {value!r}", "field": "bbox"}
+    fields = query.get("fields")
+    if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) for f in fields)):
+        return query, {"error": "Invalid query parameter 'fields': expected a list of field names", "field": "fields"}
+    return query, None
+
+def _apply_resource_query(content: dict, query: dict) -> dict:
+    """
+    在 Python 端套用查詢參數；若 Dynamo 端已下推處理 (回傳 filtered=true) 則直接略過，
+    避免分頁被套用兩次
+    """
+    if not query or content.get("filtered"):
+        return content
+    query, error = _normalize_resource_query(query)
+    if error:
+        return error
+
+    list_key = "nodes" if "nodes" in content else "connectors" if "connectors" in content else None
+    if list_key is None:
+        return content
+    items = content.get(list_key) or []
+
+    if list_key == "nodes":
+        name_contains = (query.get("nameContains") or "").lower()
+        state = (query.get("state") or "").lower()
+        bbox = query.get("bbox") or {}
+        if name_contains:
+            items = [n for n in items if name_contains in str(n.get("name", "")).lower()]
+        if state:
+            items = [n for n in items if state in str(n.get("state", "")).lower()]
+        if bbox:
+            min_x, max_x = bbox.get("minX", float("-inf")), bbox.get("maxX", float("inf"))
+            min_y, max_y = bbox.get("minY", float("-inf")), bbox.get("maxY", float("inf"))
+            items = [n for n in items if min_x <= n.get("x", 0) <= max_x and min_y <= n.get("y", 0) <= max_y]
+
+    total = len(items)
+    offset = query.get("offset", 0)
+    limit = query.get("limit")
+    items = items[offset:] if limit is None else items[offset:offset + limit]
+
+    fields = query.get("fields")
+    if fields:
+        items = [{k: item[k] for k in fields if k in item} for item in items]
+
+    return {**content, list_key: items, "total": total, "offset": offset, "count": len(items), "filtered": True}
+
+async def _read_resource(uri: str, session_id: str = None, query: dict = None) -> dict:
+    """
+    讀取指定 URI 的資源內容 (MCP resources/read)
+    MCP 規範要求 text 欄位，因此只在此處序列化一次
+    """
+    result = await _read_resource_data(uri, session_id, query)
+    if "error" in result:
+        return result
+    return {"contents": [{"uri": uri, "mimeType": "application/json", "text": json_codec.dumps(result)}]}
+
+async def _read_resource_data(uri: str, session_id: str = None, query: dict = None) -> dict:
+    """取得資源的結構化內容 (供 _read_resource 與 read_dynamo_resource 共用)"""
     with ws_manager._lock:
         sessions = list(ws_manager.active_sessions.keys())
     if not sessions:
@@ -294,20 +810,82 @@ async def _read_resource(uri: str, session_id: str = None) -> dict:
     else:
         return {"error": f"Unknown resource URI: {uri}"}
     
+    query, error = _normalize_resource_query(query)
+    if error:
+        return error
+    if query and cmd["action"] == "get_nodes_structured":
+        # 下推至 Dynamo 端，未請求的欄位 (如 port 清單) 不會被序列化
+        cmd = {**cmd, "query": query}
+    
     try:
         result = await ws_manager.send_command_async(target_id, cmd)
-        return {"contents": [{"uri": uri, "mimeType": "application/json", "text": json.dumps(result, ensure_ascii=False)}]}
+        return _apply_resource_query(result, query)
     except Exception as e:
         return {"error": str(e)}
 
+# 節點建立路徑學習：原生建立持續失敗的節點名稱直接走軌道 A
+ROUTING_CONFIG = CONFIG.get("routing", {})
+routing_table = RoutingTable(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", ROUTING_CONFIG.get("path", ".journal/routing_stats.json"))),
+    min_failures=ROUTING_CONFIG.get("min_failures", 2),
+    reprobe_after=ROUTING_CONFIG.get("reprobe_after", 25),
+    enabled=ROUTING_CONFIG.get("enabled", True)
+)
+
 def route_node_creation(node_spec: dict) -> dict:
     node_name = node_spec.get("name", "")
     metadata = _load_common_nodes_metadata()
     node_info = metadata.get(node_name, {})
-    strategy = node_info.get("creationStrategy", "NATIVE_DIRECT")
+    # 學得的策略優先於靜態 metadata
+    strategy = (routing_table.route(node_name) if node_info else None) or node_info.get("creationStrategy", "NATIVE_DIRECT")
     node_spec["_strategy"] = strategy
     return node_spec
 
+# ==========================================
+# WebSocket 壓縮 (permessage-deflate)
+# ==========================================
+
+COMPRESSION_CONFIG = CONFIG.get("compression", {})
+
+def _compression_settings(listener: str) -> dict:
+    """合併全域壓縮設定與各監聽埠 (dynamo / bridge) 的覆寫設定"""
+    base = {k: v for k, v in COMPRESSION_CONFIG.items() if k in COMPRESSION_DEFAULTS}
+    override = COMPRESSION_CONFIG.get(listener, {})
+    return {**COMPRESSION_DEFAULTS, **base, **override}
+
+compression_stats = {"dynamo": CompressionStats(), "bridge": CompressionStats()}
+
+def get_compression_info() -> dict:
+    return {
+        listener: {"settings": _compression_settings(listener), **stats.get_info()}
+        for listener, stats in compression_stats.items()
+    }
+
+# ==========================================
+# 訊息編碼協商 (Wire Framing)
+# ==========================================
+
+FRAMING_CONFIG = CONFIG.get("framing", {})
+FRAMING_PREFERRED = FRAMING_CONFIG.get("preferred", MSGPACK)
+
+codec_stats = {"dynamo": CodecStats(), "bridge": CodecStats()}
+
+# 工具內部一律回傳結構化物件，只在傳輸邊界序列化一次
+# 相容模式：未在 bridge/hello 宣告 structuredResults 的客戶端，下列工具仍回傳 JSON 字串 (舊版線上格式)
+FRAMING_STRUCTURED_RESULTS = FRAMING_CONFIG.get("structured_results", True)
+_LEGACY_JSON_STRING_TOOLS = {
+    "execute_dynamo_instructions", "analyze_workspace", "get_graph_status",
+    "get_script_library", "get_memory_bank_summary", "reload_memory_bank",
+}
+_LEGACY_INDENTED_TOOLS = {"get_script_library", "reload_memory_bank"}
+
+def _legacy_tool_result(name: str, result):
+    """將結構化結果轉回舊版的 JSON 字串格式"""
+    if name not in _LEGACY_JSON_STRING_TOOLS or isinstance(result, str):
+        return result
+    indented = name in _LEGACY_INDENTED_TOOLS or (isinstance(result, dict) and result.get("status") == "dry_run")
+    return json_codec.dumps(result, indent=indented)
+
 # ==========================================
 # WebSocket Manager for Dynamo
 # ==========================================
@@ -315,12 +893,13 @@ def route_node_creation(node_spec: dict) -> dict:
 class WebSocketManager:
     def __init__(self):
         self.active_sessions = {}  # {session_id: websocket}
-        self.session_info = {}     # {session_id: {fileName, connectedAt, lastSeen, stats: {cmds, errors}}}
+        self.session_info = {}     # {session_id: {fileName, dynamoVersion, connectedAt, lastSeen, stats: {cmds, errors}}}
         self.queues = {}           # {session_id: asyncio.Queue}
+        self.encodings = {}        # {session_id: "json" | "msgpack"} 握手協商結果
         self._lock = threading.Lock()
         self.start_time = time.time()
 
-    async def register(self, websocket, session_id, file_name):
+    async def register(self, websocket, session_id, file_name, encoding=JSON, dynamo_version=None):
         now = time.time()
         with self._lock:
             # 如果 session_id 已存在，先關閉舊的 (如果還在)
@@ -330,18 +909,21 @@ class WebSocketManager:
             self.active_sessions[session_id] = websocket
             self.session_info[session_id] = {
                 "fileName": file_name, 
+                "dynamoVersion": dynamo_version,
                 "connectedAt": now,
                 "lastSeen": now,
                 "stats": {"cmds": 0, "errors": 0}
             }
             self.queues[session_id] = asyncio.Queue()
-        log(f"[Dynamo-WS] New connection: {session_id} ({file_name})")
+            self.encodings[session_id] = encoding
+        log(f"[Dynamo-WS] New connection: {session_id} ({file_name}, encoding={encoding})")
 
     async def unregister(self, session_id):
         with self._lock:
             self.active_sessions.pop(session_id, None)
             self.session_info.pop(session_id, None)
             self.queues.pop(session_id, None)
+            self.encodings.pop(session_id, None)
         log(f"[Dynamo-WS] Connection closed: {session_id}")
 
     async def _handle_connection(self, websocket):
@@ -349,16 +931,19 @@ class WebSocketManager:
         try:
             # 增加通訊超時，避免掛死
             message = await asyncio.wait_for(websocket.recv(), timeout=5.0)
-            data = json.loads(message)
+            data = codec_stats["dynamo"].decode(message)
             if data.get("action") == "handshake":
                 file_name = data.get("fileName", "Unknown")
                 session_id = data.get("sessionId", session_id)
-                await self.register(websocket, session_id, file_name)
-                await websocket.send(json.dumps({"status": "connected", "sessionId": session_id}))
+                # 舊版 Extension 不帶 encodings，維持 json
+                encoding = negotiate_encoding(data.get("encodings"), FRAMING_PREFERRED)
+                # 舊版 Extension 不帶 dynamoVersion，名稱解析快取歸入 unknown
+                await self.register(websocket, session_id, file_name, encoding, data.get("dynamoVersion"))
+                await websocket.send(json_codec.dumps({"status": "connected", "sessionId": session_id, "encoding": encoding}))
                 
                 async for msg in websocket:
                     try:
-                        event = json.loads(msg)
+                        event = codec_stats["dynamo"].decode(msg)
                         with self._lock:
                             if session_id in self.session_info:
                                 self.session_info[session_id]["lastSeen"] = time.time()
@@ -381,7 +966,8 @@ class WebSocketManager:
         self.host = host
         self.port = port
         log(f"[Dynamo-WS] Listener starting on ws://{host}:{port}")
-        async with websockets.serve(self._handle_connection, self.host, self.port):
+        ws_kwargs = build_serve_kwargs(_compression_settings("dynamo"), compression_stats["dynamo"])
+        async with websockets.serve(self._handle_connection, self.host, self.port, **ws_kwargs):
             await asyncio.Future()  # Run forever
 
     async def send_command_async(self, session_id, command_dict):
@@ -390,11 +976,12 @@ class WebSocketManager:
         
         ws = self.active_sessions[session_id]
         queue = self.queues[session_id]
+        encoding = self.encodings.get(session_id, JSON)
         
         # 清除舊的回應
         while not queue.empty(): queue.get_nowait()
         
-        await ws.send(json.dumps(command_dict))
+        await ws.send(codec_stats["dynamo"].encode(command_dict, encoding))
         
         try:
             res = await asyncio.wait_for(queue.get(), timeout=15.0)
@@ -426,28 +1013,90 @@ class WebSocketManager:
 
 ws_manager = WebSocketManager()
 
+# ==========================================
+# 工具註冊表 (各工具以 @tool_registry.tool 宣告於實作旁)
+# ==========================================
+
+tool_registry = ToolRegistry(log=log)
+
 # ==========================================
 # MCP Tools Bridge Server (WebSocket for Node.js)
 # ==========================================
 
+# 同機器上的 Bridge 流量可改走 Unix Domain Socket (Linux / macOS)
+# 環境變數 DYNAMO_MCP_SOCKET 優先於設定檔，方便同一台主機並行多個實例；Node 橋接器讀取相同變數
+BRIDGE_UNIX_SOCKET = os.environ.get("DYNAMO_MCP_SOCKET") or CONFIG.get("server", {}).get("unix_socket") or None
+BRIDGE_TCP_ENABLED = CONFIG.get("server", {}).get("bridge_tcp", True)
+UNIX_SOCKETS_SUPPORTED = hasattr(socket, "AF_UNIX") and sys.platform != "win32"
+
+def _unix_socket_alive(path: str) -> bool:
+    if not (UNIX_SOCKETS_SUPPORTED and path and os.path.exists(path)):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        return sock.connect_ex(path) == 0
+
 class MCPBridgeServer:
-    """處理來自 Node.js MCP Server 的 WebSocket 請求"""
+    """處理來自 Node.js MCP Server 的 WebSocket 請求 (TCP 與選用的 Unix Domain Socket 共用同一處理流程)"""
     
-    def __init__(self, host="127.0.0.1", port=65296):
+    def __init__(self, host="127.0.0.1", port=65296, unix_path=None):
         self.host = host
         self.port = port
+        self.unix_path = unix_path
 
     async def serve(self):
-        log(f"[MCP Bridge] Server starting on ws://{self.host}:{self.port}")
-        async with websockets.serve(self._handle_bridge_client, self.host, self.port):
+        async with contextlib.AsyncExitStack() as stack:
+            if self.port is not None:
+                log(f"[MCP Bridge] Server starting on ws://{self.host}:{self.port}")
+                ws_kwargs = build_serve_kwargs(_compression_settings("bridge"), compression_stats["bridge"])
+                await stack.enter_async_context(websockets.serve(self._handle_bridge_client, self.host, self.port, **ws_kwargs))
+            if self.unix_path:
+                await self._serve_unix(stack)
             await asyncio.Future()
 
+    async def _serve_unix(self, stack: contextlib.AsyncExitStack):
+        path = self.unix_path
+        if not UNIX_SOCKETS_SUPPORTED:
+            log(f"[MCP Bridge] Unix domain sockets are not supported on {sys.platform}, skipping {path}")
+            return
+        if _unix_socket_alive(path):
+            raise OSError(f"Unix socket {path} is already served by another instance")
+        self._remove_socket_file(path)  # 前次異常結束留下的 socket 檔
+        log(f"[MCP Bridge] Server starting on unix:{path}")
+        sock = self._bind_unix_socket(path)
+        stack.callback(self._remove_socket_file, path)
+        # 本機 socket 不經網路，壓縮只會增加 CPU 負擔
+        await stack.enter_async_context(websockets.unix_serve(self._handle_bridge_client, sock=sock, compression=None))
+
+    @staticmethod
+    def _bind_unix_socket(path: str) -> socket.socket:
+        """
+        以 0600 權限建立 socket 檔 (僅限同一使用者連線)
+        bind 期間暫時收緊 umask，檔案從建立的那一刻起就不會被其他使用者連線；bind 為同步呼叫，不會讓出事件迴圈
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous = os.umask(0o177)
+        try:
+            sock.bind(path)
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(previous)
+        return sock
+
+    @staticmethod
+    def _remove_socket_file(path: str):
+        if os.path.exists(path):
+            os.unlink(path)
+
     async def _handle_bridge_client(self, websocket):
         log(f"[MCP Bridge] Node.js client connected")
+        encoding = JSON  # 收到 bridge/hello 前一律使用 json
+        structured = False  # 收到 bridge/hello 前維持舊版字串結果
         try:
             async for message in websocket:
                 try:
-                    request = json.loads(message)
+                    request = codec_stats["bridge"].decode(message)
                     
                     # 驗證 JSON-RPC 2.0 格式
                     if request.get("jsonrpc") != "2.0":
@@ -460,16 +1109,27 @@ class MCPBridgeServer:
                     log(f"[MCP Bridge] Received: {method}")
 
                     # Handle request
-                    if method == "tools/list":
-                        result = await self._list_tools()
+                    next_encoding = None
+                    if method == "bridge/hello":
+                        # 編碼協商：回應仍以目前編碼送出，之後的訊息改用協商結果
+                        next_encoding = negotiate_encoding(params.get("encodings"), FRAMING_PREFERRED)
+                        structured = FRAMING_STRUCTURED_RESULTS and bool(params.get("structuredResults"))
+                        result = {"encoding": next_encoding, "encodings": list(SUPPORTED_ENCODINGS), "structuredResults": structured}
+                    elif method == "tools/list":
+                        # 工具清單的序列化結果已快取，直接組成回應
+                        await websocket.send(codec_stats["bridge"].encode_result(
+                            request_id, tool_registry.serialized_tools(encoding), encoding))
+                        continue
                     elif method == "tools/call":
                         result = await self._call_tool(params)
+                        if not structured:
+                            result = _legacy_tool_result(params.get("name"), result)
                     elif method == "resources/list":
                         result = await _list_resources()
                     elif method == "resources/read":
                         uri = params.get("uri", "")
                         session_id = params.get("sessionId")
-                        result = await _read_resource(uri, session_id)
+                        result = await _read_resource(uri, session_id, params.get("query"))
                     else:
                         result = {"error": f"Unknown method: {method}"}
 
@@ -479,7 +1139,10 @@ class MCPBridgeServer:
                         "id": request_id,
                         "result": result
                     }
-                    await websocket.send(json.dumps(response, ensure_ascii=False))
+                    await websocket.send(codec_stats["bridge"].encode(response, encoding))
+                    if next_encoding:
+                        encoding = next_encoding
+                        log(f"[MCP Bridge] Negotiated encoding: {encoding}")
 
                 except Exception as e:
                     log(f"[MCP Bridge] Request error: {e}")
@@ -492,7 +1155,7 @@ class MCPBridgeServer:
                             "message": str(e)
                         }
                     }
-                    await websocket.send(json.dumps(error_response))
+                    await websocket.send(codec_stats["bridge"].encode(error_response, encoding))
 
         except websockets.exceptions.ConnectionClosed:
             pass
@@ -500,287 +1163,377 @@ class MCPBridgeServer:
             log("[MCP Bridge] Node.js client disconnected")
 
     async def _list_tools(self):
-        """返回可用工具列表"""
-        tools = [
-            {
-                "name": "execute_dynamo_instructions",
-                "description": "在 Dynamo 中執行節點創建指令。支援 dryRun 模式預覽、clientId 識別客戶端、expectedVersion 避免多客戶端衝突。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "instructions": {
-                            "type": "string",
-                            "description": "JSON 格式的完整圖形定義。必須包含 'nodes' 和 'connectors'。Python 節點需指定 'pythonCode' 欄位。"
-                        },
-                        "dryRun": {
-                            "type": "boolean",
-                            "description": "若為 true，僅回傳預覽報告（包含節點清單、連線、潛在警告）而不實際執行。預設為 false。"
-                        },
-                        "clientId": {
-                            "type": "string",
-                            "description": "客戶端識別碼（如 'antigravity', 'gemini-cli', 'claude'）。用於追蹤誰執行了修改。"
-                        },
-                        "expectedVersion": {
-                            "type": "integer",
-                            "description": "預期的工作區版本號。若不匹配則拒絕執行並回傳 version_conflict。透過 get_workspace_version 取得當前版本。"
-                        },
-                        "sessionId": {
-                            "type": "string",
-                            "description": "選用。指定要執行的會話 ID。若未指定則使用最新連線。"
-                        }
-                    },
-                    "required": ["instructions"]
-                },
-                "destructiveHint": True
-            },
-            {
-                "name": "analyze_workspace",
-                "description": "取得 Dynamo 工作區中所有節點的當前狀態。",
-                "inputSchema": {"type": "object", "properties": {}},
-                "readOnlyHint": True
-            },
-            {
-                "name": "get_graph_status",
-                "description": "取得工作區圖表完整狀態 JSON。",
-                "inputSchema": {"type": "object", "properties": {}},
-                "readOnlyHint": True
-            },
-            {
-                "name": "clear_workspace",
-                "description": "清除工作區內容。",
-                "inputSchema": {"type": "object", "properties": {}},
-                "destructiveHint": True
-            },
-            {
-                "name": "search_nodes",
-                "description": "在 Dynamo 庫中搜尋節點。這會返回節點的 fullName，可用於 execute_dynamo_instructions。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "搜尋關鍵字（例如 'Room', 'Solid', 'Point'）"
-                        }
-                    },
-                    "required": ["query"]
-                },
-                "readOnlyHint": True
-            },
-            {
-                "name": "get_mcp_guidelines",
-                "description": "取得規範內容。",
-                "inputSchema": {"type": "object", "properties": {}},
-                "readOnlyHint": True
-            },
-            {
-                "name": "get_script_library",
-                "description": "取得腳本庫清單。",
-                "inputSchema": {"type": "object", "properties": {}},
-                "readOnlyHint": True
-            },
-            {
-                "name": "run_autotest",
-                "description": "執行專案自動化測試 (test_roadmap_features.py)。驗證 Dynamo 節點放置、Python 注入、外掛支援與幾何運算功能。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {}
-                },
-                "readOnlyHint": True
-            },
-            {
-                "name": "list_sessions",
-                "description": "列出所有當前活動中的 Dynamo WebSocket 會話及其詳細資訊。",
-                "inputSchema": {"type": "object", "properties": {}},
-                "readOnlyHint": True
-            },
-            {
-                "name": "get_server_stats",
-                "description": "取得 Bridge Server 的運行數據與效能統計。",
-                "inputSchema": {"type": "object", "properties": {}},
-                "readOnlyHint": True
-            },
-            {
-                "name": "create_group",
-                "description": "將節點群組化 (Group Nodes)。能夠為指定的節點創建一個帶標題和描述的群組。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "nodeIds": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "要分組的節點 ID 清單"
-                        },
-                        "title": {
-                            "type": "string",
-                            "description": "群組標題",
-                            "default": "New Group"
-                        },
-                        "description": {
-                            "type": "string",
-                            "description": "群組描述",
-                            "default": ""
-                        },
-                        "color": {
-                            "type": "string",
-                            "description": "群組顏色 (Hex)",
-                            "default": "#FFC1D5E0"
-                        }
-                    },
-                    "required": ["nodeIds"]
-                },
-                "destructiveHint": True
-            },
-            {
-                "name": "auto_group",
-                "description": "智慧自動分組 (Auto Group)。自動分析工作區節點，依功能分成輸入/運算/輸出三組並建立色彩群組。支援自訂顏色、描述文字與分組方式。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "mode": {
-                            "type": "string",
-                            "enum": ["auto", "custom"],
-                            "description": "分組模式：auto=自動依節點類型分類（預設）；custom=手動指定各群組節點",
-                            "default": "auto"
-                        },
-                        "input_title": {"type": "string", "description": "輸入群組標題", "default": "輸入參數"},
-                        "input_desc": {"type": "string", "description": "輸入群組說明文字", "default": "使用者可調整的輸入參數，控制腳本行為"},
-                        "input_color": {"type": "string", "description": "輸入群組顏色 (Hex ARGB)", "default": "#FFE91E8A"},
-                        "compute_title": {"type": "string", "description": "運算群組標題", "default": "核心運算"},
-                        "compute_desc": {"type": "string", "description": "運算群組說明文字", "default": "資料處理與幾何運算邏輯"},
-                        "compute_color": {"type": "string", "description": "運算群組顏色 (Hex ARGB)", "default": "#FF4169E1"},
-                        "output_title": {"type": "string", "description": "輸出群組標題", "default": "結果輸出"},
-                        "output_desc": {"type": "string", "description": "輸出群組說明文字", "default": "觀察與驗證運算結果"},
-                        "output_color": {"type": "string", "description": "輸出群組顏色 (Hex ARGB)", "default": "#FF228B22"},
-                        "groups": {
-                            "type": "array",
-                            "description": "[custom 模式] 自訂群組清單",
-                            "items": {
-                                "type": "object",
-                                "properties": {
-                                    "title": {"type": "string"},
-                                    "description": {"type": "string"},
-                                    "color": {"type": "string"},
-                                    "nodeIds": {"type": "array", "items": {"type": "string"}}
-                                }
-                            }
-                        }
-                    }
-                },
-                "destructiveHint": True
-            },
-            # === 通用工具橋接層 (Universal Tool Bridge) ===
-            {
-                "name": "read_dynamo_resource",
-                "description": "讀取 Dynamo 工作區資源。適用於不支援 MCP resources/read 的客戶端（如 Gemini CLI、Cursor）。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "resourceType": {
-                            "type": "string",
-                            "enum": ["nodes", "connectors", "selection", "errors"],
-                            "description": "資源類型：nodes=所有節點, connectors=所有連線, selection=選取的節點, errors=錯誤節點"
-                        },
-                        "nodeId": {
-                            "type": "string",
-                            "description": "選用。取得單一節點詳情時使用（需配合 resourceType='nodes'）"
-                        },
-                        "sessionId": {
-                            "type": "string",
-                            "description": "選用。指定 Session ID"
-                        }
-                    },
-                    "required": ["resourceType"]
-                },
-                "readOnlyHint": True
-            },
-            {
-                "name": "get_workspace_version",
-                "description": "取得當前工作區的版本號與最後寫入者資訊。用於實作樂觀鎖，避免多客戶端衝突。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "sessionId": {
-                            "type": "string",
-                            "description": "選用。指定 Session ID"
-                        }
-                    }
-                },
-                "readOnlyHint": True
-            },
-            # === Memory Bank 快取管理 ===
-            {
-                "name": "get_memory_bank_summary",
-                "description": "取得 Memory Bank 快取摘要（系統模式、已知坑、近期決策、教訓庫）。**建議每次新對話開始時先呼叫**，避免重複踩坑。",
-                "inputSchema": {
-                    "type": "object",
-                    "properties": {
-                        "section": {
-                            "type": "string",
-                            "enum": ["all", "activeContext", "lessons", "systemPatterns", "progress"],
-                            "description": "選用。指定要取得的區段：all=完整摘要（預設）, activeContext=當前狀態, lessons=教訓庫, systemPatterns=系統模式, progress=進度追蹤"
-                        }
-                    }
-                },
-                "readOnlyHint": True
-            },
-            {
-                "name": "reload_memory_bank",
-                "description": "手動重新載入 Memory Bank（當 memory-bank/ 資料夾內容有更新時使用）。",
-                "inputSchema": {"type": "object", "properties": {}},
-                "readOnlyHint": True
-            },
-        ]
-        return tools
+        """返回可用工具列表 (註冊時即建立，不再每次重建)"""
+        return tool_registry.list_tools()
 
     async def _call_tool(self, params):
-        """執行工具呼叫"""
-        name = params.get("name")
-        args = params.get("arguments", {})
-        
+        """執行工具呼叫：查表分派，參數先經 inputSchema 驗證"""
+        return await tool_registry.dispatch(params.get("name"), params.get("arguments") or {})
+
+# ==========================================
+# MCP Stdio Transport (免 Node.js 直連)
+# ==========================================
+
+MCP_PROTOCOL_VERSIONS = ("2025-06-18", "2025-03-26", "2024-11-05")
+MCP_SERVER_INFO = {"name": "dynamo-mcp-server", "version": CONFIG.get("deployment_info", {}).get("version", "1.0.0")}
+
+class BridgeProxy:
+    """
+    已有 server.py 佔用 Bridge 埠時，stdio 模式改為轉發至該實例
+    (多個 AI 用戶端各自啟動 --stdio 時共用同一組 Dynamo 連線)
+    stdio 端並行處理請求，回應由單一讀取工作依 JSON-RPC id 交給對應的請求
+    """
+
+    def __init__(self, url: str, unix_path: str = None):
+        self.url = url
+        self.unix_path = unix_path
+        self.websocket = None
+        self.encoding = JSON
+        self._counter = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        if self.unix_path:
+            self.websocket = await websockets.unix_connect(self.unix_path, compression=None)
+        else:
+            self.websocket = await websockets.connect(self.url)
+        self._reader = asyncio.create_task(self._read_responses())
+        hello = await self.request("bridge/hello", {"encodings": list(SUPPORTED_ENCODINGS), "structuredResults": True})
+        self.encoding = hello.get("encoding", JSON)
+        log(f"[MCP Stdio] Forwarding to {self.url} (encoding={self.encoding})")
+
+    async def _read_responses(self):
+        """讀取 Bridge 的回應並依 id 完成等待中的請求；連線中斷時讓所有等待者收到錯誤"""
+        reason = "Bridge connection closed"
         try:
-            if name == "execute_dynamo_instructions":
-                return await execute_dynamo_instructions(**args)
-            elif name == "search_nodes":
-                return await search_nodes_async(**args)
-            elif name == "analyze_workspace":
-                return await analyze_workspace()
-            elif name == "get_graph_status":
-                _, res = await _check_dynamo_connection()
-                return res
-            elif name == "clear_workspace":
-                return await clear_workspace()
-            elif name == "get_mcp_guidelines":
-                return get_mcp_guidelines()
-            elif name == "get_script_library":
-                return get_script_library()
-            elif name == "run_autotest":
-                return await run_autotest_async()
-            elif name == "list_sessions":
-                return await list_sessions()
-            elif name == "get_server_stats":
-                return get_server_stats()
-            elif name == "read_dynamo_resource":
-                return await read_dynamo_resource(**args)
-            elif name == "get_workspace_version":
-                return await get_workspace_version(**args)
-            elif name == "get_memory_bank_summary":
-                return get_memory_bank_summary(**args)
-            elif name == "reload_memory_bank":
-                return reload_memory_bank()
-            elif name == "create_group":
-                return await create_group(**args)
-            elif name == "auto_group":
-                return await auto_group(**args)
-            else:
-                return {"error": f"Tool not found: {name}"}
+            async for raw in self.websocket:
+                response = wire_decode(raw)
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
         except Exception as e:
-            return {"error": str(e)}
+            reason = f"Bridge connection lost: {e}"
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(reason))
+            self._pending.clear()
+
+    async def request(self, method: str, params: dict):
+        if self._reader is None or self._reader.done():
+            raise ConnectionError("Bridge connection closed")
+        self._counter += 1
+        request_id = self._counter
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self.websocket.send(wire_encode({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}, self.encoding))
+            response = await future
+        finally:
+            self._pending.pop(request_id, None)
+        if "error" in response:
+            raise RuntimeError(response["error"].get("message", "Bridge error"))
+        return response.get("result")
+
+    async def list_tools(self):
+        return await self.request("tools/list", {})
+
+    async def call_tool(self, params: dict):
+        return await self.request("tools/call", params)
+
+    async def read_resource(self, uri: str, query: dict = None):
+        return await self.request("resources/read", {"uri": uri, "query": query})
+
+class LocalBridge:
+    """同一程序內直接呼叫 MCPBridgeServer 的工具處理函式"""
+
+    def __init__(self, bridge: "MCPBridgeServer"):
+        self.bridge = bridge
+
+    async def list_tools(self):
+        return await self.bridge._list_tools()
+
+    async def call_tool(self, params: dict):
+        return await self.bridge._call_tool(params)
+
+    async def read_resource(self, uri: str, query: dict = None):
+        return await _read_resource(uri, None, query)
+
+    def serialized_tools(self) -> str:
+        return tool_registry.serialized_tools(JSON, wrapped=True)
+
+class MCPDispatcher:
+    """
+    MCP JSON-RPC 方法分派，供 stdio 與 Streamable HTTP 傳輸共用
+    工具結果只在此處序列化一次為 MCP text content，與 Node 橋接器的輸出格式相同
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def error(request_id, code: int, message: str) -> dict:
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+    def preserialized(self, message) -> Optional[str]:
+        """可直接使用快取序列化結果的請求 (目前為本機的 tools/list)；其他請求回傳 None"""
+        if (isinstance(message, dict) and message.get("method") == "tools/list" and "id" in message
+                and hasattr(self.backend, "serialized_tools")):
+            return wire_encode_result(message["id"], self.backend.serialized_tools(), JSON)
+        return None
+
+    async def handle(self, message, label: str = "MCP"):
+        """處理單一訊息；通知 (沒有 id) 回傳 None"""
+        if not isinstance(message, dict):
+            return self.error(None, -32600, "Invalid Request")
+        method = message.get("method")
+        params = message.get("params") or {}
+        request_id = message.get("id")
+        if "id" not in message:
+            # notifications/initialized、notifications/cancelled 等通知不需回應
+            return None
+        try:
+            result = await self.dispatch(method, params)
+        except LookupError as e:
+            return self.error(request_id, -32601, str(e))
+        except Exception as e:
+            log(f"[{label}] Request error ({method}): {e}")
+            return self.error(request_id, -32603, str(e))
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    async def dispatch(self, method: str, params: dict):
+        if method == "initialize":
+            requested = params.get("protocolVersion")
+            return {
+                "protocolVersion": requested if requested in MCP_PROTOCOL_VERSIONS else MCP_PROTOCOL_VERSIONS[0],
+                "capabilities": {"tools": {}, "resources": {}},
+                "serverInfo": MCP_SERVER_INFO
+            }
+        elif method == "ping":
+            return {}
+        elif method == "tools/list":
+            return {"tools": await self.backend.list_tools() or []}
+        elif method == "tools/call":
+            log(f"[MCP] Executing tool: {params.get('name')}")
+            try:
+                result = await self.backend.call_tool({"name": params.get("name"), "arguments": params.get("arguments") or {}})
+            except Exception as e:
+                return {"content": [{"type": "text", "text": f"Error: {e}"}], "isError": True}
+            text = result if isinstance(result, str) else json_codec.dumps(result, indent=True)
+            if isinstance(result, dict) and "invalidArguments" in result:
+                return {"content": [{"type": "text", "text": text}], "isError": True}
+            return {"content": [{"type": "text", "text": text}]}
+        elif method == "resources/list":
+            return {"resources": []}
+        elif method == "resources/templates/list":
+            return await _list_resources()
+        elif method == "resources/read":
+            result = await self.backend.read_resource(params.get("uri", ""), params.get("query"))
+            if "error" in result:
+                raise ValueError(result["error"])
+            return result
+        raise LookupError(f"Method not found: {method}")
+
+class MCPStdioServer:
+    """
+    標準 MCP stdio 傳輸：每行一則 JSON-RPC 訊息，stdout 只輸出協定訊息 (日誌一律寫 stderr)
+    每個請求各自成為一個 Task：長時間的工具呼叫不會擋住 ping，notifications/cancelled 可取消執行中的請求
+    """
+
+    def __init__(self, backend):
+        self.dispatcher = MCPDispatcher(backend)
+        self._stdout = sys.stdout.buffer
+        self._requests: Dict[Any, asyncio.Task] = {}   # 執行中的請求 id -> Task
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        pending = set()
+        # Windows 的 console/pipe stdin 無法掛上 asyncio，改以背景執行緒逐行讀取
+        threading.Thread(target=self._read_stdin, args=(loop, queue), daemon=True).start()
+        log("[MCP Stdio] Ready for stdio connections")
+        while True:
+            line = await queue.get()
+            if line is None:
+                log("[MCP Stdio] stdin closed, shutting down")
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+                return
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json_codec.loads(line)
+            except ValueError as e:
+                self._write(MCPDispatcher.error(None, -32700, f"Parse error: {e}"))
+                continue
+            if isinstance(message, dict) and message.get("method") == "notifications/cancelled":
+                self._cancel((message.get("params") or {}).get("requestId"))
+                continue
+            task = asyncio.ensure_future(self._process(message))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            request_id = message.get("id") if isinstance(message, dict) else None
+            if isinstance(request_id, (str, int)):
+                self._requests[request_id] = task
+                task.add_done_callback(lambda _, rid=request_id: self._requests.pop(rid, None))
+
+    def _cancel(self, request_id):
+        task = self._requests.get(request_id) if isinstance(request_id, (str, int)) else None
+        if task is not None and not task.done():
+            log(f"[MCP Stdio] Cancelling request {request_id}")
+            task.cancel()
+
+    async def _process(self, message):
+        """處理單一訊息或批次並寫出回應；被取消的請求依 MCP 規範不回應"""
+        try:
+            if isinstance(message, list):
+                replies = [r for r in [await self.dispatcher.handle(m, "MCP Stdio") for m in message] if r is not None]
+                if replies:
+                    self._write(replies)
+                return
+            raw = self.dispatcher.preserialized(message)
+            if raw is not None:
+                self._write_raw(raw)
+                return
+            reply = await self.dispatcher.handle(message, "MCP Stdio")
+            if reply is not None:
+                self._write(reply)
+        except asyncio.CancelledError:
+            pass
+
+    @staticmethod
+    def _read_stdin(loop, queue):
+        for line in sys.stdin.buffer:
+            loop.call_soon_threadsafe(queue.put_nowait, line)
+        loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    def _write(self, message):
+        self._write_raw(json_codec.dumps(message))
+
+    def _write_raw(self, text: str):
+        self._stdout.write(text.encode("utf-8") + b"\n")
+        self._stdout.flush()
+
+# ==========================================
+# MCP Streamable HTTP Transport
+# ==========================================
+
+HTTP_CONFIG = CONFIG.get("http", {})
+HTTP_PATH = CONFIG.get("server", {}).get("url_path", "/mcp/")
+http_stats = HttpStats()
+
+class MCPHttpHandler:
+    """
+    MCP Streamable HTTP：POST JSON-RPC 至 url_path (預設 /mcp/)
+    - 用戶端接受 text/event-stream 且請求帶 _meta.progressToken 時以 SSE 回應，
+      工具執行期間定期送出 notifications/progress，最後送出結果
+    - 其餘請求直接回應 application/json；只有通知時回應 202
+    - initialize 時發給 Mcp-Session-Id，DELETE 結束 Session
+    """
+
+    def __init__(self, backend, path: str = HTTP_PATH, progress_interval: float = 2.0):
+        self.dispatcher = MCPDispatcher(backend)
+        self.path = "/" + path.strip("/")
+        self.progress_interval = progress_interval
+        self.sessions = set()
+
+    async def __call__(self, request, response):
+        if request.path.rstrip("/") != self.path:
+            raise HttpError(404)
+        session_id = request.headers.get("mcp-session-id")
+        if request.method == "DELETE":
+            if session_id not in self.sessions:
+                raise HttpError(404, "Unknown session")
+            self.sessions.discard(session_id)
+            await response.send(200)
+            return
+        if request.method != "POST":
+            # 不提供 GET 的伺服器主動推播串流
+            await response.send(405, headers={"Allow": "POST, DELETE"})
+            return
+        if session_id and session_id not in self.sessions:
+            raise HttpError(404, "Unknown session")
+
+        try:
+            payload = json_codec.loads(request.body)
+        except ValueError as e:
+            await response.send(400, json_codec.dumps(MCPDispatcher.error(None, -32700, f"Parse error: {e}")).encode("utf-8"))
+            return
+        messages = payload if isinstance(payload, list) else [payload]
+        pending = [m for m in messages if not isinstance(m, dict) or "id" in m]
+        if not pending:
+            for m in messages:
+                await self.dispatcher.handle(m, "MCP HTTP")
+            await response.send(202)
+            return
+
+        headers = {}
+        if any(m.get("method") == "initialize" for m in pending if isinstance(m, dict)):
+            session_id = uuid.uuid4().hex
+            self.sessions.add(session_id)
+            headers["Mcp-Session-Id"] = session_id
+
+        if request.accepts("text/event-stream") and any(_progress_token(m) is not None for m in pending):
+            await response.start_stream(headers)
+            for m in messages:
+                reply = await self._handle_with_progress(m, response)
+                if reply is not None:
+                    await response.event(json_codec.dumps(reply), event="message")
+            return
+
+        raw = self.dispatcher.preserialized(payload)
+        if raw is not None:
+            await response.send(200, raw.encode("utf-8"), headers=headers)
+            return
+        replies = [r for r in [await self.dispatcher.handle(m, "MCP HTTP") for m in messages] if r is not None]
+        body = replies if isinstance(payload, list) else replies[0]
+        await response.send(200, json_codec.dumps(body).encode("utf-8"), headers=headers)
+
+    async def _handle_with_progress(self, message, response):
+        token = _progress_token(message)
+        task = asyncio.ensure_future(self.dispatcher.handle(message, "MCP HTTP"))
+        if token is None:
+            return await task
+        started = time.time()
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=self.progress_interval)
+            if done:
+                return task.result()
+            elapsed = round(time.time() - started, 1)
+            await response.event(json_codec.dumps({
+                "jsonrpc": "2.0",
+                "method": "notifications/progress",
+                "params": {"progressToken": token, "progress": elapsed, "message": f"{message.get('method')} running ({elapsed}s)"}
+            }), event="message")
+
+def _progress_token(message):
+    if not isinstance(message, dict):
+        return None
+    return ((message.get("params") or {}).get("_meta") or {}).get("progressToken")
+
+def _http_service(bridge: "MCPBridgeServer", host: str):
+    """依 http 設定建立 Streamable HTTP 服務；停用時回傳 None"""
+    if not HTTP_CONFIG.get("enabled", True):
+        return None
+    handler = MCPHttpHandler(LocalBridge(bridge), HTTP_PATH, float(HTTP_CONFIG.get("progress_interval", 2.0)))
+    server = HttpServer(handler, keep_alive_timeout=float(HTTP_CONFIG.get("keep_alive_timeout", 30.0)),
+                        body_timeout=float(HTTP_CONFIG.get("body_timeout", 60.0)), stats=http_stats)
+    port = int(HTTP_CONFIG.get("port", 65297))
+    log(f"[MCP HTTP] Server starting on http://{host}:{port}{HTTP_PATH}")
+    return server.serve(host, port)
+
+def _port_in_use(port: int, host: str = "127.0.0.1") -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        return sock.connect_ex((host, port)) == 0
 
 # ==========================================
 # 工具實作
 # ==========================================
 
-async def _check_dynamo_connection(session_id: str = None) -> tuple[bool, str]:
+async def _check_dynamo_connection(session_id: str = None) -> tuple:
+    """回傳 (是否成功, get_graph_status 結果 dict 或錯誤訊息)"""
     with ws_manager._lock:
         sessions = list(ws_manager.active_sessions.keys())
     if not sessions: return False, "No active Dynamo connections."
@@ -792,14 +1545,49 @@ async def _check_dynamo_connection(session_id: str = None) -> tuple[bool, str]:
     try:
         data = await ws_manager.send_command_async(target_id, {"action": "get_graph_status"})
         if data.get("status") == "error": return False, data.get("message")
-        return True, json.dumps(data, ensure_ascii=False)
+        return True, data
     except Exception as e: 
         return False, str(e)
 
-async def read_dynamo_resource(resourceType: str, nodeId: str = None, sessionId: str = None) -> dict:
+@tool_registry.tool(
+    description="讀取 Dynamo 工作區資源。適用於不支援 MCP resources/read 的客戶端（如 Gemini CLI、Cursor）。",
+    properties={
+        "resourceType": {
+            "type": "string",
+            "enum": ["nodes", "connectors", "selection", "errors"],
+            "description": "資源類型：nodes=所有節點, connectors=所有連線, selection=選取的節點, errors=錯誤節點",
+        },
+        "nodeId": {"type": "string", "description": "選用。取得單一節點詳情時使用（需配合 resourceType='nodes'）"},
+        "sessionId": {"type": "string", "description": "選用。指定 Session ID"},
+        "fields": {"type": "array", "items": {"type": "string"}, "description": "選用。只回傳指定欄位（如 ['id', 'state']）。省略 inputs/outputs 可大幅減少資料量。"},
+        "offset": {"type": "integer", "description": "選用。分頁起始位置，預設 0。"},
+        "limit": {"type": "integer", "description": "選用。最多回傳筆數。"},
+        "nameContains": {"type": "string", "description": "選用。節點名稱包含此字串（不分大小寫）。"},
+        "state": {"type": "string", "description": "選用。節點狀態包含此字串（如 'Error', 'Warning'）。"},
+        "bbox": {
+            "type": "object",
+            "description": "選用。畫布範圍篩選 {minX, minY, maxX, maxY}，可只指定部分邊界。",
+            "properties": {"minX": {"type": "number"}, "minY": {"type": "number"}, "maxX": {"type": "number"}, "maxY": {"type": "number"}},
+        },
+    },
+    required=("resourceType",),
+    read_only=True
+)
+async def read_dynamo_resource(
+    resourceType: str,
+    nodeId: str = None,
+    sessionId: str = None,
+    fields: List[str] = None,
+    offset: int = None,
+    limit: int = None,
+    nameContains: str = None,
+    state: str = None,
+    bbox: dict = None
+) -> dict:
     """
     通用工具橋接：將 Resources 層包裝成標準工具
     適用於不支援 MCP resources/read 的客戶端
+    支援欄位投影 (fields)、分頁 (offset/limit) 與篩選 (nameContains/state/bbox)
     """
     uri_map = {
         "nodes": "dynamo://workspace/current/nodes",
@@ -815,8 +1603,9 @@ async def read_dynamo_resource(resourceType: str, nodeId: str = None, sessionId:
     else:
         return {"error": f"Unknown resourceType: {resourceType}. Valid: nodes, connectors, selection, errors"}
     
-    # 透過內部 _read_resource 取得資料
-    result = await _read_resource(uri, sessionId)
+    # 透過內部 _read_resource_data 取得結構化資料 (不經過 text 序列化)
+    query = {"fields": fields, "offset": offset, "limit": limit, "nameContains": nameContains, "state": state, "bbox": bbox}
+    result = await _read_resource_data(uri, sessionId, query)
     
     # 取得版本資訊
     with ws_manager._lock:
@@ -833,17 +1622,15 @@ async def read_dynamo_resource(resourceType: str, nodeId: str = None, sessionId:
     if "error" in result:
         return result
     
-    if "contents" in result:
-        try:
-            content = json.loads(result["contents"][0]["text"])
-            content["_version"] = version_info["version"]
-            content["_sessionId"] = version_info["sessionId"]
-            return content
-        except:
-            return result
-    
-    return result
+    return {**result, "_version": version_info["version"], "_sessionId": version_info["sessionId"]}
 
+@tool_registry.tool(
+    description="取得當前工作區的版本號與最後寫入者資訊。用於實作樂觀鎖，避免多客戶端衝突。",
+    properties={
+        "sessionId": {"type": "string", "description": "選用。指定 Session ID"},
+    },
+    read_only=True
+)
 async def get_workspace_version(sessionId: str = None) -> dict:
     """
     取得工作區版本資訊
@@ -860,16 +1647,297 @@ async def get_workspace_version(sessionId: str = None) -> dict:
     
     return {
         "status": "ok",
-        **state.get_info()
+        **state.get_info(),
+        **undo_manager.get_info(target_session)
+    }
+
+# ==========================================
+# 工作區指紋 (Merkle Fingerprint)
+# ==========================================
+
+def _digest(*parts) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+def _compute_workspace_fingerprint(status: dict) -> dict:
+    """
+    由 get_graph_status 計算三層雜湊：
+    - 節點雜湊：id、型別、名稱、位置、可編輯內容 (Code Block 程式碼、Python 腳本、輸入節點的值)
+    - 子圖雜湊：每個連通分量內排序後的節點雜湊 + 連線
+    - 根指紋：排序後的子圖雜湊
+    任何節點移動、改值、新增、刪除或改線都會只改變所屬子圖與根指紋
+    """
+    nodes = status.get("nodes", [])
+    connectors = status.get("connectors", [])
+
+    node_hashes = {}
+    parent = {}
+    for n in nodes:
+        nid = str(n.get("id"))
+        node_hashes[nid] = _digest(nid, n.get("fullName"), n.get("creationName"), n.get("name"),
+                                   round(float(n.get("x", 0)), 2), round(float(n.get("y", 0)), 2), n.get("value"))
+        parent[nid] = nid
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    edges = []
+    for c in connectors:
+        src, dst = str(c.get("from")), str(c.get("to"))
+        if src not in parent or dst not in parent:
+            continue
+        edges.append((src, c.get("fromPort", 0), dst, c.get("toPort", 0)))
+        ra, rb = find(src), find(dst)
+        if ra != rb:
+            parent[ra] = rb
+
+    members: Dict[str, list] = {}
+    for nid in node_hashes:
+        members.setdefault(find(nid), []).append(nid)
+    component_edges: Dict[str, list] = {}
+    for e in edges:
+        component_edges.setdefault(find(e[0]), []).append(e)
+
+    subgraphs = []
+    for root, ids in members.items():
+        ids.sort()
+        edge_parts = sorted(f"{a}:{ap}>{b}:{bp}" for a, ap, b, bp in component_edges.get(root, []))
+        subgraphs.append({
+            "hash": _digest(*(node_hashes[i] for i in ids), "|", *edge_parts),
+            "nodeIds": ids,
+            "nodeCount": len(ids),
+            "connectorCount": len(edge_parts)
+        })
+    subgraphs.sort(key=lambda sg: sg["hash"])
+
+    return {
+        "root": _digest(*(sg["hash"] for sg in subgraphs)),
+        "nodeCount": len(nodes),
+        "connectorCount": len(connectors),
+        "subgraphs": subgraphs,
+        "nodeHashes": node_hashes
+    }
+
+@tool_registry.tool(
+    description="取得工作區結構指紋（Merkle 雜湊：節點 → 連通子圖 → 根指紋），可偵測人工在 Dynamo 內的編輯。帶入上次的 knownRoot 可在未變動時略過重新讀取；帶入 knownSubgraphs 只回傳有變動的子圖。",
+    properties={
+        "sessionId": {"type": "string", "description": "選用。指定 Session ID"},
+        "knownRoot": {"type": "string", "description": "選用。上次取得的根指紋，相同時只回傳 changed=false。"},
+        "knownSubgraphs": {"type": "array", "items": {"type": "string"}, "description": "選用。上次取得的子圖雜湊清單，只回傳新的或變動的子圖及其節點 ID。"},
+        "includeNodes": {"type": "boolean", "description": "是否回傳每個節點的雜湊。預設 false。"},
+    },
+    read_only=True
+)
+async def get_workspace_fingerprint(
+    sessionId: str = None,
+    knownRoot: str = None,
+    knownSubgraphs: List[str] = None,
+    includeNodes: bool = False
+) -> dict:
+    """
+    取得工作區結構指紋 (含人工在 Dynamo 內的編輯)
+    - knownRoot 相同時只回傳 changed=false
+    - 提供 knownSubgraphs 時只回傳有變動的子圖 (含節點 ID) 與已消失的子圖雜湊
+    """
+    with ws_manager._lock:
+        sessions = list(ws_manager.active_sessions.keys())
+    if not sessions:
+        return {"error": "No active Dynamo connections"}
+    if sessionId and sessionId not in sessions:
+        return {"error": f"Session {sessionId} not found"}
+    target_id = sessionId if sessionId else sessions[-1]
+
+    status = await ws_manager.send_command_async(target_id, {"action": "get_graph_status"})
+    if status.get("status") == "error":
+        return {"error": status.get("message")}
+
+    fp = _compute_workspace_fingerprint(status)
+    result = {
+        "status": "ok",
+        "sessionId": target_id,
+        "version": session_state_manager.get_state(target_id).get_version(),
+        "root": fp["root"],
+        "changed": knownRoot != fp["root"],
+        "nodeCount": fp["nodeCount"],
+        "connectorCount": fp["connectorCount"]
+    }
+    if not result["changed"]:
+        return result
+
+    if knownSubgraphs is not None:
+        known = set(knownSubgraphs)
+        current = {sg["hash"] for sg in fp["subgraphs"]}
+        result["changedSubgraphs"] = [sg for sg in fp["subgraphs"] if sg["hash"] not in known]
+        result["removedSubgraphs"] = sorted(known - current)
+        result["subgraphHashes"] = sorted(current)
+    else:
+        result["subgraphs"] = [{k: v for k, v in sg.items() if k != "nodeIds"} for sg in fp["subgraphs"]]
+
+    if includeNodes:
+        result["nodeHashes"] = fp["nodeHashes"]
+    return result
+
+
+@tool_registry.tool(
+    description=(
+        "在伺服器端以查詢語言查詢工作區圖，只回傳結果。階段以 | 串接："
+        "where <條件> / upstream [深度] / downstream [深度] / select 欄位,... / limit n / count / group by 欄位 (count 與 group by 只能放在最後)。"
+        "條件：欄位 (id,name,fullName,creationName,x,y,state,indegree,outdegree) 搭配 = != ~(包含) > < >= <=，"
+        "以及 feeds(條件)、fedby(條件)、isolated、not/and/or/()。"
+        "範例：name ~ \"Python\" and feeds(name = \"Watch\")；where id = \"<guid>\" | downstream 2 | count"
+    ),
+    properties={
+        "query": {"type": "string", "description": "查詢語句"},
+        "sessionId": {"type": "string", "description": "選用。指定 Session ID"},
+    },
+    required=("query",),
+    read_only=True
+)
+async def query_workspace(query: str, sessionId: str = None) -> dict:
+    """
+    以查詢語言在 Bridge 端查詢工作區圖 (語法見 workspace_query.py)
+    只回傳查詢結果，避免將整張圖傳入 LLM context
+    """
+    try:
+        stages = compile_query(query)
+    except QueryError as e:
+        return {"status": "error", "message": f"查詢語法錯誤: {e}"}
+
+    with ws_manager._lock:
+        sessions = list(ws_manager.active_sessions.keys())
+    if not sessions:
+        return {"error": "No active Dynamo connections"}
+    if sessionId and sessionId not in sessions:
+        return {"error": f"Session {sessionId} not found"}
+    target_id = sessionId if sessionId else sessions[-1]
+
+    started = time.perf_counter()
+    status = await ws_manager.send_command_async(target_id, {"action": "get_graph_status"})
+    if status.get("status") == "error":
+        return {"error": status.get("message")}
+
+    states = None
+    if query_uses_field(stages, "state"):
+        # get_graph_status 不含節點狀態，僅在查詢需要時另外取得精簡欄位
+        res = await ws_manager.send_command_async(target_id, {"action": "get_nodes_structured", "query": {"fields": ["id", "state"]}})
+        states = {str(n.get("id")): n.get("state", "") for n in res.get("nodes", [])}
+
+    fetched = time.perf_counter()
+    result = run_query(stages, GraphIndex.from_status(status, states))
+    return {
+        "status": "ok",
+        "sessionId": target_id,
+        **result,
+        "timing": {
+            "fetchMs": round((fetched - started) * 1000, 2),
+            "evalMs": round((time.perf_counter() - fetched) * 1000, 2)
+        }
     }
 
 
+@tool_registry.tool(
+    description=(
+        "分析節點圖結構 (CSR 鄰接陣列，線性時間)：拓撲順序、循環偵測、最長相依鏈、"
+        "孤立/不可達/無效節點、扇入扇出熱點、連通分量。"
+        "提供 instructions 時分析尚未送出的指令圖 (含原生節點擴展)，否則分析目前工作區。"
+    ),
+    properties={
+        "sessionId": {"type": "string", "description": "選用。指定 Session ID"},
+        "instructions": {"type": "string", "description": "選用。JSON 格式的節點指令，分析此指令圖而非目前工作區"},
+        "top": {"type": "integer", "description": "熱點與分量排行數量。預設 10"},
+        "sinkNames": {"type": "array", "items": {"type": "string"}, "description": "選用。視為輸出端的節點名稱，無法到達任何輸出端的節點列為無效節點。預設 Watch 類節點"},
+        "includeOrder": {"type": "boolean", "description": "是否回傳完整拓撲順序 (節點 ID)。預設 false"},
+    },
+    read_only=True
+)
+async def analyze_graph_structure(sessionId: str = None, instructions: str = None, top: int = 10,
+                                  sinkNames: list = None, includeOrder: bool = False) -> dict:
+    """
+    以 CSR 鄰接陣列分析節點圖結構 (演算法見 graph_analytics.py)
+    - 提供 instructions：分析展開後的指令圖，不需連線 Dynamo
+    - 否則：分析目前工作區 (get_graph_status)
+    """
+    started = time.perf_counter()
+    if instructions:
+        try:
+            json_data = json.loads(instructions)
+        except json.JSONDecodeError as e:
+            return {"status": "error", "message": f"JSON 解析錯誤: {str(e)}"}
+        if isinstance(json_data, list):
+            json_data = {"nodes": json_data, "connectors": []}
+        expanded = _expand_native_nodes(json_data)
+        nodes, connectors = expanded.get("nodes", []), expanded.get("connectors", [])
+        source = "instructions"
+    else:
+        with ws_manager._lock:
+            sessions = list(ws_manager.active_sessions.keys())
+        if not sessions:
+            return {"error": "No active Dynamo connections"}
+        if sessionId and sessionId not in sessions:
+            return {"error": f"Session {sessionId} not found"}
+        sessionId = sessionId if sessionId else sessions[-1]
+        status = await ws_manager.send_command_async(sessionId, {"action": "get_graph_status"})
+        if status.get("status") == "error":
+            return {"error": status.get("message")}
+        nodes, connectors = status.get("nodes", []), status.get("connectors", [])
+        source = "workspace"
+
+    fetched = time.perf_counter()
+    graph = CSRGraph.from_graph(nodes, connectors)
+    report = analyze_csr_graph(graph, top=max(1, int(top)), sink_names=sinkNames or DEFAULT_SINK_NAMES)
+    if not includeOrder:
+        report.pop("topologicalOrder", None)
+    return {
+        "status": "ok",
+        "source": source,
+        "sessionId": sessionId if source == "workspace" else None,
+        **report,
+        "timing": {
+            "fetchMs": round((fetched - started) * 1000, 2),
+            "analyzeMs": round((time.perf_counter() - fetched) * 1000, 2)
+        }
+    }
+
 # ==========================================
 # 節點擴展與降級邏輯 (Optimization v1.2)
 # ==========================================
 
-def _generate_ds_code(node: dict) -> str:
-    """將原生節點規範轉換為 DesignScript 代碼 (用於軌道 A 降級)"""
+# Code Block 文字分析快取 (軌道 A 降級與指令預檢共用)
+designscript_analyzer = DesignScriptAnalyzer(max_entries=CONFIG.get("validation", {}).get("code_cache_entries", 256))
+
+# 多載綁定：簽名查表只在第一次使用時由 common_nodes.json 編譯，展開、預檢與降級代碼共用同一份快取
+_signature_binder: Optional[SignatureBinder] = None
+
+def _get_signature_binder() -> SignatureBinder:
+    global _signature_binder
+    if _signature_binder is None:
+        _signature_binder = SignatureBinder(_load_common_nodes_metadata())
+    return _signature_binder
+
+def _bound_signature(node: dict, connected: Iterable[str] = ()) -> Optional[Signature]:
+    """節點綁定的簽名；指定了不存在的 overload 時退回頂層預設簽名 (錯誤由預檢回報)"""
+    binder = _get_signature_binder()
+    try:
+        return binder.bind(node, [{"toPortName": port} for port in connected])
+    except BindingError:
+        return binder.signatures(node.get("name"))[0]
+
+def _is_ds_expression(text: str) -> bool:
+    """字串參數是否為可直接嵌入的 DesignScript 運算式 (單一運算式、無自由變數，如 Point.ByCoordinates(0,0,0))"""
+    analysis = designscript_analyzer.analyze(text)
+    return analysis.error is None and len(analysis.outputs) == 1 and not analysis.inputs and analysis.ports_known()
+
+def _generate_ds_code(node: dict, connected: Iterable[str] = ()) -> str:
+    """
+    將原生節點規範轉換為 DesignScript 代碼 (用於軌道 A 降級)
+    connected: 有連線接入的埠名稱，在代碼中保留為同名變數 (即 Code Block 的輸入埠)
+    """
     name = node.get("name", "")
     params = node.get("params", {})
     
@@ -878,22 +1946,22 @@ def _generate_ds_code(node: dict) -> str:
         val = str(node.get("value", "0"))
         return val if val.endswith(";") else val + ";"
         
-    # 格式化參數
-    param_strs = []
-    metadata = _load_common_nodes_metadata()
-    node_info = metadata.get(name, {})
-    input_keys = node_info.get("inputs", list(params.keys()))
-    
+    # 依綁定的多載產生參數 (如 Point.ByCoordinates 只給 x, y 時綁定 2D)
+    signature = _bound_signature(node, connected)
+    input_keys = list(signature.inputs) if signature is not None else list(params.keys())
+
+    args = []
     for key in input_keys:
         if key in params:
-            val = params[key]
-            # 簡單判斷是否為字串
-            if isinstance(val, str) and not (val.replace('.','',1).isdigit() or val.startswith("Point.") or val.startswith("Vector.") or val.startswith("[") or val.endswith(";")):
-                param_strs.append(f"\"{val}\"")
-            else:
-                param_strs.append(str(val))
-    
-    return f"{name}({', '.join(param_strs)});"
+            # 數值 (含負數、指數)、布林、null、串列依 DesignScript 語法輸出；其餘字串加引號並跳脫
+            args.append(to_ds_literal(params[key], _is_ds_expression))
+        else:
+            args.append(None if key not in connected else key)
+    # 結尾未提供的參數省略 (使用函式預設值)，中間的以變數名稱保留為輸入埠，避免參數錯位
+    while args and args[-1] is None:
+        args.pop()
+    args = [key if arg is None else arg for key, arg in zip(input_keys, args)]
+    return f"{name}({', '.join(args)});"
 
 def _expand_native_nodes(instruction: dict) -> dict:
     """自動將帶 params 的原生節點擴展為 Number 節點 + Connectors (軌道 B)"""
@@ -902,19 +1970,19 @@ def _expand_native_nodes(instruction: dict) -> dict:
     expanded_nodes = []
     expanded_connectors = list(connectors)
     
-    metadata = _load_common_nodes_metadata()
+    # 綁定多載，埠索引依綁定的簽名 (而非頂層 inputs) 計算
+    _get_signature_binder().bind_instruction(instruction)
     import time
     timestamp = int(time.time() * 1000)
     
     for node in nodes:
-        name = node.get("name", "")
         params = node.get("params", {})
         node_id = node.get("id", str(uuid.uuid4()))
+        signature = _bound_signature(node) if params else None
         
         # 只有在 metadata 中且有 params 時才擴展
-        if name in metadata and params:
-            node_info = metadata[name]
-            input_ports = node_info.get("inputs", [])
+        if signature is not None:
+            input_ports = signature.inputs
             
             # 為每個參數創建 Number 節點
             for i, port_name in enumerate(input_ports):
@@ -948,7 +2016,7 @@ def _expand_native_nodes(instruction: dict) -> dict:
     return {"nodes": expanded_nodes, "connectors": expanded_connectors}
 
 def _detect_potential_issues(nodes: list, connectors: list) -> list:
-    """偵測潛在問題 (Human-in-the-Loop)"""
+    """偵測潛在問題 (Human-in-the-Loop)；依原始指令清單逐一檢查，重複 ID 的節點各自列入"""
     warnings = []
     
     # 檢查節點位置重疊
@@ -981,17 +2049,13 @@ def _generate_dry_run_report(json_data: dict, base_x: float, base_y: float) -> d
     """
     expanded = _expand_native_nodes(json_data)
     
-    nodes = expanded.get("nodes", [])
+    # 套用座標偏移 (不修改指令本身)
+    nodes = [{**n, "x": float(n.get("x", 0)) + base_x, "y": float(n.get("y", 0)) + base_y} for n in expanded.get("nodes", [])]
     connectors = expanded.get("connectors", [])
     
-    # 套用座標偏移
-    for node in nodes:
-        node["x"] = float(node.get("x", 0)) + base_x
-        node["y"] = float(node.get("y", 0)) + base_y
-    
     # 計算佔用範圍
-    xs = [n.get("x", 0) for n in nodes]
-    ys = [n.get("y", 0) for n in nodes]
+    xs = [n["x"] for n in nodes]
+    ys = [n["y"] for n in nodes]
     
     report = {
         "status": "dry_run",
@@ -1009,7 +2073,7 @@ def _generate_dry_run_report(json_data: dict, base_x: float, base_y: float) -> d
             {
                 "id": n.get("id"),
                 "name": n.get("name"),
-                "position": {"x": n.get("x", 0), "y": n.get("y", 0)}
+                "position": {"x": n["x"], "y": n["y"]}
             }
             for n in nodes
         ],
@@ -1019,6 +2083,210 @@ def _generate_dry_run_report(json_data: dict, base_x: float, base_y: float) -> d
     
     return report
 
+async def _record_applied(session_id: str, payload: dict, version: int, client_id: str, undo: Optional[dict]):
+    """
+    成功套用後寫入指令日誌並推入復原堆疊
+    undo 為 Dynamo 端回報的套用前狀態 (_merge_undo_info)；舊版擴充套件未回報時無法計算反向操作
+    """
+    await instruction_journal.append_async(session_id, payload, version, client_id)
+    if not undo_manager.enabled:
+        return
+    if undo is None:
+        # 無法取得套用前狀態時，舊的反向操作已不可靠
+        undo_manager.reset(session_id)
+        return
+    undo_manager.push(session_id, version, client_id, payload, _compute_inverse(payload, undo))
+
+# ==========================================
+# 指令圖預檢 (Pre-flight Validation)
+# ==========================================
+
+VALIDATION_CONFIG = CONFIG.get("validation", {})
+VALIDATION_ENABLED = VALIDATION_CONFIG.get("enabled", True)
+# 程式碼分析快取獨立於驗證器，重建埠資訊查表時保留
+python_code_checker = PythonCodeChecker(max_entries=VALIDATION_CONFIG.get("code_cache_entries", 256))
+_instruction_validator: Optional[InstructionValidator] = None
+
+def _get_instruction_validator() -> InstructionValidator:
+    """埠資訊查表只在第一次使用時由 common_nodes.json 編譯"""
+    global _instruction_validator
+    if _instruction_validator is None:
+        _instruction_validator = InstructionValidator(_load_common_nodes_metadata(),
+                                                      max_errors=VALIDATION_CONFIG.get("max_errors", 50),
+                                                      python_checker=python_code_checker,
+                                                      designscript=designscript_analyzer,
+                                                      binder=_get_signature_binder())
+    return _instruction_validator
+
+async def _validate_instructions(json_data: dict, session_id: Optional[str]) -> dict:
+    """
+    檢查批次指令；只有連線引用批次外的節點時才查詢目標 Session：
+    GUID 引用以 get_graph_status 確認 (一次往返)，字串 ID 引用以指令日誌中先前建立的節點確認
+    """
+    validator = _get_instruction_validator()
+    workspace, known_ids = None, None
+    if session_id:
+        guid_refs, name_refs = validator.external_refs(json_data)
+        if guid_refs:
+            status = await ws_manager.send_command_async(session_id, {"action": "get_graph_status"})
+            if status.get("status") != "error":
+                workspace = status
+        if name_refs and instruction_journal.enabled:
+            known_ids = await instruction_journal.known_ids_async(session_id)
+    return validator.validate(json_data, workspace=workspace, known_ids=known_ids)
+
+@tool_registry.tool(
+    description="在不修改工作區的情況下檢查指令圖：重複節點 ID、連線指向不存在的節點、toPort 超出範圍、未知的 toPortName、循環連線，以及 Python Script 的 pythonCode 與 Code Block 的 DesignScript 語法 (附行號；Code Block 埠數依程式碼推導)。有連線中的會話時，一併確認引用的既有節點。",
+    properties={
+        "instructions": {"type": "string", "description": "JSON 格式的圖形定義 (與 execute_dynamo_instructions 相同)。"},
+        "sessionId": {"type": "string", "description": "選用。用來確認既有節點引用的會話 ID。若未指定則使用最新連線。"},
+    },
+    required=("instructions",),
+    read_only=True
+)
+async def validate_instructions(instructions: str, sessionId: str = None) -> dict:
+    try:
+        json_data = json.loads(instructions)
+    except json.JSONDecodeError as e:
+        return {"status": "error", "message": f"JSON 解析錯誤: {str(e)}"}
+    if isinstance(json_data, list):
+        json_data = {"nodes": json_data, "connectors": []}
+    with ws_manager._lock:
+        sessions = list(ws_manager.active_sessions.keys())
+    if sessionId and sessionId not in sessions:
+        return {"status": "error", "message": f"找不到指定的會話 {sessionId}"}
+    session_id = sessionId or (sessions[-1] if sessions else None)
+    report = await _validate_instructions(json_data, session_id)
+    return {"status": "ok" if report["valid"] else "invalid", "sessionId": session_id, **report}
+
+# ==========================================
+# 節點名稱解析 (Creation Name Resolution)
+# ==========================================
+
+RESOLUTION_CONFIG = CONFIG.get("node_resolution", {})
+creation_name_cache = CreationNameCache(
+    os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", RESOLUTION_CONFIG.get("path", ".journal/creation_names.json"))),
+    enabled=RESOLUTION_CONFIG.get("enabled", True)
+)
+def _session_dynamo_version(session_id: str) -> Optional[str]:
+    with ws_manager._lock:
+        return ws_manager.session_info.get(session_id, {}).get("dynamoVersion")
+
+def _learn_creation_names(session_id: str, nodes: list):
+    """list_nodes 搜尋結果填入 creationName 快取"""
+    if creation_name_cache.enabled and creation_name_cache.add(_session_dynamo_version(session_id), nodes):
+        try:
+            creation_name_cache.save()
+        except OSError as e:
+            log(f"[WARN] Failed to save creation name cache: {e}")
+
+async def _resolve_creation_names(json_data: dict, session_id: str) -> list:
+    """
+    將外掛節點名稱改寫為 creationName (GUID)，Dynamo 端不再逐次以名稱解析
+    - 內建節點、common_nodes.json 內的節點、已是 GUID 或已指定 creationName 者不處理
+    - 未收錄的名稱以 list_nodes 查詢一次並快取；搜尋不可用、或有結果但無完全相符時照原樣送出
+      (如 Line.ByStartPointEndPoint、CoreNodeModels.Watch，交由 Dynamo 解析)
+    - 搜尋完全沒有結果或模稜兩可的名稱回傳錯誤清單，於送出前失敗
+    """
+    if not creation_name_cache.enabled:
+        return []
+    metadata = _load_common_nodes_metadata()
+    pending: Dict[str, list] = {}
+    for node in json_data.get("nodes", []):
+        if not isinstance(node, dict) or node.get("creationName"):
+            continue
+        name = node.get("name")
+        if not isinstance(name, str) or not name or name in BUILTIN_NAMES or name in metadata or is_guid(name):
+            continue
+        pending.setdefault(name, []).append(node)
+    if not pending:
+        return []
+
+    version = _session_dynamo_version(session_id)
+    errors = []
+    for name, nodes in pending.items():
+        creation_name, candidates = creation_name_cache.lookup(version, name)
+        if creation_name is None and not candidates and creation_name_cache.is_unmatched(version, name):
+            continue
+        if creation_name is None and not candidates and not creation_name_cache.is_missing(version, name):
+            creation_name_cache.searches += 1
+            data = await ws_manager.send_command_async(session_id, {"action": "list_nodes", "filter": name})
+            if data.get("status") == "error":
+                log(f"[Resolve] list_nodes 無法使用，'{name}' 照原樣送出: {data.get('message')}")
+                continue
+            found = data.get("nodes") or []
+            _learn_creation_names(session_id, found)
+            creation_name, candidates = creation_name_cache.lookup(version, name)
+            if creation_name is None and not candidates:
+                if found:
+                    creation_name_cache.mark_unmatched(version, name)
+                    continue
+                creation_name_cache.mark_missing(version, name)
+        if creation_name is not None:
+            for node in nodes:
+                node["creationName"] = creation_name
+        elif candidates:
+            errors.append({"code": "ambiguous_node_name", "name": name, "nodeIds": [n.get("id") for n in nodes],
+                           "message": f"Node name '{name}' matches {len(candidates)} nodes; use fullName or creationName",
+                           "candidates": candidates})
+        else:
+            errors.append({"code": "unresolved_node_name", "name": name, "nodeIds": [n.get("id") for n in nodes],
+                           "message": f"Node '{name}' was not found in the Dynamo library (version {version or 'unknown'})"})
+    return errors
+
+@tool_registry.tool(
+    description="取得節點建立路徑的學習統計：各節點名稱原生建立 (軌道 B) 與 Code Block 降級 (軌道 A) 的成功/失敗次數、目前學得的策略，以及與 common_nodes.json 不一致的 creationStrategy 建議 (以 apply_routing_suggestions 寫入)。",
+    read_only=True
+)
+def get_routing_stats() -> dict:
+    suggestions = routing_table.suggestions(_load_common_nodes_metadata())
+    return {"status": "ok", **routing_table.get_info(), "table": routing_table.get_table(), "suggestions": suggestions}
+
+@tool_registry.tool(
+    description="將 get_routing_stats 的 creationStrategy 建議就地寫入 common_nodes.json (版本控管中的節點定義檔，只改寫該欄位的值，其餘格式不變)，並重新載入節點 metadata。",
+    destructive=True
+)
+def apply_routing_suggestions() -> dict:
+    global _common_nodes_metadata, _signature_binder, _instruction_validator
+    suggestions = routing_table.suggestions(_load_common_nodes_metadata())
+    result = {"status": "ok", "suggestions": suggestions, "applied": []}
+    if suggestions:
+        strategies = {item["name"]: item["creationStrategy"] for item in suggestions}
+        try:
+            # 就地改寫 creationStrategy 的值，不重新序列化整個檔案 (保留原有格式，版本控制只出現變更的那幾行)
+            with open(COMMON_NODES_PATH, "r", encoding="utf-8", newline="") as f:
+                text, applied = patch_creation_strategies(f.read(), strategies)
+            json.loads(text)
+            tmp_path = COMMON_NODES_PATH + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+            os.replace(tmp_path, COMMON_NODES_PATH)
+        except (OSError, ValueError) as e:
+            return {**result, "status": "error", "message": f"寫入 common_nodes.json 失敗: {e}"}
+        # 下次使用時由新的 metadata 重建 (簽名綁定、預檢與其 FunctionRegistry)
+        _common_nodes_metadata = None
+        _signature_binder = None
+        _instruction_validator = None
+        result["applied"] = sorted(applied)
+    return result
+
+@tool_registry.tool(
+    description="在 Dynamo 中執行節點創建指令。支援 dryRun 模式預覽、clientId 識別客戶端、expectedVersion 避免多客戶端衝突。",
+    properties={
+        "instructions": {"type": "string", "description": "JSON 格式的完整圖形定義。必須包含 'nodes' 和 'connectors'。Python 節點需指定 'pythonCode' 欄位。"},
+        "clear_before_execute": {"type": "boolean", "description": "執行前先清空畫布，避免與既有節點重疊。預設為 false。"},
+        "base_x": {"type": "number", "description": "所有節點的 X 座標偏移。預設 0。"},
+        "base_y": {"type": "number", "description": "所有節點的 Y 座標偏移。預設 0。"},
+        "allow_fallback": {"type": "boolean", "description": "原生節點建立失敗時是否改以 Code Block 重試。預設為 true。"},
+        "dryRun": {"type": "boolean", "description": "若為 true，僅回傳預覽報告（包含節點清單、連線、潛在警告）而不實際執行。預設為 false。"},
+        "clientId": {"type": "string", "description": "客戶端識別碼（如 'antigravity', 'gemini-cli', 'claude'）。用於追蹤誰執行了修改。"},
+        "expectedVersion": {"type": "integer", "description": "預期的工作區版本號。若不匹配則拒絕執行並回傳 version_conflict。透過 get_workspace_version 取得當前版本。"},
+        "sessionId": {"type": "string", "description": "選用。指定要執行的會話 ID。若未指定則使用最新連線。"},
+        "idempotencyKey": {"type": "string", "description": "選用。冪等鍵，重試時帶入相同值會直接回傳上次結果而不重複建立節點。未提供時以請求內容雜湊去重：ttl (預設 60 秒) 內且工作區未被其他寫入變更時，內容完全相同的請求視為重試並回傳上次結果；要刻意重複執行相同指令時請帶入新的 idempotencyKey。"},
+    },
+    required=("instructions",),
+    destructive=True
+)
 async def execute_dynamo_instructions(
     instructions: str, 
     clear_before_execute: bool = False, 
@@ -1028,43 +2296,100 @@ async def execute_dynamo_instructions(
     sessionId: str = None, 
     dryRun: bool = False,
     clientId: str = "anonymous",      # 多客戶端支援：客戶端識別
-    expectedVersion: int = None       # 多客戶端支援：預期版本號
-) -> str:
+    expectedVersion: int = None,      # 多客戶端支援：預期版本號
+    idempotencyKey: str = None        # 重試去重：相同 key 直接回傳快取結果
+) -> dict:
     """
     執行 Dynamo 節點創建指令
     
     多客戶端衝突避免機制：
     - clientId: 識別發送指令的客戶端
     - expectedVersion: 預期的工作區版本號，若不匹配則拒絕執行
+    - idempotencyKey: 重試時帶相同 key；未提供時以正規化指令內容 + 目標 Session 計算雜湊
     """
     # Human-in-the-Loop: Dry Run 模式
     try:
         json_data = json.loads(instructions)
     except json.JSONDecodeError as e:
-        return json.dumps({"status": "error", "message": f"JSON 解析錯誤: {str(e)}"}, ensure_ascii=False)
+        return {"status": "error", "message": f"JSON 解析錯誤: {str(e)}"}
     
     if isinstance(json_data, list):
         json_data = {"nodes": json_data, "connectors": []}
     
     if dryRun:
-        report = _generate_dry_run_report(json_data, base_x, base_y)
-        return json.dumps(report, ensure_ascii=False, indent=2)
+        return _generate_dry_run_report(json_data, base_x, base_y)
     
     with ws_manager._lock: sessions = list(ws_manager.active_sessions.keys())
-    if not sessions: return json.dumps({"status": "error", "message": "未連線"}, ensure_ascii=False)
+    if not sessions: return {"status": "error", "message": "未連線"}
     
     if sessionId and sessionId not in sessions:
-        return json.dumps({"status": "error", "message": f"找不到指定的會話 {sessionId}"}, ensure_ascii=False)
+        return {"status": "error", "message": f"找不到指定的會話 {sessionId}"}
     
     session_id = sessionId if sessionId else sessions[-1]
-    
+
+    # === 冪等性：以原始請求計算 key，重試在綁定、預檢與名稱解析之前直接回傳快取結果，不重複建立節點也不推進版本 ===
+    cache_key, explicit = idempotency_cache.make_key(idempotencyKey, session_id, {
+        "instructions": json_data,
+        "clientId": clientId,
+        "base": [base_x, base_y],
+        "clear": clear_before_execute,
+        "fallback": allow_fallback
+    })
+
+    async def prepare_and_apply() -> dict:
+        # === 多載綁定：原生節點寫回具體的 overload 與 fullName，後續展開、預檢、降級代碼一致 ===
+        binding_errors = _get_signature_binder().bind_instruction(json_data)
+
+        # === 預檢：指令圖錯誤在送出前一次回報，不取得寫入權限也不推進版本 ===
+        if VALIDATION_ENABLED:
+            report = await _validate_instructions(json_data, session_id)
+            if not report["valid"]:
+                return {
+                    "status": "error",
+                    "message": f"指令驗證失敗: {len(report['errors']) + report.get('truncatedErrors', 0)} 個錯誤",
+                    "errors": report["errors"],
+                    "warnings": report["warnings"]
+                }
+        elif binding_errors:
+            return {"status": "error", "message": f"多載綁定失敗: {len(binding_errors)} 個錯誤", "errors": binding_errors}
+
+        # === 外掛節點名稱改寫為 creationName；查無的名稱在送出前失敗 ===
+        resolution_errors = await _resolve_creation_names(json_data, session_id)
+        if resolution_errors:
+            return {
+                "status": "error",
+                "message": f"節點名稱解析失敗: {', '.join(e['name'] for e in resolution_errors)}",
+                "errors": resolution_errors
+            }
+
+        return await _apply_instructions(json_data, session_id, clear_before_execute, base_x, base_y, allow_fallback, clientId, expectedVersion)
+
+    result, replayed = await idempotency_cache.run(
+        cache_key, explicit, prepare_and_apply,
+        current_version=session_state_manager.get_state(session_id).get_version()
+    )
+    if replayed:
+        result = {**result, "idempotentReplay": True}
+    return result
+
+async def _apply_instructions(
+    json_data: dict,
+    session_id: str,
+    clear_before_execute: bool,
+    base_x: float,
+    base_y: float,
+    allow_fallback: bool,
+    clientId: str,
+    expectedVersion: Optional[int]
+) -> dict:
+    """取得寫入權限後送出指令，失敗時降級至軌道 A；回傳結果字典"""
     # === 樂觀鎖：版本控制 ===
     state = session_state_manager.get_state(session_id)
     success, version_result = await state.acquire_write(clientId, expectedVersion)
     
     if not success:
         # 版本衝突，拒絕執行
-        return json.dumps(version_result, ensure_ascii=False)
+        return version_result
     
     new_version = version_result["newVersion"]
     
@@ -1073,14 +2398,23 @@ async def execute_dynamo_instructions(
         if "nodes" in json_data:
             for node in json_data["nodes"]:
                 route_node_creation(node)
+                # 補上節點 ID，確保 undo 能刪除本次新建的節點
+                node.setdefault("id", str(uuid.uuid4()))
                 node["x"] = float(node.get("x", 0)) + base_x
                 node["y"] = float(node.get("y", 0)) + base_y
         
         if clear_before_execute: 
             await ws_manager.send_command_async(session_id, {"action": "clear_graph"})
+            await instruction_journal.record_clear_async(session_id, new_version, clientId)
+            undo_manager.reset(session_id)
         
+        # 已知原生建立會失敗的節點直接以軌道 A 建立
+        prerouted = _preroute_track_a(json_data)
+
         # 首次嘗試執行
         response = await ws_manager.send_command_async(session_id, json_data)
+        if response.get("status") == "ok" or "nodeResults" in response:
+            _learn_routes(json_data.get("nodes", []), response.get("nodeResults"), prerouted)
         
         # [核心優化] 差異化重試與降級機制 (Differentiated Fallback)
         if response.get("status") == "error" and allow_fallback:
@@ -1089,64 +2423,497 @@ async def execute_dynamo_instructions(
             # [修正] 根據使用者要求，禁止自動清空工作區 (User Rule: 不允許自動清空工作區)
             # log("[Fallback] 清除失敗節點...")
             # await ws_manager.send_command_async(session_id, {"action": "clear_graph"})
-            
-            fallback_nodes = []
-            for node in json_data.get("nodes", []):
-                # 僅針對原生幾何節點進行轉換
-                if node.get("name") in _load_common_nodes_metadata():
-                    code = _generate_ds_code(node)
-                    fallback_node = {
-                        "id": node.get("id"),
-                        "name": "Number",
-                        "value": code,
-                        "x": node.get("x"),
-                        "y": node.get("y"),
-                        "preview": node.get("preview", True)
-                    }
-                    fallback_nodes.append(fallback_node)
-                else:
-                    # 非原生節點保留（例如 Python Script 保持不變，或已轉換的 Number 節點）
-                    fallback_nodes.append(node)
-            
-            # 建立降級後的指令集（通常 Code Block 模式不依賴 connectors，因為邏輯已內嵌）
-            # 但如果是手動指定的連線仍需保留
-            fallback_data = {
-                "nodes": fallback_nodes,
-                "connectors": json_data.get("connectors", []) if not any(n.get("name") in _load_common_nodes_metadata() for n in json_data.get("nodes", [])) else []
-            }
-            
-            retry_response = await ws_manager.send_command_async(session_id, fallback_data)
-            if retry_response.get("status") == "ok":
-                return json.dumps({
-                    "status": "ok",
-                    "message": "成功 (已透過軌道 A 降級重試恢復)",
-                    "version": new_version,
-                    "clientId": clientId
-                }, ensure_ascii=False)
-            else:
-                return json.dumps({
-                    "status": "error",
-                    "message": f"失敗 (重試後仍錯誤): {retry_response.get('message')}",
-                    "version": new_version
-                }, ensure_ascii=False)
-        
+
+            if "nodeResults" in response:
+                # 擴充套件回報逐節點結果：只將失敗的節點降級重試，已建立的節點與連線保留
+                result = await _retry_failed_nodes(json_data, response, session_id, new_version, clientId, prerouted)
+                _learn_routes(json_data.get("nodes", []), result["nodeResults"], {}, tracks=(TRACK_CODE_BLOCK,))
+                return result
+            # 舊版擴充套件無逐節點結果：整批轉換後重送
+            return await _retry_full_batch(json_data, response, session_id, new_version, clientId)
+
+        if response.get("status") != "ok" and "nodeResults" in response:
+            # 未允許降級：已建立的節點與連線仍記錄至日誌與復原堆疊，失敗的部分不重試
+            return await _retry_failed_nodes(json_data, response, session_id, new_version, clientId, prerouted, retry=False)
+
         if response.get("status") == "ok":
-            return json.dumps({
+            applied = {**json_data, "connectors": _resolved_connectors(json_data.get("connectors", []), response)}
+            await _record_applied(session_id, applied, new_version, clientId, _merge_undo_info(response))
+            return {
                 "status": "ok",
                 "message": "成功",
                 "version": new_version,
                 "clientId": clientId,
                 "sessionId": session_id
-            }, ensure_ascii=False)
+            }
         else:
-            return json.dumps({
+            return {
                 "status": "error",
                 "message": response.get('message'),
                 "version": new_version
-            }, ensure_ascii=False)
+            }
     except Exception as e: 
-        return json.dumps({"status": "error", "message": str(e), "version": new_version}, ensure_ascii=False)
+        return {"status": "error", "message": str(e), "version": new_version}
+
+async def _retry_full_batch(json_data: dict, response: dict, session_id: str, new_version: int,
+                            clientId: str) -> dict:
+    """
+    軌道 A 整批降級 (舊版擴充套件無逐節點結果)：所有原生節點轉為 Code Block 後整批重送
+    - 接入降級節點的連線改以同名輸入埠 (toPortName) 連接，兩端都保留的連線一併重送
+    - 無法對應的連線 (輸入埠不在代碼中、從降級節點的非 0 輸出埠拉出) 不重送，回報於 failedConnectors
+    """
+    metadata = _load_common_nodes_metadata()
+    connectors = json_data.get("connectors", [])
+    fallback_nodes, converted, invalid = [], {}, []
+    for node in json_data.get("nodes", []):
+        # 僅針對原生幾何節點進行轉換；非原生節點 (Python Script、已轉換的 Number 節點) 保留
+        if node.get("name") not in metadata:
+            fallback_nodes.append(node)
+            continue
+        fallback_node, inputs, error = _convert_to_track_a(node, connectors)
+        if error is not None:
+            invalid.append({"id": node.get("id"), "code": fallback_node["value"], "message": error})
+            continue
+        converted[str(node.get("id"))] = (node, inputs)
+        fallback_nodes.append(fallback_node)
+
+    # 降級代碼先經靜態分析，無效時不再多一次 Dynamo 往返
+    if invalid:
+        return {
+            "status": "error",
+            "message": f"失敗 (軌道 A 降級代碼無效): {response.get('message')}",
+            "errors": invalid,
+            "version": new_version
+        }
+
+    fallback_connectors, connector_errors = [], {}
+    for i, c in enumerate(connectors):
+        source, target = str(c.get("from")), str(c.get("to"))
+        if source not in converted and target not in converted:
+            fallback_connectors.append(c)
+            continue
+        entry = converted.get(target)
+        remapped, error = _remap_track_a_connector(c, entry and entry[0], entry and entry[1], source in converted)
+        if error is not None:
+            connector_errors[i] = error
+            continue
+        fallback_connectors.append(remapped)
+    fallback_data = {"nodes": fallback_nodes, "connectors": fallback_connectors}
+
+    retry_response = await ws_manager.send_command_async(session_id, fallback_data)
+    if retry_response.get("status") != "ok":
+        return {
+            "status": "error",
+            "message": f"失敗 (重試後仍錯誤): {retry_response.get('message')}",
+            "version": new_version
+        }
+
+    applied = {**fallback_data, "connectors": _resolved_connectors(fallback_connectors, retry_response)}
+    await _record_applied(session_id, applied, new_version, clientId, _merge_undo_info(retry_response))
+    result = {
+        "status": "partial" if connector_errors else "ok",
+        "message": "成功 (已透過軌道 A 降級重試恢復)" if not connector_errors
+                   else f"部分失敗: {len(connector_errors)} 條連線無法對應軌道 A 節點 (節點已透過軌道 A 降級重試恢復)",
+        "version": new_version,
+        "clientId": clientId
+    }
+    if connector_errors:
+        result["failedConnectors"] = [{"index": i, **connectors[i], "error": e} for i, e in sorted(connector_errors.items())]
+    return result
+
+def _fallback_port_name(node: dict, connector: dict) -> Optional[str]:
+    """連線接入原生節點的埠名稱 (toPortName 優先，否則依綁定簽名的埠索引)"""
+    if connector.get("toPortName"):
+        return str(connector["toPortName"])
+    signature = _bound_signature(node)
+    inputs = signature.inputs if signature is not None else ()
+    index = connector.get("toPort", 0)
+    return inputs[index] if isinstance(index, int) and 0 <= index < len(inputs) else None
+
+def _convert_to_track_a(node: dict, connectors: list) -> tuple:
+    """
+    原生節點轉為軌道 A Code Block，接入的埠保留為變數
+    回傳 (Code Block 節點, 輸入埠名稱清單, 錯誤訊息)；代碼先經靜態分析，無效時帶錯誤訊息
+    """
+    node_id = str(node.get("id"))
+    ports = {_fallback_port_name(node, c) for c in connectors if str(c.get("to")) == node_id} - {None}
+    code = _generate_ds_code(node, ports)
+    fallback_node = {
+        "id": node.get("id"),
+        "name": "Number",
+        "value": code,
+        "x": node.get("x"),
+        "y": node.get("y"),
+        "preview": node.get("preview", True)
+    }
+    analysis = designscript_analyzer.analyze(code)
+    if analysis.error is not None:
+        return fallback_node, [], f"DesignScript error: {analysis.error['message']}"
+    return fallback_node, analysis.inputs, None
+
+def _remap_track_a_connector(connector: dict, target: Optional[dict], target_inputs: Optional[list],
+                             source_converted: bool) -> tuple:
+    """
+    端點含軌道 A 節點的連線：接入端改以同名輸入埠連接，輸出端只允許埠 0
+    target / target_inputs 為接入端的原節點規範與 Code Block 輸入埠 (接入端未轉換時為 None)；回傳 (連線, 錯誤訊息)
+    """
+    remapped = dict(connector)
+    if target_inputs is not None:
+        port = _fallback_port_name(target, connector)
+        if port not in target_inputs:
+            return None, f"Port '{port}' has no matching input on the Track A code block"
+        remapped["toPort"] = target_inputs.index(port)
+        remapped["toPortName"] = port
+    if source_converted and connector.get("fromPort", 0) != 0:
+        return None, "Track A code block has a single output"
+    return remapped, None
+
+def _preroute_track_a(json_data: dict) -> Dict[str, str]:
+    """
+    策略為 CODE_BLOCK 的原生節點 (靜態 metadata 或路由學習) 首次即以軌道 A 建立，省去一次失敗往返
+    從非 0 輸出埠拉出連線、或代碼/連線無法對應的節點維持原生建立；回傳 {id: 原節點名稱}
+    """
+    nodes = json_data.get("nodes", [])
+    metadata = _load_common_nodes_metadata()
+    candidates = [n for n in nodes if n.get("_strategy") == STRATEGY_CODE_BLOCK and n.get("name") in metadata]
+    if not candidates:
+        return {}
+    connectors = json_data.get("connectors", [])
+    multi_output = {str(c.get("from")) for c in connectors if c.get("fromPort", 0) != 0}
+    converted = {}
+    for node in candidates:
+        node_id = str(node.get("id"))
+        if node_id in multi_output:
+            continue
+        fallback_node, inputs, error = _convert_to_track_a(node, connectors)
+        if error is not None:
+            continue
+        if any(_fallback_port_name(node, c) not in inputs for c in connectors if str(c.get("to")) == node_id):
+            continue
+        converted[node_id] = (node, fallback_node, inputs)
+    if not converted:
+        return {}
+
+    remapped_connectors = []
+    for c in connectors:
+        source, target = str(c.get("from")), str(c.get("to"))
+        if source in converted or target in converted:
+            entry = converted.get(target)
+            c, _ = _remap_track_a_connector(c, entry and entry[0], entry and entry[2], source in converted)
+        remapped_connectors.append(c)
+    json_data["nodes"] = [converted[str(n.get("id"))][1] if str(n.get("id")) in converted else n for n in nodes]
+    json_data["connectors"] = remapped_connectors
+    for node, _, _ in converted.values():
+        routing_table.mark_routed(node.get("name"))
+    log(f"[Routing] {len(converted)} 個節點依學習結果直接以軌道 A 建立")
+    return {node_id: entry[0].get("name") for node_id, entry in converted.items()}
+
+def _learn_routes(nodes: list, node_results: Optional[dict], prerouted: Dict[str, str], tracks: Iterable[str] = (TRACK_NATIVE, TRACK_CODE_BLOCK)):
+    """
+    以建立結果更新路由統計 (僅 common_nodes.json 內的節點)
+    node_results 為 None 表示整批成功；預先路由的節點記為軌道 A，其餘依結果的 track (預設 B)
+    """
+    if not routing_table.enabled:
+        return
+    metadata = _load_common_nodes_metadata()
+    for node in nodes:
+        node_id = str(node.get("id"))
+        name = prerouted.get(node_id, node.get("name"))
+        if name not in metadata:
+            continue
+        if node_results is None:
+            result = {"status": "created"}
+        elif node_id in node_results:
+            result = node_results[node_id]
+        else:
+            continue
+        track = TRACK_CODE_BLOCK if node_id in prerouted else result.get("track", TRACK_NATIVE)
+        if track in tracks:
+            routing_table.record(name, track, result.get("status") != "failed", result.get("error"))
+    try:
+        routing_table.save()
+    except OSError as e:
+        log(f"[WARN] Failed to save routing stats: {e}")
+
+async def _retry_failed_nodes(json_data: dict, response: dict, session_id: str, new_version: int,
+                              clientId: str, prerouted: Dict[str, str], retry: bool = True) -> dict:
+    """
+    軌道 A 逐節點降級：只將建立失敗的原生節點轉為 Code Block 重試
+    - 已建立的節點不重送；接入降級節點的連線改以同名輸入埠 (toPortName) 重新連接
+    - 已預先路由至軌道 A 的節點失敗時不再重試；retry=False (未允許降級) 時只記錄已建立的部分
+    - 回傳 nodeResults：{id: {status: created | updated | failed, track: B | A, error}}
+    - status：全部成功為 ok，部分建立為 partial (可快取，重試不重複建立)，沒有任何節點或連線建立為 error
+    """
+    metadata = _load_common_nodes_metadata()
+    nodes = json_data.get("nodes", [])
+    connectors = json_data.get("connectors", [])
+    node_results = {key: {**result, "track": TRACK_CODE_BLOCK if key in prerouted else TRACK_NATIVE}
+                    for key, result in response.get("nodeResults", {}).items()}
+    connector_errors = {r["index"]: r.get("error") for r in response.get("connectorResults", []) if r.get("status") == "failed"}
+    failed_ids = {key for key, result in node_results.items() if result.get("status") == "failed"}
+    nodes_by_id = {str(n.get("id")): n for n in nodes}
+
+    # 失敗節點轉換為 Code Block；接入的埠保留為變數
+    converted = {}
+    for node in nodes:
+        node_id = str(node.get("id"))
+        if node_id not in failed_ids:
+            continue
+        if node_id in prerouted or not retry:
+            continue
+        if node.get("name") not in metadata:
+            node_results[node_id]["error"] = f"{node_results[node_id].get('error')} (無軌道 A 對應，未重試)"
+            continue
+        fallback_node, inputs, error = _convert_to_track_a(node, connectors)
+        if error is not None:
+            # 降級代碼先經靜態分析，無效時不送往 Dynamo
+            node_results[node_id] = {"status": "failed", "track": TRACK_CODE_BLOCK, "error": error, "code": fallback_node["value"]}
+            continue
+        converted[node_id] = (fallback_node, inputs)
+
+    # 只重送失敗且端點含降級節點的連線
+    retry_connectors, retry_index = [], []
+    for i, c in enumerate(connectors):
+        if i not in connector_errors:
+            continue
+        source, target = str(c.get("from")), str(c.get("to"))
+        if source not in converted and target not in converted:
+            continue
+        if (source in failed_ids and source not in converted) or (target in failed_ids and target not in converted):
+            continue
+        remapped, error = _remap_track_a_connector(c, nodes_by_id.get(target), converted[target][1] if target in converted else None,
+                                                   source in converted)
+        if error is not None:
+            connector_errors[i] = error
+            continue
+        retry_connectors.append(remapped)
+        retry_index.append(i)
+
+    applied_connectors = [c for i, c in enumerate(_resolved_connectors(connectors, response)) if i not in connector_errors]
+    applied_nodes = [n for n in nodes if node_results.get(str(n.get("id")), {}).get("status") in ("created", "updated")]
+
+    responses = [response]
+    if converted:
+        retry_data = {"nodes": [entry[0] for entry in converted.values()], "connectors": retry_connectors}
+        log(f"[Fallback] 軌道 A 重試 {len(converted)} 個失敗節點、{len(retry_connectors)} 條連線 (保留 {len(applied_nodes)} 個已建立節點)")
+        retry_response = await ws_manager.send_command_async(session_id, retry_data)
+        responses.append(retry_response)
+        retry_connectors = _resolved_connectors(retry_connectors, retry_response)
+        retry_nodes = retry_response.get("nodeResults") or {}
+        retry_connector_results = {r["index"]: r for r in retry_response.get("connectorResults", [])}
+        retry_ok = retry_response.get("status") == "ok"
+        for node_id, (fallback_node, _) in converted.items():
+            result = retry_nodes.get(node_id, {"status": "created"} if retry_ok else {"status": "failed", "error": retry_response.get("message")})
+            node_results[node_id] = {**result, "track": TRACK_CODE_BLOCK}
+            if result.get("status") in ("created", "updated"):
+                applied_nodes.append(fallback_node)
+        for j, i in enumerate(retry_index):
+            result = retry_connector_results.get(j, {"status": "ok"} if retry_ok else {"status": "failed", "error": retry_response.get("message")})
+            if result.get("status") == "ok":
+                connector_errors.pop(i, None)
+                applied_connectors.append(retry_connectors[j])
+            else:
+                connector_errors[i] = result.get("error")
+
+    if applied_nodes or applied_connectors:
+        await _record_applied(session_id, {"nodes": applied_nodes, "connectors": applied_connectors}, new_version, clientId,
+                              _merge_undo_info(*responses))
+
+    failed_nodes = [key for key, result in node_results.items() if result.get("status") == "failed"]
+    recovered = sum(1 for key, result in node_results.items()
+                    if result["track"] == TRACK_CODE_BLOCK and key not in prerouted and result.get("status") != "failed")
+    if not failed_nodes and not connector_errors:
+        status = "ok"
+    else:
+        status = "partial" if applied_nodes or applied_connectors else "error"
+    result = {
+        "status": status,
+        "message": (f"成功 ({recovered} 個節點已透過軌道 A 降級重試恢復)" if not failed_nodes and not connector_errors
+                    else f"部分失敗: {len(failed_nodes)} 個節點、{len(connector_errors)} 條連線未建立 (軌道 A 恢復 {recovered} 個節點)"),
+        "nodeResults": node_results,
+        "version": new_version,
+        "clientId": clientId,
+        "sessionId": session_id
+    }
+    if connector_errors:
+        result["failedConnectors"] = [{"index": i, **connectors[i], "error": e} for i, e in sorted(connector_errors.items())]
+    return result
+
+async def _step_history(direction: str, sessionId: str = None, clientId: str = "anonymous", force: bool = False) -> dict:
+    """undo/redo 共用流程：取出記錄、以單一指令送出差量、更新版本與日誌"""
+    with ws_manager._lock:
+        sessions = list(ws_manager.active_sessions.keys())
+    if not sessions:
+        return {"error": "No active Dynamo connections"}
+    if sessionId and sessionId not in sessions:
+        return {"error": f"Session {sessionId} not found"}
+    session_id = sessionId if sessionId else sessions[-1]
+
+    state = session_state_manager.get_state(session_id)
+    synced = undo_manager.synced_version(session_id)
+    if not force and synced is not None and synced != state.get_version():
+        return {
+            "status": "version_conflict",
+            "message": f"工作區版本 {state.get_version()} 已被其他操作推進 (堆疊版本 {synced})。請使用 force=true 強制執行。",
+            "currentVersion": state.get_version()
+        }
+
+    is_undo = direction == "undo"
+    entry = undo_manager.pop_undo(session_id) if is_undo else undo_manager.pop_redo(session_id)
+    if entry is None:
+        return {"status": "noop", "message": f"沒有可{'復原' if is_undo else '重做'}的操作", **undo_manager.get_info(session_id)}
+
+    success, version_result = await state.acquire_write(clientId)
+    if not success:
+        undo_manager.restore(session_id, entry, to_redo=not is_undo)
+        return version_result
+    new_version = version_result["newVersion"]
+
+    delta = entry["inverse"] if is_undo else entry["forward"]
+    response = await ws_manager.send_command_async(session_id, delta)
+    if response.get("status") != "ok":
+        undo_manager.restore(session_id, entry, to_redo=not is_undo)
+        return {"status": "error", "message": response.get("message"), "errors": response.get("errors", []), "version": new_version}
+
+    await instruction_journal.append_async(session_id, delta, new_version, clientId)
+    if is_undo:
+        undo_manager.push_redo(session_id, entry, new_version)
+    else:
+        undo_manager.push_undo(session_id, entry, new_version)
+
+    return {
+        "status": "ok",
+        "action": direction,
+        "sessionId": session_id,
+        "version": new_version,
+        "targetVersion": entry["version"],
+        "nodesDeleted": len(delta.get("deleteNodes", [])),
+        "nodesUpdated": len(delta.get("nodes", [])),
+        "connectorsDeleted": len(delta.get("deleteConnectors", [])),
+        "connectorsCreated": len(delta.get("connectors", [])),
+        **undo_manager.get_info(session_id)
+    }
+
+@tool_registry.tool(
+    description="復原最近一次 execute_dynamo_instructions（刪除新建節點/連線、還原更新前的位置與值、補回被取代的連線），僅送出反向差量，不需清空重建。",
+    properties={
+        "sessionId": {"type": "string", "description": "選用。指定 Session ID"},
+        "clientId": {"type": "string", "description": "客戶端識別碼。"},
+        "force": {"type": "boolean", "description": "工作區版本已被其他寫入推進時仍強制執行。預設 false。"},
+    },
+    destructive=True
+)
+async def undo(sessionId: str = None, clientId: str = "anonymous", force: bool = False) -> dict:
+    """復原最近一次 execute_dynamo_instructions，只送出反向差量"""
+    return await _step_history("undo", sessionId, clientId, force)
+
+@tool_registry.tool(
+    description="重做最近一次被 undo 復原的操作。",
+    properties={
+        "sessionId": {"type": "string", "description": "選用。指定 Session ID"},
+        "clientId": {"type": "string", "description": "客戶端識別碼。"},
+        "force": {"type": "boolean", "description": "工作區版本已被其他寫入推進時仍強制執行。預設 false。"},
+    },
+    destructive=True
+)
+async def redo(sessionId: str = None, clientId: str = "anonymous", force: bool = False) -> dict:
+    """重做最近一次被復原的操作"""
+    return await _step_history("redo", sessionId, clientId, force)
+
+@tool_registry.tool(
+    description="從指令日誌重建工作區（Dynamo 崩潰或重開後使用）。讀取來源 Session 的快照與日誌，以大批次指令一次重建所有節點與連線。",
+    properties={
+        "sessionId": {"type": "string", "description": "選用。要重建到的目標會話 ID。若未指定則使用最新連線。"},
+        "sourceSessionId": {"type": "string", "description": "選用。日誌來源的會話 ID（通常是崩潰前的舊 Session）。若未指定則使用最近更新的日誌。"},
+        "batchSize": {"type": "integer", "description": "每批送出的節點/連線數量，預設 500。"},
+        "clientId": {"type": "string", "description": "客戶端識別碼。"},
+        "dryRun": {"type": "boolean", "description": "若為 true，僅回傳將重建的節點與連線數量。"},
+    },
+    destructive=True
+)
+async def replay_journal(
+    sessionId: str = None,
+    sourceSessionId: str = None,
+    batchSize: int = 500,
+    clientId: str = "anonymous",
+    dryRun: bool = False
+) -> dict:
+    """
+    從指令日誌重建工作區 (Dynamo 崩潰後使用)
+    先分批送出所有節點，再分批送出所有連線，避免連線引用尚未建立的節點
+    """
+    journals = instruction_journal.list_journals()
+    source_id = sourceSessionId or (journals[0]["sessionId"] if journals else None)
+    if not source_id:
+        return {"error": "No journal found"}
+
+    graph = await instruction_journal.load_async(source_id)
+    nodes, connectors = graph["nodes"], graph["connectors"]
+    if not nodes:
+        return {"error": f"Journal for session {source_id} is empty"}
+
+    batch_size = max(1, int(batchSize))
+    node_batches = [nodes[i:i + batch_size] for i in range(0, len(nodes), batch_size)]
+    conn_batches = [connectors[i:i + batch_size] for i in range(0, len(connectors), batch_size)]
+
+    if dryRun:
+        return {
+            "status": "dry_run",
+            "sourceSessionId": source_id,
+            "sourceVersion": graph["version"],
+            "nodesToCreate": len(nodes),
+            "connectorsToCreate": len(connectors),
+            "batches": len(node_batches) + len(conn_batches)
+        }
+
+    with ws_manager._lock:
+        sessions = list(ws_manager.active_sessions.keys())
+    if not sessions:
+        return {"error": "No active Dynamo connections"}
+    if sessionId and sessionId not in sessions:
+        return {"error": f"Session {sessionId} not found"}
+    target_id = sessionId if sessionId else sessions[-1]
+
+    state = session_state_manager.get_state(target_id)
+    success, version_result = await state.acquire_write(clientId)
+    if not success:
+        return version_result
+    new_version = version_result["newVersion"]
 
+    errors = []
+    for batch in node_batches:
+        res = await ws_manager.send_command_async(target_id, {"nodes": batch, "connectors": []})
+        if res.get("status") != "ok":
+            errors.extend(res.get("errors") or [res.get("message")])
+    for batch in conn_batches:
+        res = await ws_manager.send_command_async(target_id, {"nodes": [], "connectors": batch})
+        if res.get("status") != "ok":
+            errors.extend(res.get("errors") or [res.get("message")])
+
+    if target_id != source_id:
+        await instruction_journal.append_async(target_id, {"nodes": nodes, "connectors": connectors}, new_version, clientId)
+
+    log(f"[Replay] {source_id} -> {target_id}: {len(nodes)} nodes, {len(connectors)} connectors, {len(errors)} errors")
+    return {
+        "status": "ok" if not errors else "partial",
+        "sourceSessionId": source_id,
+        "sessionId": target_id,
+        "version": new_version,
+        "nodesReplayed": len(nodes),
+        "connectorsReplayed": len(connectors),
+        "batches": len(node_batches) + len(conn_batches),
+        "errors": errors
+    }
+
+@tool_registry.tool(
+    name="search_nodes",
+    description="在 Dynamo 庫中搜尋節點。這會返回節點的 fullName，可用於 execute_dynamo_instructions。",
+    properties={
+        "query": {"type": "string", "description": "搜尋關鍵字（例如 'Room', 'Solid', 'Point'）"},
+    },
+    required=("query",),
+    read_only=True
+)
 async def search_nodes_async(query: str) -> str:
     with ws_manager._lock: sessions = list(ws_manager.active_sessions.keys())
     if not sessions: return "[FAIL] 失敗: 未連線"
@@ -1154,6 +2921,7 @@ async def search_nodes_async(query: str) -> str:
     try:
         data = await ws_manager.send_command_async(session_id, {"action": "list_nodes", "filter": query})
         if data.get("status") == "error": return f"[FAIL] 搜尋出錯: {data.get('message')}"
+        _learn_creation_names(session_id, data.get("nodes", []))
         
         # If the backend provided a formatted display string, use it
         if data.get("display"):
@@ -1174,7 +2942,12 @@ async def search_nodes_async(query: str) -> str:
     except Exception as e:
         return f"Error: {e}"
 
-async def analyze_workspace() -> str:
+@tool_registry.tool(
+    description="取得 Dynamo 工作區中所有節點的當前狀態。",
+    read_only=True
+)
+async def analyze_workspace():
+    """回傳工作區狀態 dict；失敗時回傳 [FAIL] 開頭的文字訊息"""
     # 每次分析前清理過期會話
     await ws_manager.cleanup_stale_sessions()
     
@@ -1189,16 +2962,29 @@ async def analyze_workspace() -> str:
     
     # [核心優化] 幽靈連線偵測與詳細狀態
     if session_count > 1:
-        data = json.loads(res)
+        data = dict(res)
         data["warning"] = f"[WARNING] 警告: 偵測到 {session_count} 個活動中的會話。指令目前預設發送至最後一個連線 (Session: {sessions[-1]})。若不正確，請使用 list_sessions 查看並指定 sessionId。"
         data["all_sessions"] = [
             {"id": sid, "fileName": info["fileName"], "connected": time.strftime('%H:%M:%S', time.localtime(info['connectedAt']))}
             for sid, info in session_info.items()
         ]
-        return json.dumps(data, ensure_ascii=False)
+        return data
         
     return res
 
+@tool_registry.tool(
+    description="取得工作區圖表完整狀態 JSON。",
+    read_only=True
+)
+async def get_graph_status():
+    """回傳工作區圖表完整狀態；未連線時回傳錯誤文字"""
+    _, res = await _check_dynamo_connection()
+    return res
+
+@tool_registry.tool(
+    description="列出所有當前活動中的 Dynamo WebSocket 會話及其詳細資訊。",
+    read_only=True
+)
 async def list_sessions() -> str:
     """提供可讀性高的會話列表"""
     with ws_manager._lock:
@@ -1211,6 +2997,8 @@ async def list_sessions() -> str:
         status = "[ACTIVE]" if (time.time() - info["lastSeen"]) < 10 else "[IDLE]"
         lines.append(f"{i+1}. **{info['fileName']}**")
         lines.append(f"   - SessionID: `{sid}`")
+        if info.get("dynamoVersion"):
+            lines.append(f"   - Dynamo 版本: {info['dynamoVersion']}")
         lines.append(f"   - 狀態: {status} (最後活動: {int(time.time() - info['lastSeen'])} 秒前)")
         lines.append(f"   - 連線時間: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info['connectedAt']))}")
         lines.append(f"   - 累積指令數: {info['stats']['cmds']} | 錯誤數: {info['stats']['errors']}")
@@ -1218,6 +3006,10 @@ async def list_sessions() -> str:
         
     return "\n".join(lines)
 
+@tool_registry.tool(
+    description="取得 Bridge Server 的運行數據與效能統計。",
+    read_only=True
+)
 def get_server_stats() -> dict:
     """提供效能監控數據 (Performance Dashboard)"""
     with ws_manager._lock:
@@ -1230,21 +3022,57 @@ def get_server_stats() -> dict:
         "uptime_seconds": uptime,
         "active_sessions": total_sessions,
         "total_commands_processed": total_cmds,
-        "bridge_port": 65296,
+        "idempotency_cache": idempotency_cache.get_info(),
+        "compression": get_compression_info(),
+        "runtime": get_runtime_info(),
+        "tools": tool_registry.get_metrics(),
+        "memoryBank": memory_bank.get_info(),
+        "routing": routing_table.get_info(),
+        "creationNames": creation_name_cache.get_info(),
+        "validation": {"enabled": VALIDATION_ENABLED, "signatureBinding": _get_signature_binder().get_info(),
+                       "pythonCodeCache": python_code_checker.get_info(),
+                       "designScriptCache": designscript_analyzer.get_info()},
+        "http": {"enabled": HTTP_CONFIG.get("enabled", True), "port": HTTP_CONFIG.get("port", 65297),
+                 "path": HTTP_PATH, **http_stats.get_info()},
+        "framing": {
+            "supported": list(SUPPORTED_ENCODINGS),
+            "preferred": FRAMING_PREFERRED,
+            "sessions": dict(ws_manager.encodings),
+            "codec": {listener: stats.get_info() for listener, stats in codec_stats.items()}
+        },
+        "bridge_port": 65296 if BRIDGE_TCP_ENABLED else None,
+        "bridge_unix_socket": BRIDGE_UNIX_SOCKET if UNIX_SOCKETS_SUPPORTED else None,
         "dynamo_port": ws_manager.port
     }
 
+@tool_registry.tool(
+    description="清除工作區內容。",
+    destructive=True
+)
 async def clear_workspace() -> str:
     with ws_manager._lock: sessions = list(ws_manager.active_sessions.keys())
     if not sessions: return "[FAIL] 失敗"
     res = await ws_manager.send_command_async(sessions[-1], {"action": "clear_graph"})
+    if res.get("status") == "ok":
+        # 清空也是一次寫入：推進版本，先前以內容雜湊快取的執行結果隨之失效
+        _, version_result = await session_state_manager.get_state(sessions[-1]).acquire_write("anonymous")
+        await instruction_journal.record_clear_async(sessions[-1], version_result["newVersion"], "anonymous")
+        undo_manager.reset(sessions[-1])
     return "[OK] 已清空" if res.get("status") == "ok" else f"[FAIL] 失敗"
 
+@tool_registry.tool(
+    description="取得規範內容。",
+    read_only=True
+)
 def get_mcp_guidelines() -> str:
     g, q = _load_guidelines()
     return f"# GUIDELINES\\n\\n{g}\\n\\n# QUICK REF\\n\\n{q}"
 
-def get_script_library() -> str:
+@tool_registry.tool(
+    description="取得腳本庫清單。",
+    read_only=True
+)
+def get_script_library() -> list:
     scripts = []
     for f in glob.glob(os.path.join(SCRIPT_DIR, "*.json")):
         name = os.path.basename(f).replace(".json", "")
@@ -1254,8 +3082,13 @@ def get_script_library() -> str:
         except: 
             desc = "No description"
         scripts.append({"name": name, "description": desc})
-    return json.dumps(scripts, ensure_ascii=False, indent=2)
+    return scripts
 
+@tool_registry.tool(
+    name="run_autotest",
+    description="執行專案自動化測試 (test_roadmap_features.py)。驗證 Dynamo 節點放置、Python 注入、外掛支援與幾何運算功能。",
+    read_only=True
+)
 async def run_autotest_async() -> dict:
     """執行自動化測試腳本"""
     import subprocess
@@ -1300,27 +3133,40 @@ async def run_autotest_async() -> dict:
     except Exception as e:
         return {"error": f"Failed to run autotest: {str(e)}"}
 
-def get_memory_bank_summary(section: str = "all") -> str:
+@tool_registry.tool(
+    description="取得 Memory Bank 快取摘要（系統模式、已知坑、近期決策、教訓庫）。**建議每次新對話開始時先呼叫**，避免重複踩坑。",
+    properties={
+        "section": {
+            "type": "string",
+            "enum": ["all", "activeContext", "lessons", "systemPatterns", "progress"],
+            "description": "選用。指定要取得的區段：all=完整摘要（預設）, activeContext=當前狀態, lessons=教訓庫, systemPatterns=系統模式, progress=進度追蹤",
+        },
+    },
+    read_only=True
+)
+def get_memory_bank_summary(section: str = "all"):
     """
     取得 Memory Bank 快取摘要
     Args:
         section: 指定區段 (all, activeContext, lessons, systemPatterns, progress)
     Returns:
-        格式化的摘要內容
+        格式化的摘要內容 (錯誤時回傳 dict)
     """
-    if MEMORY_BANK_SUMMARY is None:
-        return json.dumps({"error": "Memory Bank 尚未載入。請重啟 Server 或呼叫 reload_memory_bank。"}, ensure_ascii=False)
+    # 取一次快照，格式化期間即使監看器替換摘要也不受影響
+    summary, load_time = memory_bank.snapshot()
+    if summary is None:
+        return {"error": "Memory Bank 尚未載入。請重啟 Server 或呼叫 reload_memory_bank。"}
     
-    if MEMORY_BANK_SUMMARY.get("status") == "error":
-        return json.dumps(MEMORY_BANK_SUMMARY, ensure_ascii=False)
+    if summary.get("status") == "error":
+        return dict(summary)
     
     try:
         if section == "activeContext":
-            content = MEMORY_BANK_SUMMARY.get("activeContext", "(無內容)")
+            content = summary.get("activeContext", "(無內容)")
             return f"# 當前工作焦點\n\n{content}"
         
         elif section == "lessons":
-            lessons = MEMORY_BANK_SUMMARY.get("lessons", [])
+            lessons = summary.get("lessons", [])
             if not lessons:
                 return "# 教訓庫\n\n(無已記錄教訓)"
             
@@ -1331,29 +3177,29 @@ def get_memory_bank_summary(section: str = "all") -> str:
             return "\n".join(lines)
         
         elif section == "systemPatterns":
-            content = MEMORY_BANK_SUMMARY.get("systemPatterns", "(無內容)")
+            content = summary.get("systemPatterns", "(無內容)")
             return f"# 系統架構與設計模式\n\n{content[:1500]}...\n\n(完整內容請參考 memory-bank/systemPatterns.md)"
         
         elif section == "progress":
-            content = MEMORY_BANK_SUMMARY.get("progress", "(無內容)")
+            content = summary.get("progress", "(無內容)")
             return f"# 專案進度追蹤\n\n{content[:1000]}...\n\n(完整內容請參考 memory-bank/progress.md)"
         
         else:  # section == "all"
-            lessons = MEMORY_BANK_SUMMARY.get("lessons", [])
-            active = MEMORY_BANK_SUMMARY.get("activeContext", "")
+            lessons = summary.get("lessons", [])
+            active = summary.get("activeContext", "")
             
             summary_text = f"""# Memory Bank 摘要
-> 載入時間：{MEMORY_BANK_LOAD_TIME}
+> 載入時間：{load_time}
 > 教訓數量：{len(lessons)}
 
 ## 📍 當前工作焦點
 {active[:800]}...
 
 ## 🧠 系統模式 (SSOT)
-{MEMORY_BANK_SUMMARY.get('systemPatterns', '')[:600]}...
+{summary.get('systemPatterns', '')[:600]}...
 
 ## 📊 專案進度
-{MEMORY_BANK_SUMMARY.get('progress', '')[:500]}...
+{summary.get('progress', '')[:500]}...
 
 ## 📚 核心教訓（前 5 條）
 """
@@ -1369,26 +3215,48 @@ def get_memory_bank_summary(section: str = "all") -> str:
             return summary_text
     
     except Exception as e:
-        return json.dumps({"error": f"Failed to format summary: {e}"}, ensure_ascii=False)
+        return {"error": f"Failed to format summary: {e}"}
 
-def reload_memory_bank() -> str:
+@tool_registry.tool(
+    description="重新載入 Memory Bank 並回報變更的檔案。伺服器會自動偵測 memory-bank/ 的檔案變更，通常不需手動呼叫；force=true 時重讀所有檔案。",
+    properties={
+        "force": {"type": "boolean", "description": "選用。若為 true，忽略修改時間重讀所有檔案。預設為 false。"},
+    },
+    read_only=True
+)
+async def reload_memory_bank(force: bool = False) -> dict:
     """
-    手動重新載入 Memory Bank
+    重新載入 Memory Bank (只重讀變更的檔案)
     Returns:
-        載入狀態
+        載入狀態與變更的檔案清單
     """
-    result = load_memory_bank()
+    result = await load_memory_bank(force)
     
     if result.get("status") == "ok":
-        return json.dumps({
+        changed = result["changed"] or result["added"] or result["removed"]
+        return {
             "status": "ok",
-            "message": "✅ Memory Bank 已重新載入",
+            "message": "✅ Memory Bank 已重新載入" if changed else "Memory Bank 無變更",
             "loadTime": result["loadTime"],
-            "lessonsCount": result["lessonsCount"]
-        }, ensure_ascii=False, indent=2)
+            "lessonsCount": result["lessonsCount"],
+            "changed": result["changed"],
+            "added": result["added"],
+            "removed": result["removed"]
+        }
     else:
-        return json.dumps(result, ensure_ascii=False, indent=2)
+        return result
 
+@tool_registry.tool(
+    description="將節點群組化 (Group Nodes)。能夠為指定的節點創建一個帶標題和描述的群組。",
+    properties={
+        "nodeIds": {"type": "array", "items": {"type": "string"}, "description": "要分組的節點 ID 清單"},
+        "title": {"type": "string", "description": "群組標題", "default": "New Group"},
+        "description": {"type": "string", "description": "群組描述", "default": ""},
+        "color": {"type": "string", "description": "群組顏色 (Hex)", "default": "#FFC1D5E0"},
+    },
+    required=("nodeIds",),
+    destructive=True
+)
 async def create_group(nodeIds: List[str], title: str = "New Group", description: str = "", color: str = "#FFC1D5E0") -> dict:
     """
     建立節點群組
@@ -1426,6 +3294,135 @@ _OUTPUT_NAMES = {"Watch", "Watch 3D", "Python Script"}
 _OUTPUT_FULL = ("CoreNodeModels.Watch",)
 
 
+# 拓撲分組模式的色彩循環
+_GROUP_PALETTE = (
+    "#FFE91E8A", "#FF4169E1", "#FF228B22", "#FFFF8C00",
+    "#FF8A2BE2", "#FF20B2AA", "#FFDC143C", "#FF808000",
+)
+_TOPOLOGY_MODES = ("component", "depth", "community")
+
+
+async def _submit_groups(session_id: str, group_defs: list) -> list:
+    """
+    以單一 create_groups 指令送出所有群組 (一次往返)
+    舊版 Dynamo 端不認得 create_groups (回應不含 created) 時，退回逐一 create_group
+    """
+    details = [{"title": g["title"], "node_count": len(g["nodeIds"])} for g in group_defs]
+    pending = [i for i, g in enumerate(group_defs) if g["nodeIds"]]
+    for i, d in enumerate(details):
+        if i not in pending:
+            d["result"] = {"status": "skipped", "reason": "no nodes"}
+    if not pending:
+        return details
+
+    batch = [group_defs[i] for i in pending]
+    try:
+        result = await ws_manager.send_command_async(session_id, {"action": "create_groups", "groups": batch})
+    except Exception as e:
+        result = {"status": "error", "message": str(e)}
+
+    if "created" in result:
+        for i, r in zip(pending, result.get("groups", [])):
+            count = r.get("nodeCount", 0)
+            details[i]["result"] = {"status": "ok", "nodeCount": count} if count else {"status": "skipped", "reason": "no valid nodes"}
+    elif result.get("status") == "error":
+        for i in pending:
+            details[i]["result"] = result
+    else:
+        log("[auto_group] create_groups not supported by Dynamo side, falling back to per-group commands")
+        for i in pending:
+            try:
+                details[i]["result"] = await ws_manager.send_command_async(session_id, {"action": "create_group", **group_defs[i]})
+            except Exception as e:
+                details[i]["result"] = {"error": str(e)}
+    return details
+
+
+def _topology_groups(graph: CompactGraph, mode: str, band_size: int, min_group_size: int) -> tuple:
+    """依連線圖拓撲分群，回傳 (群組定義清單, 未分組節點數)"""
+    names = [graph.get(i, "name") for i in range(len(graph))]
+    csr = CSRGraph(graph.ids, names, graph.edges())
+
+    if mode == "component":
+        labels = union_find_components(csr)
+    elif mode == "depth":
+        band_size = max(1, int(band_size))
+        labels = [d // band_size for d in dependency_depths(csr)]
+    else:
+        labels = label_propagation(csr)
+
+    members: Dict[int, list] = {}
+    for i, lbl in enumerate(labels):
+        members.setdefault(lbl, []).append(i)
+
+    if mode == "depth":
+        ordered = sorted(members.items())
+    else:
+        ordered = sorted(members.items(), key=lambda kv: (-len(kv[1]), kv[0]))
+
+    group_defs, ungrouped = [], 0
+    for lbl, idx in ordered:
+        if len(idx) < min_group_size:
+            ungrouped += len(idx)
+            continue
+        k = len(group_defs)
+        common = {}
+        for i in idx:
+            common[names[i]] = common.get(names[i], 0) + 1
+        top_names = "、".join(n for n, _ in sorted(common.items(), key=lambda kv: -kv[1])[:3])
+        if mode == "component":
+            title, desc = f"子圖 {k + 1}", f"{len(idx)} 個節點的獨立連通子圖；主要節點：{top_names}"
+        elif mode == "depth":
+            lo, hi = lbl * band_size, lbl * band_size + band_size - 1
+            depth_text = f"{lo}" if lo == hi else f"{lo}-{hi}"
+            title, desc = f"階段 {k + 1}", f"相依深度 {depth_text}，{len(idx)} 個節點；主要節點：{top_names}"
+        else:
+            title, desc = f"模組 {k + 1}", f"{len(idx)} 個緊密連接的節點；主要節點：{top_names}"
+        group_defs.append({
+            "nodeIds": [graph.ids[i] for i in idx],
+            "title": title,
+            "description": desc,
+            "color": _GROUP_PALETTE[k % len(_GROUP_PALETTE)]
+        })
+    return group_defs, ungrouped
+
+
+@tool_registry.tool(
+    description="智慧自動分組 (Auto Group)。自動分析工作區節點，依功能分成輸入/運算/輸出三組，或依連線圖拓撲（連通分量、相依深度、社群）分組並建立色彩群組。所有群組以單一批次指令建立。",
+    properties={
+        "mode": {
+            "type": "string",
+            "enum": ["auto", "custom", "component", "depth", "community"],
+            "description": "分組模式：auto=自動依節點類型分類（預設）；custom=手動指定各群組節點；component=每個獨立連通子圖一組；depth=依相依深度分層；community=依連線密度偵測模組",
+            "default": "auto",
+        },
+        "band_size": {"type": "integer", "description": "[depth 模式] 每組涵蓋的相依深度層數", "default": 1},
+        "min_group_size": {"type": "integer", "description": "[component/depth/community 模式] 少於此節點數的群組不建立", "default": 2},
+        "input_title": {"type": "string", "description": "輸入群組標題", "default": "輸入參數"},
+        "input_desc": {"type": "string", "description": "輸入群組說明文字", "default": "使用者可調整的輸入參數，控制腳本行為"},
+        "input_color": {"type": "string", "description": "輸入群組顏色 (Hex ARGB)", "default": "#FFE91E8A"},
+        "compute_title": {"type": "string", "description": "運算群組標題", "default": "核心運算"},
+        "compute_desc": {"type": "string", "description": "運算群組說明文字", "default": "資料處理與幾何運算邏輯"},
+        "compute_color": {"type": "string", "description": "運算群組顏色 (Hex ARGB)", "default": "#FF4169E1"},
+        "output_title": {"type": "string", "description": "輸出群組標題", "default": "結果輸出"},
+        "output_desc": {"type": "string", "description": "輸出群組說明文字", "default": "觀察與驗證運算結果"},
+        "output_color": {"type": "string", "description": "輸出群組顏色 (Hex ARGB)", "default": "#FF228B22"},
+        "groups": {
+            "type": "array",
+            "description": "[custom 模式] 自訂群組清單",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "description": {"type": "string"},
+                    "color": {"type": "string"},
+                    "nodeIds": {"type": "array", "items": {"type": "string"}},
+                },
+            },
+        },
+    },
+    destructive=True
+)
 async def auto_group(
     mode: str = "auto",
     input_title: str = "輸入參數",
@@ -1437,10 +3434,16 @@ async def auto_group(
     output_title: str = "結果輸出",
     output_desc: str = "觀察與驗證運算結果",
     output_color: str = "#FF228B22",
-    groups: list = None
+    groups: list = None,
+    band_size: int = 1,
+    min_group_size: int = 2
 ) -> dict:
     """
-    智慧分組工具：自動分析工作區並建立輸入/運算/輸出三組
+    智慧分組工具：
+    - auto：依節點類型建立輸入/運算/輸出三組
+    - component / depth / community：依連線圖的連通分量、相依深度分層或標籤傳播社群分組
+    - custom：使用者提供的分組清單
+    所有群組以單一 create_groups 指令送出
     """
     with ws_manager._lock:
         sessions = list(ws_manager.active_sessions.keys())
@@ -1452,73 +3455,68 @@ async def auto_group(
 
     # === custom 模式：直接使用使用者提供的分組清單 ===
     if mode == "custom" and groups:
-        results = []
-        for g in groups:
-            r = await create_group(
-                nodeIds=g.get("nodeIds", []),
-                title=g.get("title", "Group"),
-                description=g.get("description", ""),
-                color=g.get("color", "#FFC1D5E0")
-            )
-            results.append({"title": g.get("title"), "result": r})
+        group_defs = [{
+            "nodeIds": g.get("nodeIds", []),
+            "title": g.get("title", "Group"),
+            "description": g.get("description", ""),
+            "color": g.get("color", "#FFC1D5E0")
+        } for g in groups]
+        results = await _submit_groups(session_id, group_defs)
         created = sum(1 for r in results if r["result"].get("status") == "ok")
         return {"status": "ok", "groups_created": created, "details": results}
 
-    # === auto 模式：分析工作區並分類節點 ===
+    # === 分析工作區 ===
     try:
         raw = await analyze_workspace()
     except Exception as e:
         return {"error": f"Failed to analyze workspace: {e}"}
 
     if isinstance(raw, str):
-        if raw.startswith("[FAIL]"):
-            return {"error": raw}
-        ws_data = json.loads(raw)
-    else:
-        ws_data = raw
-
-    nodes = ws_data.get("nodes", [])
-    if not nodes:
+        return {"error": raw}
+    # 欄式模型取代解析後的 dict 清單；之後的分群與送出期間只保留這一份
+    graph = CompactGraph.from_status(raw)
+    del raw
+    if not len(graph):
         return {"error": "No nodes found in workspace"}
 
+    # === 拓撲模式：依連線圖分群 ===
+    if mode in _TOPOLOGY_MODES:
+        group_defs, ungrouped = _topology_groups(graph, mode, band_size, max(1, int(min_group_size)))
+        log(f"[auto_group] mode={mode}, groups={len(group_defs)}, ungrouped={ungrouped}")
+        results = await _submit_groups(session_id, group_defs)
+        created = sum(1 for r in results if r["result"].get("status") == "ok")
+        return {
+            "status": "ok",
+            "mode": mode,
+            "groups_created": created,
+            "ungrouped_nodes": ungrouped,
+            "details": results
+        }
 
-    input_ids, compute_ids, output_ids = [], [], []
+    # === auto 模式：依節點類型分類 ===
+    # 前綴比對只對相異的型別名稱做一次，節點以整數代碼分類
+    output_full = graph.codes_matching("fullName", lambda v: v.startswith(_OUTPUT_FULL))
+    output_names = graph.codes_matching("name", lambda v: v in _OUTPUT_NAMES)
+    input_full = graph.codes_matching("fullName", lambda v: v.startswith(_INPUT_PREFIXES))
 
-    for node in nodes:
-        nid = node.get("id", "")
-        full_name = node.get("fullName", "")
-        name = node.get("name", "")
-
-        # 判斷輸出節點
-        is_output = (
-            any(full_name.startswith(p) for p in _OUTPUT_FULL)
-            or name in _OUTPUT_NAMES
-        )
-        # 判斷輸入節點
-        is_input = any(full_name.startswith(p) for p in _INPUT_PREFIXES)
+    input_ids, compute_ids, output_ids = [], [], []
 
-        if is_output:
+    for i, nid in enumerate(graph.ids):
+        if graph.full_name[i] in output_full or graph.name[i] in output_names:
             output_ids.append(nid)
-        elif is_input:
+        elif graph.full_name[i] in input_full:
             input_ids.append(nid)
         else:
             compute_ids.append(nid)
 
     log(f"[auto_group] Input={len(input_ids)}, Compute={len(compute_ids)}, Output={len(output_ids)}")
 
-    results = []
     group_defs = [
-        (input_ids,   input_title,   input_desc,   input_color),
-        (compute_ids, compute_title, compute_desc, compute_color),
-        (output_ids,  output_title,  output_desc,  output_color),
+        {"nodeIds": input_ids,   "title": input_title,   "description": input_desc,   "color": input_color},
+        {"nodeIds": compute_ids, "title": compute_title, "description": compute_desc, "color": compute_color},
+        {"nodeIds": output_ids,  "title": output_title,  "description": output_desc,  "color": output_color},
     ]
-
-    for node_ids, title, desc, color in group_defs:
-        if not node_ids:
-            results.append({"title": title, "result": {"status": "skipped", "reason": "no nodes"}})
-            continue
-        r = await create_group(nodeIds=node_ids, title=title, description=desc, color=color)
-        results.append({"title": title, "node_count": len(node_ids), "result": r})
+    results = await _submit_groups(session_id, group_defs)
 
     created = sum(1 for r in results if r["result"].get("status") == "ok")
     return {
@@ -1538,6 +3536,11 @@ async def auto_group(
 # ==========================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dynamo MCP Server")
+    parser.add_argument("--stdio", action="store_true",
+                        help="以 MCP stdio 傳輸直接服務 AI 用戶端 (不需 Node.js 橋接器)")
+    cli_args = parser.parse_args()
+
     log("==========================================")
     log("  Dynamo WebSocket Manager (Python)")
     log("==========================================")
@@ -1547,20 +3550,60 @@ if __name__ == "__main__":
     dynamo_port = CONFIG.get("server", {}).get("websocket_port", 65535)
     bridge_port = 65296
     
-    bridge_server = MCPBridgeServer(port=bridge_port)
+    bridge_server = MCPBridgeServer(port=bridge_port if BRIDGE_TCP_ENABLED else None, unix_path=BRIDGE_UNIX_SOCKET)
+
+    EVENT_LOOP_BACKEND = _install_event_loop(EVENT_LOOP_SETTING)
+    json_info = json_codec.backend_info()
+    log(f"[Runtime] JSON codec: {json_info['name']} {json_info['version']} (available: {', '.join(json_info['available'])})")
+    log(f"[Runtime] Event loop: {EVENT_LOOP_BACKEND} (setting: {EVENT_LOOP_SETTING})")
+    log(f"[Runtime] Wire encodings: {', '.join(SUPPORTED_ENCODINGS)} (preferred: {FRAMING_PREFERRED})")
     
     async def main():
-        # 啟動時載入 Memory Bank
-        load_memory_bank()
+        # 啟動時載入 Memory Bank，之後由監看器自動更新
+        await load_memory_bank()
         
-        # 同時啟動兩個非同步服務，共用同一個 Event Loop
-        await asyncio.gather(
-            ws_manager.run("127.0.0.1", dynamo_port),
-            bridge_server.serve()
-        )
+        # 同時啟動各個非同步服務，共用同一個 Event Loop
+        services = [ws_manager.run("127.0.0.1", dynamo_port), bridge_server.serve(), watch_memory_bank()]
+        http_service = _http_service(bridge_server, "127.0.0.1")
+        if http_service:
+            services.append(http_service)
+        await asyncio.gather(*services)
+
+    def _log_service_failure(task):
+        if not task.cancelled() and task.exception():
+            log(f"[MCP Stdio] Listener failed: {task.exception()}")
+
+    async def main_stdio():
+        # 已有 server.py 在執行時轉發給它，避免搶用 Dynamo / Bridge 連接埠
+        if _unix_socket_alive(BRIDGE_UNIX_SOCKET):
+            proxy = BridgeProxy(f"unix:{BRIDGE_UNIX_SOCKET}", unix_path=BRIDGE_UNIX_SOCKET)
+        elif BRIDGE_TCP_ENABLED and _port_in_use(bridge_port):
+            proxy = BridgeProxy(f"ws://127.0.0.1:{bridge_port}")
+        else:
+            proxy = None
+        if proxy:
+            await proxy.connect()
+            await MCPStdioServer(proxy).serve()
+            return
+
+        await load_memory_bank()
+        # 仍開啟 Bridge WebSocket 與 HTTP，讓 Node 橋接器與範例腳本可同時連線
+        services = [asyncio.create_task(ws_manager.run("127.0.0.1", dynamo_port)),
+                    asyncio.create_task(bridge_server.serve()),
+                    asyncio.create_task(watch_memory_bank())]
+        http_service = _http_service(bridge_server, "127.0.0.1")
+        if http_service:
+            services.append(asyncio.create_task(http_service))
+        for task in services:
+            task.add_done_callback(_log_service_failure)
+        try:
+            await MCPStdioServer(LocalBridge(bridge_server)).serve()
+        finally:
+            for task in services:
+                task.cancel()
 
     try:
-        asyncio.run(main())
+        asyncio.run(main_stdio() if cli_args.stdio else main())
     except KeyboardInterrupt:
         log("\nServer stopped by user.")
     except Exception as e:
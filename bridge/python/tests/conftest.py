@@ -0,0 +1,144 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+bridge/python 的單元測試；以 python -m pytest bridge/python/tests 執行
+server.py 模組層級的持久化路徑 (指令日誌、路由統計、名稱快取、common_nodes.json) 一律改指向 tmp_path，
+測試不會寫入專案目錄；dynamo fixture 以記憶體內的 FakeDynamo 取代 Dynamo 連線
+"""
+
+import copy
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_server_paths(tmp_path, monkeypatch):
+    server = sys.modules.get("server")
+    if server is not None:
+        monkeypatch.setattr(server.instruction_journal, "base_dir", str(tmp_path / "journal"))
+        monkeypatch.setattr(server.routing_table, "path", str(tmp_path / "routing_stats.json"))
+        monkeypatch.setattr(server.creation_name_cache, "path", str(tmp_path / "creation_names.json"))
+        common_nodes = tmp_path / "common_nodes.json"
+        shutil.copy(server.COMMON_NODES_PATH, common_nodes)
+        monkeypatch.setattr(server, "COMMON_NODES_PATH", str(common_nodes))
+    yield
+
+
+# ==========================================
+# FakeDynamo：模擬 GraphHandler 的批次指令回應
+# ==========================================
+
+class FakeDynamo:
+    """
+    與 GraphHandler.HandleCommand 相同的回應格式：nodeResults、connectorResults (含解析後的 toPort)、
+    undo {previousNodes, replacedConnectors}；fail_names 內的節點名稱建立失敗
+    legacy=True 時模擬舊版擴充套件，只回傳 status / message / errors
+    """
+
+    def __init__(self, ports=None):
+        self.nodes = {}
+        self.connectors = []
+        self.calls = []
+        self.fail_names = set()
+        self.ports = ports or {}
+        self.legacy = False
+
+    def _port(self, connector):
+        name = connector.get("toPortName")
+        if not name:
+            return connector.get("toPort", 0)
+        inputs = self.ports.get(self.nodes[str(connector["to"])].get("name"), [])
+        return inputs.index(name) if name in inputs else connector.get("toPort", 0)
+
+    async def send(self, session_id, command):
+        command = copy.deepcopy(command)
+        self.calls.append(command)
+        action = command.get("action")
+        if action == "clear_graph":
+            self.nodes.clear()
+            self.connectors.clear()
+            return {"status": "ok"}
+        if action == "get_graph_status":
+            return {"sessionId": session_id, "nodeCount": len(self.nodes), "connectorCount": len(self.connectors),
+                    "nodes": [{"id": key, "name": node.get("name"), "fullName": node.get("name"),
+                               "x": node.get("x", 0), "y": node.get("y", 0)} for key, node in self.nodes.items()],
+                    "connectors": [dict(c) for c in self.connectors]}
+        if action:
+            return {"status": "ok", "action": action}
+
+        previous, replaced, node_results, connector_results, errors = [], [], {}, [], []
+        for c in command.get("deleteConnectors", []):
+            key = (str(c["from"]), c.get("fromPort", 0), str(c["to"]), c.get("toPort", 0))
+            self.connectors = [x for x in self.connectors if (x["from"], x["fromPort"], x["to"], x["toPort"]) != key]
+        for node_id in command.get("deleteNodes", []):
+            self.nodes.pop(str(node_id), None)
+            self.connectors = [x for x in self.connectors if str(node_id) not in (x["from"], x["to"])]
+        for node in command.get("nodes", []):
+            node_id = str(node["id"])
+            if node.get("name") in self.fail_names:
+                node_results[node_id] = {"status": "failed", "error": f"{node.get('name')} not found"}
+                errors.append(f"[CreateNode Failed] {node.get('name')} (ID: {node_id})")
+                continue
+            old = self.nodes.get(node_id)
+            if old is not None:
+                state = {"id": node_id, "name": old.get("name"), "x": old.get("x", 0), "y": old.get("y", 0)}
+                if "value" in node:
+                    state["value"] = old.get("value")
+                previous.append(state)
+            self.nodes[node_id] = {**(old or {}), **node, "id": node_id}
+            node_results[node_id] = {"status": "updated" if old is not None else "created"}
+        for i, c in enumerate(command.get("connectors", [])):
+            source, target = str(c.get("from")), str(c.get("to"))
+            if source not in self.nodes or target not in self.nodes:
+                connector_results.append({"index": i, "status": "failed", "error": "endpoint not found"})
+                errors.append(f"[Connect Failed] {source} -> {target}")
+                continue
+            port = self._port(c)
+            for x in [x for x in self.connectors if x["to"] == target and x["toPort"] == port]:
+                replaced.append(dict(x))
+                self.connectors.remove(x)
+            self.connectors.append({"from": source, "fromPort": c.get("fromPort", 0), "to": target, "toPort": port})
+            connector_results.append({"index": i, "status": "ok", "toPort": port})
+        if self.legacy:
+            return {"status": "error", "message": f"{len(errors)} error(s)", "errors": errors} if errors else {"status": "ok"}
+        response = {"status": "error" if errors else "ok", "nodeResults": node_results, "connectorResults": connector_results,
+                    "undo": {"previousNodes": previous, "replacedConnectors": replaced}}
+        if errors:
+            response["message"] = f"{len(errors)} error(s)"
+            response["errors"] = errors
+        return response
+
+
+@pytest.fixture
+def dynamo(monkeypatch):
+    """連線一個 FakeDynamo Session ("s1")，並重置版本、復原堆疊、冪等性快取與路由統計"""
+    import server
+    fake = FakeDynamo(ports={name: info.get("inputs") or [] for name, info in server._load_common_nodes_metadata().items()})
+    manager = server.ws_manager
+    monkeypatch.setattr(manager, "active_sessions", {"s1": object()})
+    monkeypatch.setattr(manager, "session_info", {"s1": {"fileName": "test.dyn", "dynamoVersion": "3.3.0", "connectedAt": 0,
+                                                         "lastSeen": 0, "stats": {"cmds": 0, "errors": 0}}})
+    monkeypatch.setattr(manager, "send_command_async", fake.send)
+    monkeypatch.setattr(server, "session_state_manager", server.SessionStateManager())
+    monkeypatch.setattr(server, "undo_manager", server.UndoManager())
+    monkeypatch.setattr(server, "idempotency_cache", server.IdempotencyCache())
+    monkeypatch.setattr(server.routing_table, "_entries", {})
+    monkeypatch.setattr(server.creation_name_cache, "enabled", False)
+    return fake
@@ -0,0 +1,79 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""server.py BridgeProxy：stdio 轉發模式下並行請求共用同一條 Bridge 連線"""
+
+import asyncio
+
+import pytest
+
+from server import BridgeProxy
+from wire_codec import JSON, decode, encode
+
+
+class FakeBridgeSocket:
+    """收齊 expected 個請求後才以相反順序回應，模擬回應交錯"""
+
+    def __init__(self, expected: int):
+        self.expected = expected
+        self.sent = []
+        self.incoming = asyncio.Queue()
+
+    async def send(self, raw):
+        request = decode(raw)
+        self.sent.append(request)
+        if len(self.sent) == self.expected:
+            for message in reversed(self.sent):
+                await self.incoming.put(encode({"jsonrpc": "2.0", "id": message["id"],
+                                                "result": {"echo": message["params"].get("name")}}, JSON))
+
+    def close(self):
+        self.incoming.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raw = await self.incoming.get()
+        if raw is None:
+            raise StopAsyncIteration
+        return raw
+
+
+def connected_proxy(socket):
+    proxy = BridgeProxy("ws://test")
+    proxy.websocket = socket
+    proxy._reader = asyncio.create_task(proxy._read_responses())
+    return proxy
+
+
+def test_concurrent_calls_get_their_own_response():
+    async def scenario():
+        proxy = connected_proxy(FakeBridgeSocket(expected=2))
+        return await asyncio.gather(proxy.call_tool({"name": "first"}), proxy.call_tool({"name": "second"}))
+    assert asyncio.run(scenario()) == [{"echo": "first"}, {"echo": "second"}]
+
+
+def test_closed_connection_fails_pending_requests():
+    async def scenario():
+        socket = FakeBridgeSocket(expected=2)
+        proxy = connected_proxy(socket)
+        pending = asyncio.create_task(proxy.call_tool({"name": "only"}))
+        await asyncio.sleep(0)
+        socket.close()
+        with pytest.raises(ConnectionError):
+            await pending
+        with pytest.raises(ConnectionError):
+            await proxy.call_tool({"name": "after"})
+    asyncio.run(scenario())
@@ -0,0 +1,123 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""creation_routing.py：軌道 A / B 路徑學習與 common_nodes.json 就地修補"""
+
+import json
+
+import server
+from creation_routing import STRATEGY_CODE_BLOCK, TRACK_CODE_BLOCK, TRACK_NATIVE, RoutingTable, patch_creation_strategies
+
+
+def learned_table(tmp_path, **kwargs) -> RoutingTable:
+    table = RoutingTable(str(tmp_path / "routing.json"), min_failures=2, **kwargs)
+    table.record("Sphere", TRACK_NATIVE, False, "not found")
+    table.record("Sphere", TRACK_NATIVE, False, "not found")
+    table.record("Sphere", TRACK_CODE_BLOCK, True)
+    return table
+
+
+def test_learns_after_min_failures(tmp_path):
+    table = RoutingTable(str(tmp_path / "routing.json"), min_failures=2)
+    table.record("Sphere", TRACK_NATIVE, False)
+    table.record("Sphere", TRACK_CODE_BLOCK, True)
+    assert table.route("Sphere") is None
+    table.record("Sphere", TRACK_NATIVE, False)
+    assert table.route("Sphere") == STRATEGY_CODE_BLOCK
+
+
+def test_route_is_a_query(tmp_path):
+    table = learned_table(tmp_path, reprobe_after=2)
+    for _ in range(5):
+        assert table.route("Sphere") == STRATEGY_CODE_BLOCK
+    assert table.get_info()["routed"] == 0
+
+
+def test_reprobe_after_marked_routes(tmp_path):
+    table = learned_table(tmp_path, reprobe_after=2)
+    table.mark_routed("Sphere")
+    table.mark_routed("Sphere")
+    assert table.route("Sphere") is None
+    table.record("Sphere", TRACK_NATIVE, False)  # 原生探測結果歸零計數
+    assert table.route("Sphere") == STRATEGY_CODE_BLOCK
+    table.mark_routed("Unknown")
+    assert table.get_info()["routed"] == 2
+
+
+def test_native_success_unlearns(tmp_path):
+    table = learned_table(tmp_path)
+    table.record("Sphere", TRACK_NATIVE, True)
+    assert table.route("Sphere") is None
+
+
+def test_suggestions(tmp_path):
+    table = learned_table(tmp_path)
+    table.record("Cuboid", TRACK_NATIVE, True)
+    metadata = {"Sphere": {}, "Cuboid": {"creationStrategy": "CODE_BLOCK", "overloads": [{}]}}
+    assert {(s["name"], s["creationStrategy"]) for s in table.suggestions(metadata)} == {
+        ("Sphere", "CODE_BLOCK"), ("Cuboid", "NATIVE_WITH_OVERLOAD")}
+
+
+def test_save_and_reload(tmp_path):
+    table = learned_table(tmp_path)
+    table.save()
+    assert RoutingTable(table.path, min_failures=2).route("Sphere") == STRATEGY_CODE_BLOCK
+
+
+def test_disabled(tmp_path):
+    table = RoutingTable(str(tmp_path / "routing.json"), enabled=False)
+    table.record("Sphere", TRACK_NATIVE, False)
+    table.save()
+    assert table.route("Sphere") is None
+    assert not (tmp_path / "routing.json").exists()
+
+
+def test_patch_changes_only_strategy_values():
+    text = '[\n    {\n        "name": "A",\n        "creationStrategy": "NATIVE_DIRECT",\n        "inputs": ["x"]\n    },\n' \
+           '    {"name": "B", "creationStrategy": "CODE_BLOCK"}\n]\n'
+    patched, applied = patch_creation_strategies(text, {"A": STRATEGY_CODE_BLOCK, "B": STRATEGY_CODE_BLOCK, "C": "NATIVE_DIRECT"})
+    assert applied == ["A"]
+    assert patched == text.replace('"creationStrategy": "NATIVE_DIRECT"', '"creationStrategy": "CODE_BLOCK"')
+
+
+def test_patch_inserts_missing_strategy_after_name():
+    text = '[\r\n  {\r\n    "name": "A",\r\n    "overloads": [{"name": "inner", "creationStrategy": "X"}]\r\n  },\r\n  {"name": "B"}\r\n]'
+    patched, applied = patch_creation_strategies(text, {"A": STRATEGY_CODE_BLOCK, "B": STRATEGY_CODE_BLOCK})
+    assert applied == ["A", "B"]
+    assert '"name": "A",\r\n    "creationStrategy": "CODE_BLOCK",\r\n    "overloads"' in patched
+    assert '{"name": "B", "creationStrategy": "CODE_BLOCK"}' in patched
+    assert json.loads(patched)[0]["overloads"][0]["creationStrategy"] == "X"
+
+
+def test_apply_routing_suggestions_keeps_file_formatting(tmp_path, monkeypatch):
+    # 重建的 metadata / 綁定器在測試結束後還原，不影響其他測試
+    monkeypatch.setattr(server, "_common_nodes_metadata", None)
+    monkeypatch.setattr(server, "_signature_binder", server._signature_binder)
+    monkeypatch.setattr(server, "_instruction_validator", server._instruction_validator)
+    table = RoutingTable(str(tmp_path / "routing.json"), min_failures=2)
+    table.record("Sphere.ByCenterPointRadius", TRACK_NATIVE, False)
+    table.record("Sphere.ByCenterPointRadius", TRACK_NATIVE, False)
+    table.record("Sphere.ByCenterPointRadius", TRACK_CODE_BLOCK, True)
+    monkeypatch.setattr(server, "routing_table", table)
+    with open(server.COMMON_NODES_PATH, encoding="utf-8") as f:
+        before = f.read()
+
+    result = server.apply_routing_suggestions()
+    assert result["applied"] == ["Sphere.ByCenterPointRadius"]
+    with open(server.COMMON_NODES_PATH, encoding="utf-8") as f:
+        after = f.read()
+    changed = [(a, b) for a, b in zip(before.splitlines(), after.splitlines()) if a != b]
+    assert len(before.splitlines()) == len(after.splitlines())
+    assert changed == [('        "creationStrategy": "NATIVE_DIRECT",', '        "creationStrategy": "CODE_BLOCK",')]
+    assert server._load_common_nodes_metadata()["Sphere.ByCenterPointRadius"]["creationStrategy"] == STRATEGY_CODE_BLOCK
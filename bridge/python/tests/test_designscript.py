@@ -0,0 +1,105 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""designscript.py：語法分析、埠推導與字面值轉換"""
+
+from designscript import DesignScriptAnalyzer, FunctionRegistry, analyze, is_number_literal, to_literal
+
+
+def test_inputs_and_outputs():
+    result = analyze("a = x + 1;\nb = a * y;")
+    assert result.error is None
+    assert result.inputs == ["x", "y"]
+    assert result.outputs == ["a", "b"]
+    assert result.ports_known()
+
+
+def test_missing_semicolon_is_appended():
+    assert analyze("x + 1").error is None
+
+
+def test_class_calls_are_not_inputs():
+    result = analyze("Point.ByCoordinates(x, y);")
+    assert result.inputs == ["x", "y"]
+    assert result.calls == [("Point.ByCoordinates", 2, 1)]
+    assert result.ports_known()
+
+
+def test_multiline_string_literal():
+    result = analyze('s = "line1\nline2";\nt = s + u;')
+    assert result.error is None
+    assert result.inputs == ["u"]
+
+
+def test_array_return_and_parameter_types():
+    assert analyze("def f(x:int):double[] { return = [x]; }").error is None
+    assert analyze("def g(x:var[]..[]):int[][] = x;").error is None
+    assert analyze("a : double[] = [1, 2];").error is None
+
+
+def test_language_block_makes_ports_unknown():
+    result = analyze("[Imperative]{ return = a + b; }")
+    assert result.error is None
+    assert len(result.outputs) == 1
+    assert not result.ports_known()
+
+
+def test_capitalised_qualifier_is_ambiguous():
+    result = analyze("Pt.X + Pt.Y;")
+    assert result.inputs == []
+    assert result.qualifiers == ["Pt"]
+    assert not result.ports_known()
+    assert result.ports_known(classes={"Pt"})
+
+
+def test_plain_reference_resolves_qualifier():
+    result = analyze("Pt.X; Pt;")
+    assert result.inputs == ["Pt"]
+    assert result.ports_known()
+
+
+def test_definite_errors():
+    for code in ('x = "abc', "a = (1 + 2;", "a = {1, 2};", "/* open"):
+        error = analyze(code).error
+        assert error is not None and error["definite"], code
+
+
+def test_unsupported_syntax_is_not_definite():
+    error = analyze("a = 1 b = 2;").error
+    assert error is not None and not error["definite"]
+
+
+def test_function_registry_warnings():
+    registry = FunctionRegistry({"Point.ByCoordinates": {"inputs": ["x", "y"], "overloads": [{"inputs": ["x", "y", "z"]}]}})
+    warnings = registry.resolve(analyze("Point.ByCoordinates(1); Point.Nope(1);"))
+    assert [w["code"] for w in warnings] == ["argument_count", "unknown_function"]
+
+
+def test_analyzer_cache():
+    analyzer = DesignScriptAnalyzer(max_entries=1)
+    first = analyzer.analyze("1;")
+    assert analyzer.analyze("1;") is first
+    analyzer.analyze("2;")
+    assert analyzer.get_info() == {"entries": 1, "hits": 1, "misses": 2}
+
+
+def test_literals():
+    assert is_number_literal("-1e3")
+    assert not is_number_literal("1 + 2")
+    assert to_literal(None) == "null"
+    assert to_literal(True) == "true"
+    assert to_literal([1, "a"]) == '[1, "a"]'
+    assert to_literal({"k": 2.5}) == '{"k": 2.5}'
+    assert to_literal('say "hi"\n') == '"say \\"hi\\"\\n"'
+    assert to_literal("Point.Origin()", raw_expression=lambda text: True) == "Point.Origin()"
@@ -0,0 +1,118 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""server.py 軌道 A 降級：逐節點重試 (_retry_failed_nodes)、舊版整批重試 (_retry_full_batch) 與路由學習"""
+
+import asyncio
+import json
+
+import server
+
+POINT = "Point.ByCoordinates"
+
+
+def execute(payload, **kwargs):
+    return asyncio.run(server.execute_dynamo_instructions(json.dumps(payload), **kwargs))
+
+
+def graph():
+    return {"nodes": [{"id": "a", "name": "Number", "value": "1"},
+                      {"id": "b", "name": "Number", "value": "2"},
+                      {"id": "p", "name": POINT, "x": 300}],
+            "connectors": [{"from": "a", "to": "p", "toPortName": "x"}, {"from": "b", "to": "p", "toPortName": "y"}]}
+
+
+def code_block_inputs(dynamo, node_id):
+    code = dynamo.nodes[node_id]["value"]
+    return [port for port in ("x", "y", "z") if port in code.split("(", 1)[1]]
+
+
+def test_failed_native_node_is_retried_as_code_block(dynamo):
+    dynamo.fail_names = {POINT}
+    result = execute(graph())
+    assert result["status"] == "ok"
+    assert result["nodeResults"]["p"]["track"] == "A" and result["nodeResults"]["a"]["track"] == "B"
+    assert dynamo.nodes["p"]["name"] == "Number" and dynamo.nodes["p"]["value"].startswith(POINT)
+
+    # 第一次送出時連線因端點不存在而失敗，重試時改接到 Code Block 的同名輸入埠
+    retry = dynamo.calls[-1]
+    assert [n["id"] for n in retry["nodes"]] == ["p"]
+    inputs = code_block_inputs(dynamo, "p")
+    assert [c["toPortName"] for c in retry["connectors"]] == ["x", "y"]
+    assert sorted((c["from"], c["toPort"]) for c in dynamo.connectors) == [("a", inputs.index("x")), ("b", inputs.index("y"))]
+
+
+def test_retry_teaches_routes(dynamo):
+    dynamo.fail_names = {POINT}
+    execute(graph())
+    entry = server.routing_table._entries[POINT]
+    assert entry["native"] == {"ok": 0, "failed": 1} and entry["codeBlock"] == {"ok": 1, "failed": 0}
+    assert entry["nativeStreak"] == 1
+
+    execute(graph(), idempotencyKey="second")
+    assert server.routing_table.route(POINT) == server.STRATEGY_CODE_BLOCK
+    # 學得策略後直接以 Code Block 建立，不再先嘗試原生建立
+    calls = len(dynamo.calls)
+    assert execute(graph(), idempotencyKey="third")["status"] == "ok"
+    assert len(dynamo.calls) == calls + 1 and dynamo.calls[-1]["nodes"][2]["name"] == "Number"
+
+
+def test_partial_without_fallback_records_created_nodes(dynamo):
+    dynamo.fail_names = {POINT}
+    result = execute(graph(), allow_fallback=False)
+    assert result["status"] == "partial"
+    assert result["nodeResults"]["p"]["status"] == "failed"
+    assert [c["index"] for c in result["failedConnectors"]] == [0, 1]
+    assert server.undo_manager.get_info("s1")["undoDepth"] == 1
+
+    # partial 結果已快取：相同請求重試時不重複建立
+    calls = len(dynamo.calls)
+    assert execute(graph(), allow_fallback=False)["idempotentReplay"] is True
+    assert len(dynamo.calls) == calls
+
+    assert asyncio.run(server.undo())["status"] == "ok"
+    assert dynamo.nodes == {}
+
+
+def test_nothing_applied_is_an_error(dynamo):
+    dynamo.fail_names = {"Number"}
+    result = execute({"nodes": [{"id": "a", "name": "Number", "value": "1"}]}, allow_fallback=False)
+    assert result["status"] == "error"
+    assert server.undo_manager.get_info("s1")["undoDepth"] == 0
+
+
+def test_full_batch_keeps_connectors_between_surviving_nodes(dynamo):
+    dynamo.legacy = True
+    dynamo.fail_names = {POINT}
+    payload = graph()
+    payload["nodes"].append({"id": "w", "name": "Watch"})
+    payload["connectors"].append({"from": "p", "to": "w"})
+    result = execute(payload)
+    assert result["status"] == "ok"
+    assert dynamo.nodes["p"]["name"] == "Number"
+    inputs = code_block_inputs(dynamo, "p")
+    assert sorted((c["from"], c["to"], c["toPort"]) for c in dynamo.connectors) == [
+        ("a", "p", inputs.index("x")), ("b", "p", inputs.index("y")), ("p", "w", 0)]
+
+
+def test_full_batch_reports_unmappable_connectors(dynamo):
+    dynamo.legacy = True
+    dynamo.fail_names = {POINT}
+    payload = graph()
+    payload["nodes"].append({"id": "w", "name": "Watch"})
+    payload["connectors"].append({"from": "p", "fromPort": 1, "to": "w"})
+    result = execute(payload)
+    assert result["status"] == "partial"
+    assert [(c["index"], c["from"], c["to"]) for c in result["failedConnectors"]] == [(2, "p", "w")]
+    assert len(dynamo.connectors) == 2
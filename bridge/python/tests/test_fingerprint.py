@@ -0,0 +1,74 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""server.py 工作區指紋：節點 → 連通子圖 → 根指紋的 Merkle 雜湊"""
+
+import asyncio
+
+import server
+from server import _compute_workspace_fingerprint
+
+STATUS = {
+    "nodes": [
+        {"id": "a", "name": "Number", "fullName": "Number", "x": 0, "y": 0, "value": "1"},
+        {"id": "b", "name": "Number", "fullName": "Number", "x": 0, "y": 100, "value": "2"},
+        {"id": "p", "name": "Point.ByCoordinates", "fullName": "Point.ByCoordinates", "x": 300, "y": 0},
+        {"id": "w", "name": "Watch", "fullName": "Watch", "x": 600, "y": 0},
+    ],
+    "connectors": [
+        {"from": "a", "fromPort": 0, "to": "p", "toPort": 0},
+        {"from": "b", "fromPort": 0, "to": "p", "toPort": 1},
+    ],
+}
+
+
+def reordered(status):
+    return {"nodes": list(reversed(status["nodes"])), "connectors": list(reversed(status["connectors"]))}
+
+
+def test_reordering_keeps_hashes():
+    first = _compute_workspace_fingerprint(STATUS)
+    second = _compute_workspace_fingerprint(reordered(STATUS))
+    assert first["root"] == second["root"]
+    assert [sg["hash"] for sg in first["subgraphs"]] == [sg["hash"] for sg in second["subgraphs"]]
+    assert first["nodeHashes"] == second["nodeHashes"]
+    assert sorted(sg["nodeCount"] for sg in first["subgraphs"]) == [1, 3]
+
+
+def test_move_changes_only_its_subgraph():
+    before = _compute_workspace_fingerprint(STATUS)
+    moved = {**STATUS, "nodes": [{**n, "x": 900} if n["id"] == "w" else n for n in STATUS["nodes"]]}
+    after = _compute_workspace_fingerprint(moved)
+    assert before["root"] != after["root"]
+    changed = {sg["hash"] for sg in after["subgraphs"]} - {sg["hash"] for sg in before["subgraphs"]}
+    assert [sg["nodeIds"] for sg in after["subgraphs"] if sg["hash"] in changed] == [["w"]]
+
+
+def test_rewiring_changes_subgraph():
+    rewired = {**STATUS, "connectors": [{**c, "toPort": 2} if c["from"] == "b" else c for c in STATUS["connectors"]]}
+    assert _compute_workspace_fingerprint(rewired)["root"] != _compute_workspace_fingerprint(STATUS)["root"]
+
+
+def test_known_root_and_subgraphs(dynamo):
+    dynamo.nodes = {n["id"]: dict(n) for n in STATUS["nodes"]}
+    dynamo.connectors = [dict(c) for c in STATUS["connectors"]]
+    first = asyncio.run(server.get_workspace_fingerprint())
+    assert first["changed"] is True
+    assert asyncio.run(server.get_workspace_fingerprint(knownRoot=first["root"]))["changed"] is False
+
+    known = [sg["hash"] for sg in first["subgraphs"]]
+    dynamo.nodes["w"]["y"] = 50
+    delta = asyncio.run(server.get_workspace_fingerprint(knownRoot=first["root"], knownSubgraphs=known))
+    assert [sg["nodeIds"] for sg in delta["changedSubgraphs"]] == [["w"]]
+    assert len(delta["removedSubgraphs"]) == 1
@@ -0,0 +1,85 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""graph_analytics.py：CSR 建立與 O(V + E) 圖分析"""
+
+from graph_analytics import (CSRGraph, analyze, dependency_depths, label_propagation, longest_chain,
+                             strongly_connected_cycles, topological_order, union_find_components)
+
+
+def graph(names, edges):
+    nodes = [{"id": n, "name": n} for n in names]
+    return CSRGraph.from_graph(nodes, [{"from": a, "to": b} for a, b in edges])
+
+
+def test_csr_adjacency():
+    g = graph("abcd", [("a", "b"), ("a", "c"), ("c", "b"), ("x", "a")])
+    assert (g.n, g.m) == (4, 3)
+    assert list(g.successors(0)) == [1, 2] and list(g.predecessors(1)) == [0, 2]
+    assert g.out_degree() == [2, 0, 1, 0] and g.in_degree() == [0, 2, 1, 0]
+
+
+def test_duplicate_node_ids_are_merged():
+    g = CSRGraph.from_graph([{"id": "a", "name": "A"}, {"id": "a", "name": "B"}], [])
+    assert g.ids == ["a"] and g.names == ["A"]
+
+
+def test_topological_order_and_cycles():
+    g = graph("abcde", [("a", "b"), ("b", "c"), ("c", "b"), ("d", "d")])
+    order, remaining = topological_order(g)
+    assert order == [0, 4] and sorted(remaining) == [1, 2, 3]
+    assert sorted(sorted(c) for c in strongly_connected_cycles(g)) == [[1, 2], [3]]
+
+
+def test_longest_chain_and_depths():
+    g = graph("abcde", [("a", "b"), ("b", "c"), ("a", "c"), ("c", "d")])
+    assert longest_chain(g) == [0, 1, 2, 3]
+    assert dependency_depths(g) == [0, 1, 2, 3, 0]
+
+
+def test_cyclic_nodes_placed_after_deepest_layer():
+    g = graph("abc", [("a", "b"), ("b", "c"), ("c", "b")])
+    assert dependency_depths(g) == [0, 1, 1]
+
+
+def test_union_find_components():
+    g = graph("abcdef", [("a", "b"), ("c", "b"), ("d", "e")])
+    assert union_find_components(g) == [0, 0, 0, 1, 1, 2]
+
+
+def test_label_propagation_is_deterministic():
+    edges = [(a, b) for group in ("abcd", "efg") for a in group for b in group if a < b]
+    g = graph("abcdefgh", edges)
+    labels = label_propagation(g)
+    assert labels == [0, 0, 0, 0, 1, 1, 1, 2]
+    assert label_propagation(g) == labels
+
+
+def test_analyze_summary():
+    names = ["Number", "Add", "Watch", "Orphan", "Loose", "Sink"]
+    g = graph(names, [("Number", "Add"), ("Add", "Watch"), ("Loose", "Sink")])
+    report = analyze(g, sink_names=("Watch",))
+    assert report["isDAG"] is True and report["cycles"]["count"] == 0
+    assert report["longestChain"]["length"] == 2
+    assert report["components"] == {"count": 3, "largestSizes": [3, 2, 1]}
+    assert [n["id"] for n in report["isolated"]["nodes"]] == ["Orphan"]
+    assert [n["id"] for n in report["deadEnds"]["nodes"]] == ["Loose", "Sink"]
+    assert report["hotspots"]["fanIn"][0] == {"id": "Add", "name": "Add", "degree": 1}
+    assert report["topologicalOrder"][0] == "Number"
+
+
+def test_analyze_reports_cycles():
+    report = analyze(graph("abc", [("a", "b"), ("b", "a"), ("b", "c")]))
+    assert report["isDAG"] is False and report["cycles"]["count"] == 1
+    assert report["unreachable"]["count"] == 3
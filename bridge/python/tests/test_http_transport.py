@@ -0,0 +1,131 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""http_transport.py：請求解析、keep-alive 與逾時"""
+
+import asyncio
+
+import pytest
+
+from http_transport import HttpError, HttpServer, read_request
+
+
+def parse(raw: bytes, **kwargs):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await read_request(reader, **kwargs)
+    return asyncio.run(run())
+
+
+def test_content_length_body():
+    request = parse(b"POST /mcp/?a=1&a=2 HTTP/1.1\r\nContent-Length: 2\r\nAccept: text/event-stream\r\n\r\n{}")
+    assert (request.method, request.path, request.query, request.body) == ("POST", "/mcp/", {"a": "2"}, b"{}")
+    assert request.keep_alive and request.accepts("text/event-stream")
+
+
+def test_chunked_body():
+    request = parse(b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n2;x=y\r\nde\r\n0\r\n\r\n")
+    assert request.body == b"abcde"
+
+
+def test_http10_and_connection_close():
+    assert not parse(b"GET / HTTP/1.0\r\n\r\n").keep_alive
+    assert parse(b"GET / HTTP/1.0\r\nConnection: keep-alive\r\n\r\n").keep_alive
+    assert not parse(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n").keep_alive
+
+
+def test_clean_close_between_requests():
+    assert parse(b"") is None
+
+
+@pytest.mark.parametrize("raw, status", [
+    (b"GET\r\n\r\n", 400),
+    (b"POST / HTTP/1.1\r\nContent-Length: x\r\n\r\n", 400),
+    (b"POST / HTTP/1.1\r\nContent-Length: 10\r\n\r\n", 413),
+    (b"GET / HTTP/1.1\r\nHost", 400),
+])
+def test_errors(raw, status):
+    with pytest.raises(HttpError) as e:
+        parse(raw, max_body=5)
+    assert e.value.status == status
+
+
+async def start(handler, **kwargs):
+    server = HttpServer(handler, **kwargs)
+    listener = await asyncio.start_server(server._handle_connection, "127.0.0.1", 0)
+    return server, listener, listener.sockets[0].getsockname()[1]
+
+
+async def echo(request, response):
+    await response.send(200, request.body)
+
+
+def test_keep_alive_and_pipelining():
+    async def run():
+        server, listener, port = await start(echo)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST / HTTP/1.1\r\nContent-Length: 1\r\n\r\na" * 2 + b"POST / HTTP/1.1\r\nContent-Length: 1\r\nConnection: close\r\n\r\nb")
+        data = await reader.read()
+        listener.close()
+        return server, data
+    server, data = asyncio.run(run())
+    assert data.count(b"HTTP/1.1 200 OK") == 3 and data.endswith(b"b")
+    info = server.stats.get_info()
+    assert (info["requests"], info["keepAliveReuses"], info["openConnections"]) == (3, 2, 0)
+
+
+def test_idle_timeout_does_not_cover_body():
+    async def run():
+        server, listener, port = await start(echo, keep_alive_timeout=0.2, body_timeout=2.0)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST / HTTP/1.1\r\nContent-Length: 4\r\n\r\nab")
+        await asyncio.sleep(0.4)
+        writer.write(b"cd")
+        response = await reader.readuntil(b"abcd")
+        closed = await asyncio.wait_for(reader.read(), 2.0)  # 之後閒置逾時關閉
+        listener.close()
+        return response, closed
+    response, closed = asyncio.run(run())
+    assert response.startswith(b"HTTP/1.1 200 OK") and closed == b""
+
+
+def test_body_timeout():
+    async def run():
+        server, listener, port = await start(echo, keep_alive_timeout=5.0, body_timeout=0.2)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST / HTTP/1.1\r\nContent-Length: 4\r\n\r\nab")
+        data = await asyncio.wait_for(reader.read(), 2.0)
+        listener.close()
+        return data
+    assert asyncio.run(run()).startswith(b"HTTP/1.1 408 Request Timeout")
+
+
+def test_sse_stream():
+    async def handler(request, response):
+        await response.start_stream()
+        await response.event("line1\nline2", event="progress", event_id="1")
+
+    async def run():
+        server, listener, port = await start(handler)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET / HTTP/1.1\r\nConnection: close\r\n\r\n")
+        data = await reader.read()
+        listener.close()
+        return data
+    data = asyncio.run(run())
+    assert b"Transfer-Encoding: chunked" in data
+    assert b"id: 1\nevent: progress\ndata: line1\ndata: line2\n\n" in data
+    assert data.endswith(b"0\r\n\r\n")
@@ -0,0 +1,154 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""server.py IdempotencyCache：重試去重；execute_dynamo_instructions 在綁定與預檢之前查快取"""
+
+import asyncio
+import json
+
+import server
+from server import IdempotencyCache
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_make_key():
+    key, explicit = IdempotencyCache.make_key("k1", "s", {"a": 1})
+    assert explicit and key == "key:s:k1"
+    first, explicit = IdempotencyCache.make_key(None, "s", {"a": 1, "b": 2})
+    second, _ = IdempotencyCache.make_key(None, "s", {"b": 2, "a": 1})
+    assert not explicit and first == second
+    assert IdempotencyCache.make_key(None, "other", {"a": 1, "b": 2})[0] != first
+
+
+def test_caches_ok_and_partial_results():
+    cache = IdempotencyCache()
+    calls = []
+
+    async def factory(status):
+        calls.append(status)
+        return {"status": status, "version": 1}
+
+    async def scenario():
+        for status in ("ok", "partial", "error"):
+            for _ in range(2):
+                await cache.run(f"key:s:{status}", True, lambda: factory(status))
+    run(scenario())
+    assert calls == ["ok", "partial", "error", "error"]
+    assert cache.hits == 2
+
+
+def test_hash_key_requires_matching_version():
+    cache = IdempotencyCache()
+
+    async def scenario():
+        async def factory():
+            return {"status": "ok", "version": 3}
+        await cache.run("hash:x", False, factory, current_version=2)
+        _, replayed_same = await cache.run("hash:x", False, factory, current_version=3)
+        _, replayed_other = await cache.run("hash:x", False, factory, current_version=4)
+        return replayed_same, replayed_other
+    assert run(scenario()) == (True, False)
+
+
+def test_hash_key_expires(monkeypatch):
+    cache = IdempotencyCache(ttl_seconds=10)
+    now = [1000.0]
+    monkeypatch.setattr("server.time.time", lambda: now[0])
+
+    async def factory():
+        return {"status": "ok"}
+
+    async def scenario():
+        await cache.run("hash:x", False, factory)
+        now[0] += 11
+        return (await cache.run("hash:x", False, factory))[1]
+    assert run(scenario()) is False
+
+
+def test_lru_limit():
+    cache = IdempotencyCache(max_entries=2)
+
+    async def scenario():
+        for key in ("a", "b", "c"):
+            await cache.run(f"key:s:{key}", True, lambda: asyncio.sleep(0, {"status": "ok"}))
+    run(scenario())
+    assert cache.get_info()["entries"] == 2
+
+
+def test_concurrent_retry_waits_for_original():
+    cache = IdempotencyCache()
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"status": "ok"}
+
+    async def scenario():
+        return await asyncio.gather(cache.run("key:s:k", True, factory), cache.run("key:s:k", True, factory))
+    (first, replayed_first), (second, replayed_second) = run(scenario())
+    assert len(calls) == 1 and first is second
+    assert (replayed_first, replayed_second) == (False, True)
+
+
+def test_exception_reaches_waiters():
+    cache = IdempotencyCache()
+
+    async def factory():
+        await asyncio.sleep(0.05)
+        raise ValueError("boom")
+
+    async def scenario():
+        return await asyncio.gather(cache.run("key:s:k", True, factory), cache.run("key:s:k", True, factory),
+                                    return_exceptions=True)
+    assert [type(r) for r in run(scenario())] == [ValueError, ValueError]
+    assert cache.get_info()["inflight"] == 0
+
+
+def execute(payload, **kwargs):
+    return asyncio.run(server.execute_dynamo_instructions(json.dumps(payload), **kwargs))
+
+
+def test_retry_skips_binding_and_validation(dynamo, monkeypatch):
+    payload = {"nodes": [{"id": "a", "name": "Number", "value": "1"}], "connectors": []}
+    first = execute(payload)
+    assert first["status"] == "ok"
+    calls = len(dynamo.calls)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("重試不應重新綁定或預檢")
+    monkeypatch.setattr(server, "_get_signature_binder", fail)
+    monkeypatch.setattr(server, "_validate_instructions", fail)
+    monkeypatch.setattr(server, "_resolve_creation_names", fail)
+    second = execute(payload)
+    assert second["idempotentReplay"] is True and second["version"] == first["version"]
+    assert len(dynamo.calls) == calls
+
+
+def test_key_hashes_raw_request(dynamo):
+    payload = {"nodes": [{"id": "p", "name": "Point.ByCoordinates"}], "connectors": []}
+    execute(payload)
+    key, _ = IdempotencyCache.make_key(None, "s1", {"instructions": payload, "clientId": "anonymous", "base": [0, 0],
+                                                            "clear": False, "fallback": True})
+    assert key in server.idempotency_cache._entries
+
+
+def test_explicit_key_reruns_identical_request(dynamo):
+    payload = {"nodes": [{"id": "a", "name": "Number", "value": "1"}], "connectors": []}
+    execute(payload)
+    assert execute(payload).get("idempotentReplay") is True
+    assert "idempotentReplay" not in execute(payload, idempotencyKey="again")
@@ -0,0 +1,107 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""instruction_validator.py：指令圖預檢"""
+
+from instruction_validator import InstructionValidator
+
+METADATA = {
+    "Point.ByCoordinates": {
+        "name": "Point.ByCoordinates", "fullName": "Point.ByCoordinates@double,double", "inputs": ["x", "y"],
+        "overloads": [
+            {"id": "2D", "fullName": "Point.ByCoordinates@double,double", "inputs": ["x", "y"]},
+            {"id": "3D", "fullName": "Point.ByCoordinates@double,double,double", "inputs": ["x", "y", "z"]},
+        ],
+    },
+}
+
+
+def codes(entries):
+    return [e["code"] for e in entries]
+
+
+def validate(nodes, connectors=(), **kwargs):
+    return InstructionValidator(METADATA).validate({"nodes": list(nodes), "connectors": list(connectors)}, **kwargs)
+
+
+def number(node_id, value="1;"):
+    return {"id": node_id, "name": "Number", "value": value}
+
+
+def test_valid_graph():
+    report = validate([number("a"), {"id": "p", "name": "Point.ByCoordinates"}],
+                      [{"from": "a", "to": "p", "fromPort": 0, "toPort": 1}])
+    assert report["valid"], report
+
+
+def test_duplicate_ids_and_dangling_connectors():
+    report = validate([number("a"), number("a")], [{"from": "a", "to": "b", "fromPort": 0, "toPort": 0}], known_ids=set())
+    assert codes(report["errors"]) == ["duplicate_node_id", "dangling_connector"]
+
+
+def test_known_ids_from_earlier_batches():
+    report = validate([number("a")], [{"from": "old", "to": "a", "fromPort": 0, "toPort": 0}], known_ids={"old"})
+    assert "dangling_connector" not in codes(report["errors"])
+
+
+def test_unverified_reference_without_session():
+    report = validate([number("a")], [{"from": "old", "to": "a", "fromPort": 0, "toPort": 0}])
+    assert codes(report["warnings"]) == ["unverified_reference"]
+
+
+def test_port_checks_follow_bound_overload():
+    point = {"id": "p", "name": "Point.ByCoordinates"}
+    assert validate([number("a"), point], [{"from": "a", "to": "p", "fromPort": 0, "toPort": 2}])["valid"]
+    report = validate([number("a"), {**point, "overload": "2D"}], [{"from": "a", "to": "p", "fromPort": 0, "toPort": 2}])
+    assert codes(report["errors"]) == ["port_out_of_range"]
+    report = validate([number("a"), point], [{"from": "a", "to": "p", "fromPort": 0, "toPort": 0, "toPortName": "w"}])
+    assert codes(report["errors"]) == ["unknown_port_name"]
+
+
+def test_code_block_ports():
+    block = {"id": "c", "name": "Code Block", "value": "x + 1;"}
+    report = validate([number("a"), block], [{"from": "a", "to": "c", "fromPort": 0, "toPort": 1}])
+    assert codes(report["errors"]) == ["port_out_of_range"]
+    report = validate([number("a", "y;"), block], [{"from": "c", "to": "a", "fromPort": 1, "toPort": 0}])
+    assert codes(report["errors"]) == ["port_out_of_range"]
+
+
+def test_code_block_with_unknown_ports_is_not_checked():
+    for value in ("[Imperative]{ return = a + b; }", "Pt.X + Pt.Y;"):
+        block = {"id": "c", "name": "Code Block", "value": value}
+        report = validate([number("a"), number("b"), block],
+                          [{"from": "a", "to": "c", "fromPort": 0, "toPort": 0},
+                           {"from": "b", "to": "c", "fromPort": 0, "toPort": 1}])
+        assert report["valid"], (value, report)
+
+
+def test_designscript_errors():
+    assert codes(validate([number("a", 'x = "abc')])["errors"]) == ["designscript_syntax"]
+    report = validate([number("a", "a = 1 b = 2;")])
+    assert report["valid"]
+    assert codes(report["warnings"]) == ["designscript_unparsed"]
+
+
+def test_cycle():
+    report = validate([number("a", "x;"), number("b", "y;")],
+                      [{"from": "a", "to": "b", "fromPort": 0, "toPort": 0},
+                       {"from": "b", "to": "a", "fromPort": 0, "toPort": 0}])
+    assert codes(report["errors"]) == ["cycle"]
+
+
+def test_python_code():
+    node = {"id": "py", "name": "Python Script", "pythonCode": "OUT = IN[1]", "inputCount": 1}
+    assert codes(validate([node])["errors"]) == ["python_input_index"]
+    node = {"id": "py", "name": "Python Script", "pythonCode": "OUT = (", "inputCount": 1}
+    assert codes(validate([node])["errors"]) == ["python_syntax"]
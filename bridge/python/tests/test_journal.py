@@ -0,0 +1,77 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""server.py InstructionJournal：指令日誌、壓縮與已知節點 ID"""
+
+import asyncio
+
+from server import InstructionJournal
+
+
+def test_replay_merges_entries(tmp_path):
+    journal = InstructionJournal(str(tmp_path), compact_every=100)
+    journal.append("s", {"nodes": [{"id": "a", "name": "Number", "value": "1"}, {"id": "b", "name": "Number"}],
+                         "connectors": [{"from": "a", "fromPort": 0, "to": "b", "toPort": 0}]}, 1, "c1")
+    journal.append("s", {"nodes": [{"id": "a", "value": "2"}], "deleteNodes": ["b"]}, 2, "c2")
+    state = journal.load("s")
+    assert state["version"] == 2 and state["lastClientId"] == "c2" and state["journalEntries"] == 2
+    assert state["nodes"] == [{"id": "a", "name": "Number", "value": "2"}]
+    assert state["connectors"] == []
+
+
+def test_clear_discards_earlier_entries(tmp_path):
+    journal = InstructionJournal(str(tmp_path))
+    journal.append("s", {"nodes": [{"id": "a"}]}, 1, "c")
+    journal.record_clear("s", 2, "c")
+    journal.append("s", {"nodes": [{"id": "b"}]}, 3, "c")
+    assert [n["id"] for n in journal.load("s")["nodes"]] == ["b"]
+
+
+def test_compaction_keeps_state(tmp_path):
+    journal = InstructionJournal(str(tmp_path), compact_every=2)
+    for i in range(5):
+        journal.append("s", {"nodes": [{"id": f"n{i}"}]}, i + 1, "c")
+    state = InstructionJournal(str(tmp_path)).load("s")
+    assert [n["id"] for n in state["nodes"]] == [f"n{i}" for i in range(5)]
+    assert state["version"] == 5 and state["journalEntries"] == 1
+
+
+def test_corrupt_last_line_is_skipped(tmp_path):
+    journal = InstructionJournal(str(tmp_path))
+    journal.append("s", {"nodes": [{"id": "a"}]}, 1, "c")
+    with open(tmp_path / "s.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"op": "apply", "payl')
+    assert [n["id"] for n in journal.load("s")["nodes"]] == ["a"]
+
+
+def test_known_ids_follow_writes(tmp_path):
+    async def run():
+        journal = InstructionJournal(str(tmp_path))
+        await journal.append_async("s", {"nodes": [{"id": "a"}, {"id": 1}, {"name": "anonymous"}]}, 1, "c")
+        first = await journal.known_ids_async("s")
+        await journal.append_async("s", {"nodes": [{"id": "b"}], "deleteNodes": ["a"]}, 2, "c")
+        second = await journal.known_ids_async("s")
+        reloaded = await InstructionJournal(str(tmp_path)).known_ids_async("s")
+        await journal.record_clear_async("s", 3, "c")
+        return first, second, reloaded, await journal.known_ids_async("s")
+    first, second, reloaded, cleared = asyncio.run(run())
+    assert first == {"a", "1"}
+    assert second == reloaded == {"1", "b"}
+    assert cleared == frozenset()
+
+
+def test_disabled_journal_writes_nothing(tmp_path):
+    journal = InstructionJournal(str(tmp_path / "journal"), enabled=False)
+    journal.append("s", {"nodes": [{"id": "a"}]}, 1, "c")
+    assert not (tmp_path / "journal").exists()
@@ -0,0 +1,40 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""json_codec.py：可切換的 JSON 後端"""
+
+import json
+
+import pytest
+
+import json_codec
+
+@pytest.fixture(autouse=True)
+def restore_backend():
+    backend = json_codec.active_backend()
+    yield
+    json_codec.select(backend)
+
+
+@pytest.mark.parametrize("backend", json_codec.AVAILABLE_BACKENDS)
+def test_json_backends_round_trip(backend):
+    assert json_codec.select(backend) == backend
+    value = {"名稱": "點", "n": [1, 2.5, None, True]}
+    assert json_codec.loads(json_codec.dumps(value)) == value
+    assert json.loads(json_codec.dumps(value, indent=True)) == value
+
+
+def test_unknown_backend_falls_back_to_stdlib():
+    assert json_codec.select("nope") == json_codec.STDLIB
+    assert json_codec.backend_info()["name"] == json_codec.STDLIB
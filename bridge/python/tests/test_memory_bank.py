@@ -0,0 +1,65 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""memory_bank.py：增量載入"""
+
+import os
+
+from memory_bank import MemoryBank
+
+
+def write(path, text, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_missing_directory(tmp_path):
+    bank = MemoryBank(tmp_path / "memory-bank")
+    assert bank.refresh()["status"] == "error"
+    assert bank.snapshot()[0]["status"] == "error"
+
+
+def test_refresh_reads_only_changes(tmp_path):
+    root = tmp_path / "memory-bank"
+    write(root / "projectbrief.md", "brief", 1000)
+    write(root / "lessons" / "a.md", "# Lesson A\nbody", 1000)
+    bank = MemoryBank(root)
+
+    first = bank.refresh()
+    assert first["added"] == ["lessons/a.md", "projectbrief.md"]
+    summary, _ = bank.snapshot()
+    assert summary["projectBrief"] == "brief"
+    assert summary["lessons"] == [{"file": "a.md", "title": "Lesson A", "summary": "# Lesson A\nbody"}]
+
+    unchanged = bank.refresh()
+    assert (unchanged["changed"], unchanged["added"], unchanged["removed"]) == ([], [], [])
+    assert bank.snapshot()[0] is summary
+
+    write(root / "projectbrief.md", "brief v2", 2000)
+    (root / "lessons" / "a.md").unlink()
+    changed = bank.refresh()
+    assert changed["changed"] == ["projectbrief.md"] and changed["removed"] == ["lessons/a.md"]
+    summary, _ = bank.snapshot()
+    assert summary["projectBrief"] == "brief v2" and summary["lessons"] == []
+
+
+def test_force_rereads(tmp_path):
+    root = tmp_path / "memory-bank"
+    write(root / "progress.md", "p", 1000)
+    bank = MemoryBank(root)
+    bank.refresh()
+    assert bank.refresh(force=True)["changed"] == ["progress.md"]
+    assert bank.get_info()["refreshes"] == 2
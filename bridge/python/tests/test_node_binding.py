@@ -0,0 +1,79 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""node_binding.py：多載綁定"""
+
+import pytest
+
+from node_binding import BindingError, SignatureBinder
+
+METADATA = {
+    "Point.ByCoordinates": {
+        "fullName": "Point.ByCoordinates@double,double", "inputs": ["x", "y"],
+        "overloads": [
+            {"id": "2D", "fullName": "Point.ByCoordinates@double,double", "inputs": ["x", "y"]},
+            {"id": "3D", "fullName": "Point.ByCoordinates@double,double,double", "inputs": ["x", "y", "z"]},
+        ],
+    },
+    "Cuboid.ByLengths": {"fullName": "Cuboid.ByLengths", "inputs": ["width", "length", "height"]},
+}
+
+
+def test_default_signature_without_ports():
+    binder = SignatureBinder(METADATA)
+    signature = binder.bind({"name": "Point.ByCoordinates"})
+    assert signature.overload == "2D" and signature.inputs == ("x", "y")
+
+
+def test_infers_shortest_covering_overload():
+    binder = SignatureBinder(METADATA)
+    assert binder.bind({"name": "Point.ByCoordinates", "params": {"z": 1}}).overload == "3D"
+    assert binder.bind({"name": "Point.ByCoordinates"}, [{"toPort": 2}]).overload == "3D"
+    assert binder.bind({"name": "Point.ByCoordinates"}, [{"toPortName": "Y"}]).overload == "2D"
+
+
+def test_explicit_overload():
+    binder = SignatureBinder(METADATA)
+    assert binder.bind({"name": "Point.ByCoordinates", "overload": "3d"}).overload == "3D"
+    with pytest.raises(BindingError) as e:
+        binder.bind({"name": "Point.ByCoordinates", "overload": "4D"})
+    assert e.value.code == "unknown_overload"
+
+
+def test_unknown_and_single_signature_nodes():
+    binder = SignatureBinder(METADATA)
+    assert binder.bind({"name": "Nope"}) is None
+    assert binder.bind({"name": "Cuboid.ByLengths"}).inputs == ("width", "length", "height")
+    assert not binder.has_overloads("Cuboid.ByLengths")
+
+
+def test_bind_instruction_writes_back():
+    binder = SignatureBinder(METADATA)
+    instruction = {
+        "nodes": [{"id": "p", "name": "Point.ByCoordinates"}, {"id": "q", "name": "Point.ByCoordinates", "overload": "5D"},
+                  {"id": "r", "name": "Point.ByCoordinates", "creationName": "Custom"}],
+        "connectors": [{"from": "a", "to": "p", "toPort": 2}],
+    }
+    errors = binder.bind_instruction(instruction)
+    p, q, r = instruction["nodes"]
+    assert p["overload"] == "3D" and p["creationName"] == "Point.ByCoordinates@double,double,double"
+    assert [e["id"] for e in errors] == ["q"] and "creationName" not in q
+    assert r["creationName"] == "Custom"
+
+
+def test_cache_hits():
+    binder = SignatureBinder(METADATA)
+    binder.bind({"name": "Point.ByCoordinates", "params": {"z": 1}})
+    binder.bind({"name": "Point.ByCoordinates", "params": {"z": 2}})
+    assert binder.get_info()["hits"] == 1
@@ -0,0 +1,75 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""node_resolution.py：creationName 快取"""
+
+from node_resolution import CreationNameCache, is_guid
+
+PASSTHROUGH = {"name": "Passthrough", "fullName": "Clockwork.Core.Sequence.Passthrough",
+               "creationName": "ecce77dc-1290-438e-a056-970b256fd553"}
+
+
+def test_is_guid():
+    assert is_guid("ecce77dc-1290-438e-a056-970b256fd553")
+    assert is_guid("{ECCE77DC1290438EA056970B256FD553}")
+    assert not is_guid("Passthrough")
+
+
+def test_lookup_by_name_full_name_and_case(tmp_path):
+    cache = CreationNameCache(str(tmp_path / "names.json"))
+    assert cache.add("3.3", [PASSTHROUGH]) == 1
+    for name in ("Passthrough", "passthrough", "Clockwork.Core.Sequence.Passthrough"):
+        assert cache.lookup("3.3", name) == (PASSTHROUGH["creationName"], [])
+    assert cache.lookup("3.2", "Passthrough") == (None, [])
+
+
+def test_substring_matches_are_not_resolved(tmp_path):
+    # list_nodes 以子字串搜尋；只有完全相符的名稱才改寫
+    cache = CreationNameCache(str(tmp_path / "names.json"))
+    cache.add("3.3", [{"name": "ByStartPointEndPoint", "fullName": "Line.ByStartPointEndPoint@Point,Point",
+                       "creationName": "Line.ByStartPointEndPoint@Point,Point"},
+                      {"name": "Watch Image", "fullName": "CoreNodeModels.WatchImage", "creationName": "CoreNodeModels.WatchImage"}])
+    assert cache.lookup("3.3", "Line.ByStartPointEndPoint") == (None, [])
+    assert cache.lookup("3.3", "CoreNodeModels.Watch") == (None, [])
+
+
+def test_ambiguous_names_return_candidates(tmp_path):
+    cache = CreationNameCache(str(tmp_path / "names.json"))
+    cache.add(None, [{"name": "Dup", "fullName": "A.Dup", "creationName": "a"},
+                     {"name": "Dup", "fullName": "B.Dup", "creationName": "b"}])
+    creation_name, candidates = cache.lookup(None, "Dup")
+    assert creation_name is None
+    assert [c["creationName"] for c in candidates] == ["a", "b"]
+
+
+def test_missing_and_unmatched_are_cleared_by_add(tmp_path):
+    cache = CreationNameCache(str(tmp_path / "names.json"))
+    cache.mark_missing("3.3", "Passthrough")
+    cache.mark_unmatched("3.3", "Clockwork.Core.Sequence.Passthrough")
+    assert cache.is_missing("3.3", "Passthrough")
+    assert cache.is_unmatched("3.3", "Clockwork.Core.Sequence.Passthrough")
+    cache.add("3.3", [PASSTHROUGH])
+    assert not cache.is_missing("3.3", "Passthrough")
+    assert not cache.is_unmatched("3.3", "Clockwork.Core.Sequence.Passthrough")
+
+
+def test_save_and_reload(tmp_path):
+    path = str(tmp_path / "names.json")
+    cache = CreationNameCache(path)
+    cache.add("3.3", [PASSTHROUGH])
+    cache.mark_missing("3.3", "Nope")
+    cache.save()
+    reloaded = CreationNameCache(path)
+    assert reloaded.lookup("3.3", "Passthrough")[0] == PASSTHROUGH["creationName"]
+    assert not reloaded.is_missing("3.3", "Nope")
@@ -0,0 +1,80 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""python_code_check.py：Python Script 節點的語法與 IN/OUT 預檢"""
+
+from python_code_check import PythonCodeChecker
+
+
+def codes(items):
+    return [item["code"] for item in items]
+
+
+def test_syntax_error_reports_line():
+    errors, warnings = PythonCodeChecker().check("x = 1\nif x\n    OUT = x")
+    assert codes(errors) == ["python_syntax"] and errors[0]["line"] == 2
+    assert warnings == []
+
+
+def test_return_outside_function_is_a_syntax_error():
+    errors, _ = PythonCodeChecker().check("return 1")
+    assert codes(errors) == ["python_syntax"]
+
+
+def test_clean_code():
+    assert PythonCodeChecker().check("a = IN[0]\nb = IN[1]\nOUT = a + b", input_count=2) == ([], [])
+
+
+def test_input_index_against_declared_count():
+    errors, _ = PythonCodeChecker().check("OUT = IN[0] + IN[2]", input_count=2)
+    assert codes(errors) == ["python_input_index"] and "IN[2]" in errors[0]["message"]
+    assert PythonCodeChecker().check("OUT = IN[-2]", input_count=2) == ([], [])
+
+
+def test_input_index_without_count_is_a_warning():
+    errors, warnings = PythonCodeChecker().check("OUT = IN[1]")
+    assert errors == [] and codes(warnings) == ["python_input_index"]
+    assert "set inputCount" in warnings[0]["message"]
+
+
+def test_unpacking_in():
+    errors, _ = PythonCodeChecker().check("a, b, c = IN\nOUT = a", input_count=2)
+    assert codes(errors) == ["python_input_index"] and errors[0]["line"] == 1
+    assert PythonCodeChecker().check("a, *rest = IN\nOUT = a", input_count=2) == ([], [])
+
+
+def test_out_and_in_assignment_warnings():
+    _, warnings = PythonCodeChecker().check("IN = [1]\nx = IN[0]")
+    assert codes(warnings) == ["python_assigns_in", "python_no_out"]
+    assert warnings[0]["line"] == 1
+    assert PythonCodeChecker().check("def f():\n    global OUT\n    OUT = 1\nf()") == ([], [])
+
+
+def test_analysis_cache_by_hash():
+    checker = PythonCodeChecker(max_entries=2)
+    first = checker.analyze("OUT = IN[0]")
+    assert checker.analyze("OUT = IN[0]") is first
+    assert checker.get_info() == {"entries": 1, "hits": 1, "misses": 1}
+    checker.analyze("OUT = 1")
+    checker.analyze("OUT = 2")
+    assert checker.get_info()["entries"] == 2
+    assert checker.analyze("OUT = IN[0]") is not first
+
+
+def test_cached_analysis_rechecks_input_count():
+    checker = PythonCodeChecker()
+    assert checker.check("OUT = IN[1]", input_count=2) == ([], [])
+    errors, _ = checker.check("OUT = IN[1]", input_count=1)
+    assert codes(errors) == ["python_input_index"]
+    assert checker.hits == 1
@@ -0,0 +1,67 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""server.py 資源查詢：欄位投影、篩選、分頁與參數檢查"""
+
+import asyncio
+
+import server
+from server import _apply_resource_query
+
+NODES = {"nodes": [
+    {"id": "a", "name": "Number", "x": 0, "y": 0, "state": "Active", "inputs": []},
+    {"id": "b", "name": "Point.ByCoordinates", "x": 300, "y": 0, "state": "Warning", "inputs": ["x", "y"]},
+    {"id": "c", "name": "Number", "x": 0, "y": 500, "state": "Error", "inputs": []},
+    {"id": "d", "name": "Watch", "x": 900, "y": 900, "state": "Active", "inputs": ["input"]},
+]}
+
+
+def test_projection():
+    result = _apply_resource_query(NODES, {"fields": ["id", "state"]})
+    assert result["nodes"][0] == {"id": "a", "state": "Active"}
+    assert result["filtered"] is True and result["total"] == 4
+
+
+def test_name_state_and_bbox_filters():
+    assert [n["id"] for n in _apply_resource_query(NODES, {"nameContains": "number"})["nodes"]] == ["a", "c"]
+    assert [n["id"] for n in _apply_resource_query(NODES, {"state": "error"})["nodes"]] == ["c"]
+    in_box = _apply_resource_query(NODES, {"bbox": {"minX": 0, "maxX": 400, "maxY": 100}})
+    assert [n["id"] for n in in_box["nodes"]] == ["a", "b"]
+
+
+def test_paging():
+    page = _apply_resource_query(NODES, {"offset": 1, "limit": 2})
+    assert [n["id"] for n in page["nodes"]] == ["b", "c"]
+    assert (page["total"], page["offset"], page["count"]) == (4, 1, 2)
+    assert _apply_resource_query(NODES, {"offset": "3"})["count"] == 1
+    assert _apply_resource_query(NODES, {"limit": 0})["nodes"] == []
+
+
+def test_already_filtered_content_is_untouched():
+    content = {**NODES, "filtered": True}
+    assert _apply_resource_query(content, {"limit": 1}) is content
+
+
+def test_invalid_paging_returns_error():
+    for query in ({"offset": "abc"}, {"limit": -1}, {"limit": 1.5}, {"offset": True}):
+        result = _apply_resource_query(NODES, query)
+        assert "error" in result and result["field"] in query
+    assert _apply_resource_query(NODES, {"bbox": {"minX": "left"}})["field"] == "bbox"
+    assert _apply_resource_query(NODES, {"fields": "id"})["field"] == "fields"
+
+
+def test_invalid_query_is_not_sent(dynamo):
+    result = asyncio.run(server._read_resource("dynamo://workspace/current/nodes", None, {"limit": "ten"}))
+    assert result["field"] == "limit"
+    assert dynamo.calls == []
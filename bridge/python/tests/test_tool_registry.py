@@ -0,0 +1,97 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""tool_registry.py：inputSchema 編譯、參數驗證與分派"""
+
+import asyncio
+
+import pytest
+
+import server
+from tool_registry import ToolRegistry, compile_schema
+
+
+def check(schema, value):
+    errors = []
+    return compile_schema(schema)(value, "arguments", errors), errors
+
+
+def test_type_checks():
+    assert check({"type": "string"}, "a") == ("a", [])
+    assert check({"type": "number"}, True)[1] == ["arguments: expected number, got bool"]
+    assert check({"type": "boolean"}, 1)[1]
+    assert check({"type": ["string", "null"]}, None) == (None, [])
+    assert check({"type": "array"}, {})[1] and check({"type": "object"}, [])[1]
+
+
+def test_integer_normalization():
+    assert check({"type": "integer"}, 3.0) == (3, [])
+    assert check({"type": "integer"}, 3.5)[1] == ["arguments: expected integer, got float"]
+    assert check({"type": "integer"}, True)[1]
+
+
+def test_enum():
+    assert check({"type": "string", "enum": ["a", "b"]}, "c")[1] == ["arguments: must be one of ['a', 'b']"]
+
+
+def test_nested_properties_required_and_items():
+    schema = {"type": "object", "required": ["ids"], "properties": {
+        "ids": {"type": "array", "items": {"type": "integer"}},
+        "box": {"type": "object", "properties": {"minX": {"type": "number"}}},
+    }}
+    value, errors = check(schema, {"ids": [1.0, 2], "box": {"minX": "left"}})
+    assert value["ids"] == [1, 2] and isinstance(value["ids"][0], int)
+    assert errors == ["arguments.box.minX: expected number, got str"]
+    assert check(schema, {})[1] == ["arguments.ids: required"]
+
+
+def test_null_optional_is_skipped_and_unchanged_value_kept():
+    schema = {"type": "object", "properties": {"n": {"type": "integer"}}}
+    value = {"n": None}
+    assert check(schema, value) == (value, [])
+    value = {"n": 2}
+    assert check(schema, value)[0] is value
+
+
+def make_registry():
+    registry = ToolRegistry(log=lambda message: None)
+
+    @registry.tool(properties={"x": {"type": "number"}, "label": {"type": "string"}}, required=("x",))
+    async def scale(x: float, label: str = "") -> dict:
+        return {"value": x * 2, "label": label}
+    return registry
+
+
+def test_dispatch_validates_and_counts():
+    registry = make_registry()
+    assert asyncio.run(registry.dispatch("scale", {"x": 2})) == {"value": 4, "label": ""}
+    rejected = asyncio.run(registry.dispatch("scale", {"x": "abc"}))
+    assert rejected["invalidArguments"] == ["arguments.x: expected number, got str"]
+    unknown = asyncio.run(registry.dispatch("scale", {"x": 1, "y": 2}))
+    assert unknown["invalidArguments"] == ["unknown argument(s): y"]
+    assert registry.get_metrics()["scale"]["calls"] == 1 and registry.get_metrics()["scale"]["rejected"] == 2
+
+
+def test_undeclared_parameter_is_rejected_at_registration():
+    registry = ToolRegistry()
+    with pytest.raises(ValueError, match="offset"):
+        @registry.tool(properties={"x": {"type": "number"}})
+        def move(x: float, offset: float = 0):
+            return {}
+
+
+def test_execute_rejects_non_numeric_offset():
+    args = {"instructions": "{}", "base_x": "abc"}
+    result = asyncio.run(server.tool_registry.dispatch("execute_dynamo_instructions", args))
+    assert result["invalidArguments"] == ["arguments.base_x: expected number, got str"]
@@ -0,0 +1,97 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""server.py 復原/重做：_compute_inverse 與 _step_history (以 FakeDynamo 執行)"""
+
+import asyncio
+import json
+
+import server
+from server import _compute_inverse
+
+
+def execute(payload, **kwargs):
+    return asyncio.run(server.execute_dynamo_instructions(json.dumps(payload), **kwargs))
+
+
+def test_inverse_deletes_new_nodes_and_restores_previous():
+    payload = {"nodes": [{"id": "a", "name": "Number", "value": "5", "x": 50}, {"id": "b", "name": "Number"}],
+               "connectors": [{"from": "a", "to": "p", "toPort": 1}]}
+    undo = {"previousNodes": [{"id": "a", "name": "Number", "x": 0, "y": 0, "value": "1"}],
+            "replacedConnectors": [{"from": "c", "fromPort": 0, "to": "p", "toPort": 1}]}
+    inverse = _compute_inverse(payload, undo)
+    assert inverse["deleteNodes"] == ["b"]
+    assert inverse["nodes"] == [{"id": "a", "name": "Number", "x": 0, "y": 0, "value": "1"}]
+    assert inverse["deleteConnectors"] == [{"from": "a", "fromPort": 0, "to": "p", "toPort": 1}]
+    assert inverse["connectors"] == [{"from": "c", "fromPort": 0, "to": "p", "toPort": 1}]
+
+
+def test_inverse_keeps_first_previous_state():
+    undo = {"previousNodes": [{"id": "a", "x": 0, "value": "1"}, {"id": "a", "x": 10, "value": "2"}]}
+    inverse = _compute_inverse({"nodes": [{"id": "a"}, {"id": "a"}]}, undo)
+    assert inverse["nodes"] == [{"id": "a", "x": 0, "value": "1"}]
+    assert inverse["deleteNodes"] == []
+
+
+def test_undo_restores_value_position_and_replaced_connector(dynamo):
+    execute({"nodes": [{"id": "a", "name": "Number", "value": "1", "x": 0, "y": 0},
+                       {"id": "b", "name": "Number", "value": "2", "x": 0, "y": 100},
+                       {"id": "p", "name": "Point.ByCoordinates", "x": 300, "y": 0}],
+             "connectors": [{"from": "a", "to": "p", "toPortName": "y"}]})
+    assert dynamo.connectors == [{"from": "a", "fromPort": 0, "to": "p", "toPort": 1}]
+
+    result = execute({"nodes": [{"id": "a", "name": "Number", "value": "5", "x": 50, "y": 50}],
+                      "connectors": [{"from": "b", "to": "p", "toPortName": "y"}]})
+    assert result["status"] == "ok"
+    assert dynamo.connectors == [{"from": "b", "fromPort": 0, "to": "p", "toPort": 1}]
+
+    assert asyncio.run(server.undo())["status"] == "ok"
+    assert dynamo.nodes["a"]["value"] == "1" and (dynamo.nodes["a"]["x"], dynamo.nodes["a"]["y"]) == (0, 0)
+    assert dynamo.connectors == [{"from": "a", "fromPort": 0, "to": "p", "toPort": 1}]
+
+    assert asyncio.run(server.undo())["status"] == "ok"
+    assert dynamo.nodes == {} and dynamo.connectors == []
+
+
+def test_redo_reapplies_forward_payload(dynamo):
+    execute({"nodes": [{"id": "a", "name": "Number", "value": "1"}, {"id": "p", "name": "Point.ByCoordinates"}],
+             "connectors": [{"from": "a", "to": "p", "toPortName": "x"}]})
+    asyncio.run(server.undo())
+    assert dynamo.nodes == {}
+    assert asyncio.run(server.redo())["status"] == "ok"
+    assert set(dynamo.nodes) == {"a", "p"}
+    assert dynamo.connectors == [{"from": "a", "fromPort": 0, "to": "p", "toPort": 0}]
+    assert server.undo_manager.get_info("s1") == {"undoDepth": 1, "redoDepth": 0}
+
+
+def test_undo_rejects_external_write_unless_forced(dynamo):
+    execute({"nodes": [{"id": "a", "name": "Number", "value": "1"}]})
+    asyncio.run(server.session_state_manager.get_state("s1").acquire_write("other"))
+    assert asyncio.run(server.undo())["status"] == "version_conflict"
+    assert "a" in dynamo.nodes
+    assert asyncio.run(server.undo(force=True))["status"] == "ok"
+    assert dynamo.nodes == {}
+
+
+def test_clear_before_execute_resets_history(dynamo):
+    execute({"nodes": [{"id": "a", "name": "Number", "value": "1"}]})
+    execute({"nodes": [{"id": "a", "name": "Number", "value": "2"}]})
+    assert server.undo_manager.get_info("s1")["undoDepth"] == 2
+
+    execute({"nodes": [{"id": "b", "name": "Number", "value": "3"}]}, clear_before_execute=True)
+    assert server.undo_manager.get_info("s1") == {"undoDepth": 1, "redoDepth": 0}
+    assert asyncio.run(server.undo())["status"] == "ok"
+    assert dynamo.nodes == {}
+    # 清除前的記錄已捨棄，不會還原被 clear_graph 移除的節點
+    assert asyncio.run(server.undo())["status"] == "noop"
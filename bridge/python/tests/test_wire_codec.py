@@ -0,0 +1,50 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""wire_codec.py：訊息編碼與協商"""
+
+import pytest
+
+import wire_codec
+from wire_codec import JSON, MSGPACK, SUPPORTED_ENCODINGS, CodecStats
+
+def test_negotiate():
+    assert wire_codec.negotiate(["json"]) == JSON
+    assert wire_codec.negotiate([]) == JSON
+    assert wire_codec.negotiate(["bogus", "json"], preferred="bogus") == JSON
+    expected = MSGPACK if MSGPACK in SUPPORTED_ENCODINGS else JSON
+    assert wire_codec.negotiate(["msgpack", "json"]) == expected
+
+
+@pytest.mark.parametrize("encoding", SUPPORTED_ENCODINGS)
+def test_encode_decode(encoding):
+    message = {"jsonrpc": "2.0", "id": 7, "method": "tools/list"}
+    raw = wire_codec.encode(message, encoding)
+    assert isinstance(raw, bytes if encoding == MSGPACK else str)
+    assert wire_codec.decode(raw) == message
+
+
+@pytest.mark.parametrize("encoding", SUPPORTED_ENCODINGS)
+def test_encode_result_matches_full_encoding(encoding):
+    result = {"status": "ok", "nodes": [1, 2]}
+    raw = wire_codec.encode_result("abc", wire_codec.encode(result, encoding), encoding)
+    assert wire_codec.decode(raw) == {"jsonrpc": "2.0", "id": "abc", "result": result}
+
+
+def test_codec_stats():
+    stats = CodecStats()
+    raw = stats.encode({"a": 1})
+    assert stats.decode(raw) == {"a": 1}
+    info = stats.get_info()
+    assert info[JSON]["encoded"] == 1 and info[JSON]["decoded"] == 1
@@ -0,0 +1,51 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""workspace_model.py：auto_group 使用的欄式工作區圖"""
+
+from workspace_model import CompactGraph, StringPool
+
+STATUS = {
+    "nodes": [
+        {"id": "a", "name": "Number", "fullName": "CoreNodeModels.Input.DoubleInput"},
+        {"id": "b", "name": "Number", "fullName": "CoreNodeModels.Input.DoubleInput"},
+        {"id": "w", "name": "Watch", "fullName": "CoreNodeModels.Watch"},
+    ],
+    "connectors": [{"from": "a", "to": "w"}, {"from": "b", "to": "w"}, {"from": "a", "to": "elsewhere"}],
+}
+
+
+def test_string_pool_interns():
+    pool = StringPool()
+    assert pool.code(None) == 0 and pool.code("Number") == pool.code("Number") == 1
+    assert pool[1] == "Number" and len(pool) == 2
+
+
+def test_from_status_columns_and_edges():
+    graph = CompactGraph.from_status(STATUS)
+    assert len(graph) == 3 and graph.ids == ["a", "b", "w"]
+    assert graph.name[0] == graph.name[1] != graph.name[2]
+    assert graph.get(2, "fullName") == "CoreNodeModels.Watch" and graph.get(0, "id") == "a"
+    assert list(graph.edges()) == [(0, 2), (1, 2)]
+
+
+def test_duplicate_id_overwrites():
+    graph = CompactGraph.from_dicts([{"id": 1, "name": "A"}, {"id": "1", "name": "B"}])
+    assert len(graph) == 1 and graph.get(0, "name") == "B"
+
+
+def test_codes_matching():
+    graph = CompactGraph.from_status(STATUS)
+    inputs = graph.codes_matching("fullName", lambda v: v.startswith("CoreNodeModels.Input"))
+    assert [nid for i, nid in enumerate(graph.ids) if graph.full_name[i] in inputs] == ["a", "b"]
@@ -0,0 +1,102 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""workspace_query.py：Workspace Query Language 的詞法、語法與執行"""
+
+import pytest
+
+from workspace_query import GraphIndex, QueryError, _tokenize, compile_query, query_uses_field, run_query
+
+# a → b → c → d，e 為孤立節點
+NODES = [
+    {"id": "a", "name": "Number", "fullName": "Number", "x": 0, "y": 0},
+    {"id": "b", "name": "Python Script", "fullName": "PythonNodeModels.PythonNode", "x": 200, "y": 0},
+    {"id": "c", "name": "Point.ByCoordinates", "fullName": "Autodesk.DesignScript.Geometry.Point.ByCoordinates", "x": 400, "y": 0},
+    {"id": "d", "name": "Watch", "fullName": "CoreNodeModels.Watch", "x": 600, "y": 0},
+    {"id": "e", "name": "Number", "fullName": "Number", "x": 0, "y": 300},
+]
+CONNECTORS = [{"from": "a", "to": "b"}, {"from": "b", "to": "c"}, {"from": "c", "to": "d"}]
+
+
+def query(text, states=None):
+    return run_query(compile_query(text), GraphIndex(NODES, CONNECTORS, states))
+
+
+def ids(result):
+    return [n["id"] for n in result["nodes"]]
+
+
+def test_tokenizer():
+    assert _tokenize('name ~ "Py\\"x" and x >= -1.5 | limit 3') == [
+        ("ident", "name"), ("op", "~"), ("string", 'Py"x'), ("ident", "and"), ("ident", "x"), ("op", ">="),
+        ("number", -1.5), ("punct", "|"), ("ident", "limit"), ("number", 3)]
+    with pytest.raises(QueryError):
+        _tokenize("name = $")
+
+
+def test_parser_builds_stages():
+    assert compile_query('name = "Watch" | downstream 2 | select id, x') == (
+        ("where", ("cmp", "name", "=", "Watch")), ("downstream", 2), ("select", ("id", "x")))
+    assert compile_query("not isolated or feeds(name ~ Watch)") == (
+        ("where", ("or", ("not", ("isolated",)), ("feeds", ("cmp", "name", "~", "Watch")))),)
+
+
+@pytest.mark.parametrize("text", ["", "bogus = 1", "name", "name = 1 | limit -1", "(name = 1", "limit 1 | frobnicate",
+                                  "group name", "name = 1 extra"])
+def test_parser_errors(text):
+    with pytest.raises(QueryError):
+        compile_query(text)
+
+
+def test_where_predicates():
+    assert ids(query('name ~ "python" and feeds(name = "Point.ByCoordinates")')) == ["b"]
+    assert ids(query("fedby(name = Number)")) == ["b"]
+    assert ids(query("isolated")) == ["e"]
+    assert ids(query("x > 300 or (indegree = 0 and outdegree = 1)")) == ["a", "c", "d"]
+
+
+def test_upstream_downstream_depth():
+    assert ids(query("id = a | downstream")) == ["b", "c", "d"]
+    assert ids(query("id = a | downstream 2")) == ["b", "c"]
+    assert ids(query("id = d | upstream 1")) == ["c"]
+    assert ids(query("id = d | upstream 0")) == []
+
+
+def test_select_and_limit():
+    result = query("name ~ e | select id, outdegree | limit 2")
+    assert result["nodes"] == [{"id": "a", "outdegree": 1}, {"id": "c", "outdegree": 1}]
+    assert result["truncated"] is True and result["count"] == 3
+
+
+def test_count_and_group_by():
+    assert query("id = a | downstream | count") == {"count": 3}
+    grouped = query("x < 500 | group by name")
+    assert grouped["count"] == 4 and grouped["groups"][0] == {"value": "Number", "count": 2}
+
+
+def test_state_field_uses_fetched_states():
+    stages = compile_query("state = Error")
+    assert query_uses_field(stages, "state") and not query_uses_field(compile_query("name = a"), "state")
+    assert ids(query("state = Error", {"c": "Error"})) == ["c"]
+
+
+@pytest.mark.parametrize("text", ["count | limit 5", "group by name | select id", "count | count"])
+def test_stages_after_terminal_are_rejected(text):
+    with pytest.raises(QueryError):
+        compile_query(text)
+
+
+def test_run_query_rejects_stages_after_terminal():
+    with pytest.raises(QueryError):
+        run_query((("count", None), ("limit", 5)), GraphIndex(NODES, CONNECTORS))
@@ -0,0 +1,264 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Tool Registry (宣告式工具註冊)
+- 以 @registry.tool(...) 在工具函式旁宣告名稱、說明與 inputSchema
+- 註冊時將 inputSchema 編譯為驗證函式，參數錯誤在送往 Dynamo 前即被拒絕
+  (函式的每個參數都必須宣告於 properties，否則註冊失敗)
+- 以 dict 查表分派 (O(1))，每個工具自動累計呼叫次數、錯誤與耗時，並可掛上自訂 hook
+- tools/list 內容只建立一次，序列化結果依編碼快取
+"""
+
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import json_codec
+
+try:
+    import msgpack
+except ImportError:  # msgpack 為選用相依
+    msgpack = None
+
+# ==========================================
+# inputSchema 編譯
+# ==========================================
+
+def _is_integer(v) -> bool:
+    return (isinstance(v, int) and not isinstance(v, bool)) or (isinstance(v, float) and v.is_integer())
+
+_TYPE_CHECKS = {
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": _is_integer,
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+    "null": lambda v: v is None,
+}
+
+Checker = Callable[[Any, str, List[str]], Any]
+
+
+def compile_schema(schema: dict) -> Checker:
+    """
+    將 JSON Schema 子集 (type / enum / properties / required / items) 編譯為巢狀閉包
+    回傳的 checker(value, path, errors) 將錯誤附加到 errors，並回傳正規化後的值 (整數值的 float 轉為 int)
+    """
+    schema = schema or {}
+    types = schema.get("type")
+    types = [types] if isinstance(types, str) else list(types or [])
+    type_checks = [_TYPE_CHECKS[t] for t in types if t in _TYPE_CHECKS]
+    enum = schema.get("enum")
+    enum_set = set(enum) if enum is not None else None
+    to_int = types == ["integer"]
+
+    properties = {k: compile_schema(v) for k, v in (schema.get("properties") or {}).items()}
+    required = tuple(schema.get("required") or ())
+    items = compile_schema(schema["items"]) if isinstance(schema.get("items"), dict) else None
+
+    def check(value, path: str, errors: List[str]):
+        if type_checks and not any(t(value) for t in type_checks):
+            errors.append(f"{path}: expected {' or '.join(types)}, got {type(value).__name__}")
+            return value
+        if enum_set is not None and value not in enum_set:
+            errors.append(f"{path}: must be one of {enum}")
+            return value
+        if to_int and isinstance(value, float):
+            return int(value)
+        if isinstance(value, dict) and (properties or required):
+            for key in required:
+                if value.get(key) is None:
+                    errors.append(f"{path}.{key}: required")
+            normalized = None
+            for key, sub in properties.items():
+                # 選用參數為 null 視同未提供 (許多客戶端以 null 表示省略)
+                if key in value and value[key] is not None:
+                    new = sub(value[key], f"{path}.{key}", errors)
+                    if new is not value[key]:
+                        normalized = normalized or dict(value)
+                        normalized[key] = new
+            return normalized if normalized is not None else value
+        if isinstance(value, list) and items is not None:
+            normalized = [items(v, f"{path}[{i}]", errors) for i, v in enumerate(value)]
+            return normalized if any(a is not b for a, b in zip(normalized, value)) else value
+        return value
+
+    return check
+
+
+# ==========================================
+# 工具與註冊表
+# ==========================================
+
+class ToolMetrics:
+    __slots__ = ("calls", "errors", "rejected", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "avgMs": round(self.total / self.calls * 1000, 2) if self.calls else 0,
+            "maxMs": round(self.max * 1000, 2)
+        }
+
+
+class Tool:
+    __slots__ = ("name", "func", "is_async", "definition", "check", "accepts", "drop_args", "metrics")
+
+    def __init__(self, name: str, func: Callable, definition: dict):
+        self.name = name
+        self.func = func
+        self.is_async = inspect.iscoroutinefunction(func)
+        self.definition = definition
+        self.check = compile_schema(definition["inputSchema"])
+        params = inspect.signature(func).parameters.values()
+        if any(p.kind is p.VAR_KEYWORD for p in params):
+            self.accepts = None  # **kwargs：不限制參數名稱
+        else:
+            self.accepts = frozenset(p.name for p in params if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY))
+            # 未宣告於 inputSchema 的參數不會被型別檢查，註冊時即拒絕
+            undeclared = sorted(self.accepts - set(definition["inputSchema"].get("properties") or {}))
+            if undeclared:
+                raise ValueError(f"Tool {name}: parameter(s) missing from inputSchema: {', '.join(undeclared)}")
+        # 無參數的工具沿用舊行為：忽略客戶端多帶的參數
+        self.drop_args = self.accepts is not None and not self.accepts
+        self.metrics = ToolMetrics()
+
+    def validate(self, args: dict):
+        """回傳 (正規化參數, 錯誤清單)"""
+        if not isinstance(args, dict):
+            return args, ["arguments: expected object"]
+        if self.drop_args:
+            return {}, []
+        errors: List[str] = []
+        if self.accepts is not None:
+            unknown = [k for k in args if k not in self.accepts]
+            if unknown:
+                errors.append(f"unknown argument(s): {', '.join(unknown)}")
+        return self.check(args, "arguments", errors), errors
+
+
+Hook = Callable[[str, dict, Any, float], None]
+
+
+class ToolRegistry:
+    def __init__(self, log: Callable[[str], None] = print):
+        self._tools: Dict[str, Tool] = {}
+        self._hooks: List[Hook] = []
+        self._lock = threading.Lock()
+        self._list: Optional[list] = None
+        self._serialized: Dict[str, Any] = {}
+        self._log = log
+
+    def tool(self, name: Optional[str] = None, description: str = "", properties: Optional[dict] = None,
+             required: tuple = (), read_only: bool = False, destructive: bool = False, **schema_extra):
+        """註冊工具的裝飾器；函式本身不變，可照常直接呼叫"""
+        def decorator(func):
+            self.register(func, name or func.__name__, description, properties, required,
+                          read_only, destructive, **schema_extra)
+            return func
+        return decorator
+
+    def register(self, func: Callable, name: str, description: str = "", properties: Optional[dict] = None,
+                 required: tuple = (), read_only: bool = False, destructive: bool = False, **schema_extra):
+        schema = {"type": "object", "properties": properties or {}, **schema_extra}
+        if required:
+            schema["required"] = list(required)
+        definition = {"name": name, "description": description, "inputSchema": schema}
+        if destructive:
+            definition["destructiveHint"] = True
+        if read_only:
+            definition["readOnlyHint"] = True
+        with self._lock:
+            self._tools[name] = Tool(name, func, definition)
+            self._list = None
+            self._serialized.clear()
+
+    def add_hook(self, hook: Hook):
+        """hook(name, arguments, result, elapsedSeconds)，每次工具呼叫後執行"""
+        self._hooks.append(hook)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def get(self, name: str) -> Optional[Tool]:
+        return self._tools.get(name)
+
+    # ---- tools/list ----
+
+    def list_tools(self) -> list:
+        if self._list is None:
+            self._list = [t.definition for t in self._tools.values()]
+        return self._list
+
+    def serialized_tools(self, encoding: str = "json", wrapped: bool = False):
+        """
+        tools/list 結果的快取序列化
+        wrapped=True 時為 MCP 格式 {"tools": [...]}，否則為 Bridge 使用的清單
+        """
+        key = f"{encoding}:{wrapped}"
+        cached = self._serialized.get(key)
+        if cached is None:
+            payload = {"tools": self.list_tools()} if wrapped else self.list_tools()
+            if encoding == "msgpack" and msgpack is not None:
+                cached = msgpack.packb(payload, use_bin_type=True)
+            else:
+                cached = json_codec.dumps(payload)
+            self._serialized[key] = cached
+        return cached
+
+    # ---- 呼叫 ----
+
+    async def dispatch(self, name: str, args: Optional[dict] = None):
+        tool = self._tools.get(name)
+        if tool is None:
+            return {"error": f"Tool not found: {name}"}
+        args, errors = tool.validate(args if args is not None else {})
+        if errors:
+            tool.metrics.rejected += 1
+            return {"error": f"Invalid arguments for {name}: {'; '.join(errors)}", "invalidArguments": errors}
+
+        started = time.perf_counter()
+        try:
+            result = await tool.func(**args) if tool.is_async else tool.func(**args)
+        except Exception as e:
+            result = {"error": str(e)}
+        elapsed = time.perf_counter() - started
+
+        metrics = tool.metrics
+        metrics.calls += 1
+        metrics.total += elapsed
+        metrics.max = max(metrics.max, elapsed)
+        if isinstance(result, dict) and "error" in result:
+            metrics.errors += 1
+        for hook in self._hooks:
+            try:
+                hook(name, args, result, elapsed)
+            except Exception as e:
+                self._log(f"[ToolRegistry] Hook error ({name}): {e}")
+        return result
+
+    def get_metrics(self) -> dict:
+        return {name: t.metrics.to_dict() for name, t in self._tools.items() if t.metrics.calls or t.metrics.rejected}
@@ -0,0 +1,136 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Wire Codec (訊息編碼協商)
+- 連線雙方在握手 (Dynamo: action=handshake / Bridge: bridge/hello) 交換支援的編碼
+- msgpack 以 binary frame 傳送，json 以 text frame 傳送；接收端依 frame 類型解碼，
+  因此協商前後、或對方為舊版客戶端時都能正確處理
+- msgpack 為選用相依，未安裝時只提供 json
+- json 編解碼經由 json_codec，使用目前選定的後端 (orjson / ujson / 標準庫)
+"""
+
+import threading
+import time
+from typing import Iterable, Union
+
+import json_codec
+
+try:
+    import msgpack
+except ImportError:  # msgpack 為選用相依
+    msgpack = None
+
+JSON = "json"
+MSGPACK = "msgpack"
+SUPPORTED_ENCODINGS = (MSGPACK, JSON) if msgpack is not None else (JSON,)
+
+
+def negotiate(offered: Iterable[str], preferred: str = MSGPACK) -> str:
+    """從對方提供的編碼中選出雙方都支援的編碼；優先使用 preferred，否則退回 json"""
+    offered = [e for e in (offered or []) if e in SUPPORTED_ENCODINGS]
+    if preferred in offered:
+        return preferred
+    return JSON
+
+
+def encode(obj, encoding: str = JSON) -> Union[str, bytes]:
+    if encoding == MSGPACK and msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    return json_codec.dumps(obj)
+
+
+def encode_result(request_id, raw_result: Union[str, bytes], encoding: str = JSON) -> Union[str, bytes]:
+    """
+    以已序列化的 result 組出 JSON-RPC 回應，不重新序列化 result 本身
+    raw_result 必須與 encoding 相同編碼 (json 字串或 msgpack 位元組)
+    """
+    if encoding == MSGPACK and msgpack is not None:
+        # msgpack map 即為 header 加上依序排列的 key/value，可直接串接
+        return (b"\x83" + msgpack.packb("jsonrpc") + msgpack.packb("2.0") + msgpack.packb("id")
+                + msgpack.packb(request_id) + msgpack.packb("result") + raw_result)
+    return '{"jsonrpc":"2.0","id":' + json_codec.dumps(request_id) + ',"result":' + raw_result + "}"
+
+
+def decode(raw: Union[str, bytes]):
+    """binary frame 視為 msgpack，text frame 視為 json"""
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        if msgpack is None:
+            raise ValueError("Received binary frame but msgpack is not installed")
+        return msgpack.unpackb(raw, raw=False)
+    return json_codec.loads(raw)
+
+
+class CodecStats:
+    """各編碼的訊息數、訊息大小 (msgpack 為位元組數，json 為字元數) 與編解碼 CPU 時間"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def _bucket(self, encoding: str) -> dict:
+        return self._data.setdefault(encoding, {
+            "encoded": 0, "encodedSize": 0, "encodeCpu": 0.0,
+            "decoded": 0, "decodedSize": 0, "decodeCpu": 0.0
+        })
+
+    def encode(self, obj, encoding: str = JSON) -> Union[str, bytes]:
+        started = time.process_time()
+        raw = encode(obj, encoding)
+        cpu = time.process_time() - started
+        size = len(raw)  # json 以字元數計，避免為統計再做一次 UTF-8 編碼
+        with self._lock:
+            b = self._bucket(MSGPACK if isinstance(raw, bytes) else JSON)
+            b["encoded"] += 1
+            b["encodedSize"] += size
+            b["encodeCpu"] += cpu
+        return raw
+
+    def encode_result(self, request_id, raw_result: Union[str, bytes], encoding: str = JSON) -> Union[str, bytes]:
+        started = time.process_time()
+        raw = encode_result(request_id, raw_result, encoding)
+        cpu = time.process_time() - started
+        with self._lock:
+            b = self._bucket(MSGPACK if isinstance(raw, bytes) else JSON)
+            b["encoded"] += 1
+            b["encodedSize"] += len(raw)
+            b["encodeCpu"] += cpu
+        return raw
+
+    def decode(self, raw: Union[str, bytes]):
+        started = time.process_time()
+        obj = decode(raw)
+        cpu = time.process_time() - started
+        binary = not isinstance(raw, str)
+        size = len(raw)
+        with self._lock:
+            b = self._bucket(MSGPACK if binary else JSON)
+            b["decoded"] += 1
+            b["decodedSize"] += size
+            b["decodeCpu"] += cpu
+        return obj
+
+    def get_info(self) -> dict:
+        with self._lock:
+            return {
+                enc: {
+                    "encoded": b["encoded"],
+                    "encodedSize": b["encodedSize"],
+                    "encodeCpuMs": round(b["encodeCpu"] * 1000, 2),
+                    "decoded": b["decoded"],
+                    "decodedSize": b["decodedSize"],
+                    "decodeCpuMs": round(b["decodeCpu"] * 1000, 2)
+                }
+                for enc, b in self._data.items()
+            }
@@ -0,0 +1,134 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Compact Workspace Model
+auto_group 使用的欄式工作區圖，取代逐節點的 dict 清單：
+- 型別名稱 (name / fullName) 經字串池 interning，每個節點只存 int 代碼
+  (字串池屬於單一圖，圖釋放時一併釋放；使用者可編輯的名稱不會在程序中累積)
+- 名稱條件只對相異字串評估一次，之後以整數代碼篩選節點
+- 連線以整數索引 (array('l')) 表示，直接供 CSRGraph 建立鄰接陣列
+"""
+
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 欄位名稱 → 欄位屬性 (以字串池代碼保存)
+_STRING_COLUMNS = {"name": "name", "fullName": "full_name"}
+
+
+class StringPool:
+    """字串 interning：相同字串只保存一份，以 int 代碼引用"""
+
+    __slots__ = ("_codes", "strings")
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {"": 0}
+        self.strings: List[str] = [""]
+
+    def code(self, value) -> int:
+        if value is None:
+            return 0
+        value = str(value)
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            value = sys.intern(value)
+            self._codes[value] = code
+            self.strings.append(value)
+        return code
+
+    def __getitem__(self, code: int) -> str:
+        return self.strings[code]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class CompactGraph:
+    """
+    欄式工作區圖
+    - 節點 i 的屬性分別存在各欄位陣列的第 i 格
+    - 連線端點為節點索引；端點不在圖內的連線不保存
+    """
+
+    __slots__ = ("pool", "ids", "_index", "name", "full_name", "src", "dst")
+
+    def __init__(self, pool: Optional[StringPool] = None):
+        self.pool = pool if pool is not None else StringPool()
+        self.ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.name = array("i")
+        self.full_name = array("i")
+        self.src = array("l")
+        self.dst = array("l")
+
+    @classmethod
+    def from_dicts(cls, nodes: Iterable[dict], connectors: Iterable[dict] = (),
+                   pool: Optional[StringPool] = None) -> "CompactGraph":
+        graph = cls(pool)
+        for node in nodes:
+            graph.add_node(node)
+        for c in connectors:
+            graph.add_connector(c)
+        return graph
+
+    @classmethod
+    def from_status(cls, status: dict, **kwargs) -> "CompactGraph":
+        """由 get_graph_status 回應建立"""
+        return cls.from_dicts(status.get("nodes") or [], status.get("connectors") or [], **kwargs)
+
+    def add_node(self, node: dict) -> int:
+        """新增節點；相同 ID 再次加入時覆寫原有欄位"""
+        nid = str(node.get("id"))
+        i = self._index.get(nid)
+        if i is None:
+            i = len(self.ids)
+            self._index[nid] = i
+            self.ids.append(nid)
+            self.name.append(0)
+            self.full_name.append(0)
+        self.name[i] = self.pool.code(node.get("name"))
+        self.full_name[i] = self.pool.code(node.get("fullName"))
+        return i
+
+    def add_connector(self, c: dict) -> bool:
+        """新增連線；端點不在圖內時略過並回傳 False"""
+        a = self._index.get(str(c.get("from")))
+        b = self._index.get(str(c.get("to")))
+        if a is None or b is None:
+            return False
+        self.src.append(a)
+        self.dst.append(b)
+        return True
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, i: int, field: str):
+        if field == "id":
+            return self.ids[i]
+        return self.pool[getattr(self, _STRING_COLUMNS[field])[i]]
+
+    def edges(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.src, self.dst)
+
+    def codes_matching(self, field: str, predicate) -> set:
+        """
+        回傳字串欄位中符合條件的代碼集合
+        條件只對欄位內的相異字串評估一次，之後以整數比較篩選節點
+        """
+        column = getattr(self, _STRING_COLUMNS[field])
+        return {c for c in set(column) if predicate(self.pool[c])}
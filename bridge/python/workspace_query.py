@@ -0,0 +1,370 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Workspace Query Language
+在 Bridge 端對工作區圖執行查詢，只回傳結果而非整張圖
+
+語法 (以 | 串接階段)：
+    where <predicate>              篩選目前節點集合 (第一個階段可省略 where)
+    upstream [depth]               以目前集合為起點往上游走訪 (不含起點)
+    downstream [depth]             以目前集合為起點往下游走訪 (不含起點)
+    select <field>, ...            只回傳指定欄位
+    limit <n>                      最多回傳 n 個節點
+    count                          只回傳數量
+    group by <field>               依欄位分組計數
+    (count 與 group by 只能是最後一個階段)
+
+predicate：
+    <field> <op> <value>           op: = != ~ (包含，不分大小寫) > < >= <=
+    feeds(<predicate>)             有直接下游節點符合條件
+    fedby(<predicate>)             有直接上游節點符合條件
+    isolated                       沒有任何連線
+    not / and / or / ( )
+
+field：id, name, fullName, creationName, x, y, state, indegree, outdegree
+
+範例：
+    name ~ "Python" and feeds(name = "Watch")
+    where id = "3f2a..." | downstream 2 | count
+    fullName ~ "Geometry" | group by name
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+FIELDS = {"id", "name", "fullName", "creationName", "x", "y", "state", "indegree", "outdegree"}
+DEFAULT_SELECT = ("id", "name")
+DEFAULT_LIMIT = 200
+TERMINAL_STAGES = ("count", "group")
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+      | (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<op>>=|<=|!=|=|~|>|<)
+      | (?P<punct>[(),|])
+      | (?P<ident>[A-Za-z_][\w.\-]*)
+    )""", re.VERBOSE)
+
+
+class QueryError(ValueError):
+    """查詢語法或語意錯誤"""
+
+
+def _check_terminal(stages) -> None:
+    """count / group by 直接產生結果，之後的階段不會執行，視為錯誤而非靜默忽略"""
+    for kind, _ in stages[:-1]:
+        if kind in TERMINAL_STAGES:
+            name = "group by" if kind == "group" else kind
+            raise QueryError(f"'{name}' 必須是最後一個階段")
+
+
+def _tokenize(text: str) -> list:
+    tokens, pos = [], 0
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise QueryError(f"無法解析的字元於位置 {pos}: {text[pos:pos + 10]!r}")
+        pos = m.end()
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == "string":
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        elif kind == "number":
+            value = float(value) if "." in value else int(value)
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self, offset: int = 0):
+        j = self.i + offset
+        return self.tokens[j] if j < len(self.tokens) else (None, None)
+
+    def next(self):
+        tok = self.peek()
+        if tok[0] is None:
+            raise QueryError("查詢意外結束")
+        self.i += 1
+        return tok
+
+    def accept_word(self, word: str) -> bool:
+        kind, value = self.peek()
+        if kind == "ident" and value.lower() == word:
+            self.i += 1
+            return True
+        return False
+
+    def expect_punct(self, p: str):
+        kind, value = self.next()
+        if kind != "punct" or value != p:
+            raise QueryError(f"預期 '{p}'，但得到 {value!r}")
+
+    def parse_query(self) -> list:
+        stages = [self.parse_stage(first=True)]
+        while self.peek() == ("punct", "|"):
+            self.i += 1
+            stages.append(self.parse_stage(first=False))
+        if self.peek()[0] is not None:
+            raise QueryError(f"多餘的內容: {self.peek()[1]!r}")
+        _check_terminal(stages)
+        return stages
+
+    def parse_field(self) -> str:
+        kind, value = self.next()
+        if kind != "ident" or value not in FIELDS:
+            raise QueryError(f"未知欄位 {value!r}，可用欄位：{', '.join(sorted(FIELDS))}")
+        return value
+
+    def parse_int(self) -> int:
+        kind, value = self.next()
+        if kind != "number" or not isinstance(value, int) or value < 0:
+            raise QueryError(f"預期非負整數，但得到 {value!r}")
+        return value
+
+    def parse_stage(self, first: bool) -> tuple:
+        if self.accept_word("where"):
+            return ("where", self.parse_or())
+        for direction in ("upstream", "downstream"):
+            if self.accept_word(direction):
+                depth = self.parse_int() if self.peek()[0] == "number" else None
+                return (direction, depth)
+        if self.accept_word("select"):
+            fields = [self.parse_field()]
+            while self.peek() == ("punct", ","):
+                self.i += 1
+                fields.append(self.parse_field())
+            return ("select", tuple(fields))
+        if self.accept_word("limit"):
+            return ("limit", self.parse_int())
+        if self.accept_word("count"):
+            return ("count", None)
+        if self.accept_word("group"):
+            if not self.accept_word("by"):
+                raise QueryError("預期 'group by <field>'")
+            return ("group", self.parse_field())
+        if first:
+            return ("where", self.parse_or())
+        raise QueryError(f"未知的階段 {self.peek()[1]!r}")
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.accept_word("or"):
+            node = ("or", node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.accept_word("and"):
+            node = ("and", node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.accept_word("not"):
+            return ("not", self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        if self.peek() == ("punct", "("):
+            self.i += 1
+            node = self.parse_or()
+            self.expect_punct(")")
+            return node
+        for word in ("feeds", "fedby"):
+            if self.peek() == ("ident", word) and self.peek(1) == ("punct", "("):
+                self.i += 2
+                inner = self.parse_or()
+                self.expect_punct(")")
+                return (word, inner)
+        if self.accept_word("isolated"):
+            return ("isolated",)
+        field = self.parse_field()
+        kind, op = self.next()
+        if kind != "op":
+            raise QueryError(f"欄位 {field} 之後預期比較運算子，但得到 {op!r}")
+        kind, value = self.next()
+        if kind not in ("string", "number", "ident"):
+            raise QueryError(f"預期比較值，但得到 {value!r}")
+        return ("cmp", field, op, value)
+
+
+@lru_cache(maxsize=256)
+def compile_query(text: str) -> tuple:
+    """解析查詢文字為階段清單 (依文字快取)"""
+    if not text or not text.strip():
+        raise QueryError("查詢不可為空")
+    return tuple(_Parser(_tokenize(text)).parse_query())
+
+
+def query_uses_field(stages: tuple, field: str) -> bool:
+    """判斷查詢是否引用某欄位 (例如 state 需要額外向 Dynamo 取得)"""
+    def walk(node) -> bool:
+        if not isinstance(node, tuple):
+            return False
+        if node and node[0] == "cmp":
+            return node[1] == field
+        return any(walk(child) for child in node[1:])
+    for stage in stages:
+        kind, arg = stage
+        if kind == "where" and walk(arg):
+            return True
+        if kind == "select" and field in arg:
+            return True
+        if kind == "group" and arg == field:
+            return True
+    return False
+
+
+class GraphIndex:
+    """以整數索引建立的節點屬性與上下游鄰接表"""
+
+    def __init__(self, nodes: List[dict], connectors: List[dict], states: Optional[Dict[str, str]] = None):
+        self.nodes = nodes
+        self.index = {str(n.get("id")): i for i, n in enumerate(nodes)}
+        self.succ = [[] for _ in nodes]
+        self.pred = [[] for _ in nodes]
+        for c in connectors:
+            a = self.index.get(str(c.get("from")))
+            b = self.index.get(str(c.get("to")))
+            if a is None or b is None:
+                continue
+            self.succ[a].append(b)
+            self.pred[b].append(a)
+        self.states = states or {}
+
+    @classmethod
+    def from_status(cls, status: dict, states: Optional[Dict[str, str]] = None) -> "GraphIndex":
+        return cls(status.get("nodes", []), status.get("connectors", []), states)
+
+    def value(self, i: int, field: str):
+        if field == "indegree":
+            return len(self.pred[i])
+        if field == "outdegree":
+            return len(self.succ[i])
+        if field == "state":
+            return self.states.get(str(self.nodes[i].get("id")), "")
+        return self.nodes[i].get(field)
+
+    def record(self, i: int, fields) -> dict:
+        return {f: self.value(i, f) for f in fields}
+
+    def traverse(self, seeds, downstream: bool, depth: Optional[int]) -> list:
+        adjacency = self.succ if downstream else self.pred
+        seen = set(seeds)
+        result = []
+        frontier = deque((s, 0) for s in seeds)
+        while frontier:
+            i, d = frontier.popleft()
+            if depth is not None and d >= depth:
+                continue
+            for j in adjacency[i]:
+                if j not in seen:
+                    seen.add(j)
+                    result.append(j)
+                    frontier.append((j, d + 1))
+        return result
+
+
+def _compare(actual, op: str, expected) -> bool:
+    if op == "~":
+        return str(expected).lower() in str(actual if actual is not None else "").lower()
+    if isinstance(expected, (int, float)):
+        try:
+            actual = float(actual)
+        except (TypeError, ValueError):
+            return False
+    elif actual is not None:
+        actual = str(actual)
+    if op == "=":
+        return actual == expected
+    if op == "!=":
+        return actual != expected
+    if actual is None:
+        return False
+    try:
+        if op == ">":
+            return actual > expected
+        if op == "<":
+            return actual < expected
+        if op == ">=":
+            return actual >= expected
+        if op == "<=":
+            return actual <= expected
+    except TypeError:
+        return False
+    raise QueryError(f"未知運算子 {op}")
+
+
+def _matches(index: GraphIndex, i: int, pred) -> bool:
+    kind = pred[0]
+    if kind == "cmp":
+        _, field, op, value = pred
+        return _compare(index.value(i, field), op, value)
+    if kind == "and":
+        return _matches(index, i, pred[1]) and _matches(index, i, pred[2])
+    if kind == "or":
+        return _matches(index, i, pred[1]) or _matches(index, i, pred[2])
+    if kind == "not":
+        return not _matches(index, i, pred[1])
+    if kind == "feeds":
+        return any(_matches(index, j, pred[1]) for j in index.succ[i])
+    if kind == "fedby":
+        return any(_matches(index, j, pred[1]) for j in index.pred[i])
+    if kind == "isolated":
+        return not index.succ[i] and not index.pred[i]
+    raise QueryError(f"未知條件 {kind}")
+
+
+def run_query(stages: tuple, index: GraphIndex) -> dict:
+    """在索引上執行已編譯的查詢"""
+    _check_terminal(stages)
+    current = list(range(len(index.nodes)))
+    fields = DEFAULT_SELECT
+    limit = DEFAULT_LIMIT
+
+    for kind, arg in stages:
+        if kind == "where":
+            current = [i for i in current if _matches(index, i, arg)]
+        elif kind in ("upstream", "downstream"):
+            current = index.traverse(current, kind == "downstream", arg)
+        elif kind == "select":
+            fields = arg
+        elif kind == "limit":
+            limit = arg
+        elif kind == "count":
+            return {"count": len(current)}
+        elif kind == "group":
+            groups: Dict[str, int] = {}
+            for i in current:
+                key = str(index.value(i, arg))
+                groups[key] = groups.get(key, 0) + 1
+            return {
+                "count": len(current),
+                "groupBy": arg,
+                "groups": [{"value": k, "count": v} for k, v in sorted(groups.items(), key=lambda kv: -kv[1])]
+            }
+
+    return {
+        "count": len(current),
+        "truncated": len(current) > limit,
+        "nodes": [index.record(i, fields) for i in current[:limit]]
+    }
@@ -0,0 +1,160 @@
+# Copyright 2026 ChimingLu.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+WebSocket permessage-deflate (RFC 7692)
+- 可調整壓縮等級、視窗大小與門檻：小於門檻的訊息不壓縮直接送出 (RSV1=0，協定允許)
+- 每個監聽埠各自統計壓縮率與 CPU 時間
+"""
+
+import threading
+import time
+from typing import Optional
+
+from websockets.extensions.permessage_deflate import PerMessageDeflate, ServerPerMessageDeflateFactory
+from websockets.frames import CTRL_OPCODES, Opcode
+
+DEFAULT_SETTINGS = {
+    "enabled": True,
+    "level": 6,
+    "threshold": 1024,
+    "window_bits": 15,
+    "mem_level": 8,
+}
+
+
+class CompressionStats:
+    """單一監聽埠的壓縮統計"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent_messages = 0
+        self.sent_skipped = 0
+        self.sent_raw_bytes = 0
+        self.sent_wire_bytes = 0
+        self.compress_cpu = 0.0
+        self.recv_messages = 0
+        self.recv_wire_bytes = 0
+        self.recv_raw_bytes = 0
+        self.decompress_cpu = 0.0
+
+    def record_send(self, raw: int, wire: int, cpu: float, skipped: bool = False):
+        with self._lock:
+            self.sent_messages += 1
+            self.sent_raw_bytes += raw
+            self.sent_wire_bytes += wire
+            self.compress_cpu += cpu
+            if skipped:
+                self.sent_skipped += 1
+
+    def record_recv(self, wire: int, raw: int, cpu: float):
+        with self._lock:
+            self.recv_messages += 1
+            self.recv_wire_bytes += wire
+            self.recv_raw_bytes += raw
+            self.decompress_cpu += cpu
+
+    def get_info(self) -> dict:
+        with self._lock:
+            return {
+                "sent": {
+                    "messages": self.sent_messages,
+                    "belowThreshold": self.sent_skipped,
+                    "rawBytes": self.sent_raw_bytes,
+                    "wireBytes": self.sent_wire_bytes,
+                    "ratio": round(self.sent_wire_bytes / self.sent_raw_bytes, 4) if self.sent_raw_bytes else None,
+                    "cpuMs": round(self.compress_cpu * 1000, 2)
+                },
+                "received": {
+                    "compressedMessages": self.recv_messages,
+                    "wireBytes": self.recv_wire_bytes,
+                    "rawBytes": self.recv_raw_bytes,
+                    "ratio": round(self.recv_wire_bytes / self.recv_raw_bytes, 4) if self.recv_raw_bytes else None,
+                    "cpuMs": round(self.decompress_cpu * 1000, 2)
+                }
+            }
+
+
+class MeteredPerMessageDeflate(PerMessageDeflate):
+    """加入門檻與統計的 permessage-deflate 擴充"""
+
+    def __init__(self, *args, threshold: int = 0, stats: Optional[CompressionStats] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+        self.stats = stats
+        self._sending_compressed = False
+
+    def encode(self, frame):
+        if frame.opcode in CTRL_OPCODES:
+            return frame
+        if frame.opcode is not Opcode.CONT:
+            # 單一 frame 的小訊息不壓縮；分段訊息一律壓縮以保持 RSV1 一致
+            self._sending_compressed = not (frame.fin and len(frame.data) < self.threshold)
+        if not self._sending_compressed:
+            if self.stats:
+                self.stats.record_send(len(frame.data), len(frame.data), 0.0, skipped=True)
+            return frame
+        started = time.process_time()
+        encoded = super().encode(frame)
+        if self.stats:
+            self.stats.record_send(len(frame.data), len(encoded.data), time.process_time() - started)
+        return encoded
+
+    def decode(self, frame, *, max_size: Optional[int] = None):
+        started = time.process_time()
+        decoded = super().decode(frame, max_size=max_size)
+        if decoded is not frame and self.stats:
+            self.stats.record_recv(len(frame.data), len(decoded.data), time.process_time() - started)
+        return decoded
+
+
+class MeteredServerDeflateFactory(ServerPerMessageDeflateFactory):
+    """協商後產生 MeteredPerMessageDeflate 的伺服器端工廠"""
+
+    def __init__(self, threshold: int, stats: CompressionStats, **kwargs):
+        super().__init__(**kwargs)
+        self.threshold = threshold
+        self.stats = stats
+
+    def process_request_params(self, params, accepted_extensions):
+        response_params, ext = super().process_request_params(params, accepted_extensions)
+        metered = MeteredPerMessageDeflate(
+            ext.remote_no_context_takeover,
+            ext.local_no_context_takeover,
+            ext.remote_max_window_bits,
+            ext.local_max_window_bits,
+            ext.compress_settings,
+            threshold=self.threshold,
+            stats=self.stats,
+        )
+        return response_params, metered
+
+
+def build_serve_kwargs(settings: dict, stats: CompressionStats) -> dict:
+    """
+    產生 websockets.serve 的壓縮參數
+    停用時回傳 compression=None；啟用時以自訂工廠取代預設的 permessage-deflate
+    """
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    if not settings["enabled"]:
+        return {"compression": None}
+    window_bits = max(9, min(15, int(settings["window_bits"])))
+    factory = MeteredServerDeflateFactory(
+        threshold=max(0, int(settings["threshold"])),
+        stats=stats,
+        server_max_window_bits=window_bits,
+        client_max_window_bits=window_bits,
+        compress_settings={"level": int(settings["level"]), "memLevel": int(settings["mem_level"])},
+    )
+    return {"compression": None, "extensions": [factory]}
@@ -95,15 +95,18 @@ async def test_clockwork():
     search_res = await call_mcp_tool("search_nodes", {"query": "Passthrough"})
     has_clockwork = "Passthrough" in str(search_res)
     
+    # The server rewrites plugin node names to their creationName (GUID) from the
+    # list_nodes cache. When the search cannot see the node, fall back to the
+    # BUG-003 GUID (found via analyze_passthrough.py).
+    passthrough = "Passthrough"
     if not has_clockwork:
         print(f"⚠️ {time.time()-start:.2f}s - Clockwork.Passthrough not found via search. Proceeding with GUID creation (Workaround for BUG-003).")
-        
-    # [Modified] Using GUID for Clockwork Passthrough as Dynamo fails to resolve via name string.
-    # GUID: ecce77dc-1290-438e-a056-970b256fd553 (Found via analyze_passthrough.py)
+        passthrough = "ecce77dc-1290-438e-a056-970b256fd553"
+
     graph = {
         "nodes": [
             {"id": "c1", "name": "Number", "value": "100", "x": 100, "y": 300},
-            {"id": "c2", "name": "ecce77dc-1290-438e-a056-970b256fd553", "x": 350, "y": 300},
+            {"id": "c2", "name": passthrough, "x": 350, "y": 300},
             {"id": "c3", "name": "Watch", "x": 600, "y": 300}
         ],
         "connectors": [
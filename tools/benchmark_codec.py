@@ -0,0 +1,153 @@
+
+"""
+Codec / Event Loop 效能比較
+以模擬的工作區資料 (get_graph_status 回應、批次建立指令) 比較：
+- 各個已安裝 JSON 後端 (json_codec) 與 msgpack 的編解碼時間與訊息大小
+- asyncio 與 uvloop (若已安裝) 在 WebSocket 往返上的吞吐量
+
+用法: python tools/benchmark_codec.py [--nodes 100 1000 5000] [--repeat 20] [--messages 2000]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bridge", "python"))
+
+import json_codec
+import wire_codec
+
+NODE_TYPES = [
+    ("Number", "Core.Input.Number"),
+    ("Code Block", "Dynamo.Graph.Nodes.CodeBlockNodeModel"),
+    ("Point.ByCoordinates", "Autodesk.DesignScript.Geometry.Point.ByCoordinates@double,double,double"),
+    ("Line.ByStartPointEndPoint", "Autodesk.DesignScript.Geometry.Line.ByStartPointEndPoint@Point,Point"),
+    ("Cuboid.ByLengths", "Autodesk.DesignScript.Geometry.Cuboid.ByLengths@Point,double,double,double"),
+    ("List.Create", "DSCore.List.Create@var[]..[]"),
+    ("Watch", "CoreNodeModels.Watch"),
+    ("Python Script", "PythonNodeModels.PythonNode"),
+]
+
+
+def build_graph_status(node_count: int, seed: int = 42) -> dict:
+    """模擬 get_graph_status 回應：GUID、型別名稱、座標與約 1.5 倍節點數的連線"""
+    rng = random.Random(seed)
+    nodes = []
+    for i in range(node_count):
+        name, full_name = rng.choice(NODE_TYPES)
+        nodes.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": name,
+            "fullName": full_name,
+            "creationName": full_name,
+            "x": round(rng.uniform(-5000, 5000), 3),
+            "y": round(rng.uniform(-5000, 5000), 3),
+            "state": rng.choice(["Active", "Active", "Active", "Warning", "Dead"]),
+            "value": str(rng.randint(0, 1000)) if name == "Number" else None,
+        })
+    connectors = []
+    for _ in range(int(node_count * 1.5)):
+        a, b = rng.sample(range(node_count), 2) if node_count > 1 else (0, 0)
+        connectors.append({"from": nodes[a]["id"], "to": nodes[b]["id"], "fromPort": rng.randint(0, 2), "toPort": rng.randint(0, 2)})
+    return {"status": "ok", "fileName": "Benchmark.dyn", "nodeCount": node_count, "nodes": nodes, "connectors": connectors}
+
+
+def build_instructions(node_count: int, seed: int = 7) -> dict:
+    """模擬 execute_dynamo_instructions 的批次建立指令 (含中文預覽名稱)"""
+    rng = random.Random(seed)
+    nodes = [{"id": f"n{i}", "name": rng.choice(NODE_TYPES)[0], "x": i * 50, "y": (i % 20) * 120,
+              "value": f"座標 {i}" if i % 5 == 0 else str(i)} for i in range(node_count)]
+    connectors = [{"from": f"n{i}", "to": f"n{i + 1}", "fromPort": 0, "toPort": 0} for i in range(node_count - 1)]
+    return {"action": "execute_instructions", "nodes": nodes, "connectors": connectors}
+
+
+def _time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def bench_codecs(payloads: dict, repeat: int):
+    print(f"{'payload':<24}{'codec':<10}{'size':>12}{'encode ms':>12}{'decode ms':>12}")
+    for label, payload in payloads.items():
+        for backend in json_codec.AVAILABLE_BACKENDS:
+            json_codec.select(backend)
+            raw = json_codec.dumps(payload)
+            enc = _time(lambda: json_codec.dumps(payload), repeat)
+            dec = _time(lambda: json_codec.loads(raw), repeat)
+            print(f"{label:<24}{backend:<10}{len(raw.encode('utf-8')):>12,}{enc:>12.2f}{dec:>12.2f}")
+        if wire_codec.msgpack is not None:
+            raw = wire_codec.encode(payload, wire_codec.MSGPACK)
+            enc = _time(lambda: wire_codec.encode(payload, wire_codec.MSGPACK), repeat)
+            dec = _time(lambda: wire_codec.decode(raw), repeat)
+            print(f"{label:<24}{'msgpack':<10}{len(raw):>12,}{enc:>12.2f}{dec:>12.2f}")
+    json_codec.select("auto")
+
+
+async def _round_trips(messages: int, payload: dict) -> float:
+    import websockets
+
+    async def echo(ws):
+        async for msg in ws:
+            await ws.send(msg)
+
+    async with websockets.serve(echo, "127.0.0.1", 0, compression=None) as server:
+        port = server.sockets[0].getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}", compression=None) as ws:
+            started = time.perf_counter()
+            for _ in range(messages):
+                await ws.send(json_codec.dumps(payload))
+                json_codec.loads(await ws.recv())
+            return time.perf_counter() - started
+
+
+def bench_event_loops(messages: int):
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        print("websockets not installed, skipping event loop benchmark")
+        return
+    payload = {"jsonrpc": "2.0", "id": 1, "method": "tools/call",
+               "params": {"name": "get_graph_status", "arguments": {"sessionId": str(uuid.uuid4())}}}
+    loops = {"asyncio": asyncio.new_event_loop}
+    try:
+        import uvloop
+        loops["uvloop"] = uvloop.new_event_loop
+    except ImportError:
+        print("uvloop not installed, benchmarking asyncio only")
+    print(f"{'event loop':<12}{'messages':>10}{'seconds':>10}{'msg/s':>12}")
+    for name, factory in loops.items():
+        loop = factory()
+        try:
+            elapsed = loop.run_until_complete(_round_trips(messages, payload))
+        finally:
+            loop.close()
+        print(f"{name:<12}{messages:>10}{elapsed:>10.3f}{messages / elapsed:>12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON codecs and event loops on workspace payloads")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"JSON backends: {', '.join(json_codec.AVAILABLE_BACKENDS)}; wire encodings: {', '.join(wire_codec.SUPPORTED_ENCODINGS)}\n")
+    payloads = {}
+    for n in args.nodes:
+        payloads[f"graph_status {n}"] = build_graph_status(n)
+        payloads[f"instructions {n}"] = build_instructions(n)
+    bench_codecs(payloads, args.repeat)
+    print()
+    bench_event_loops(args.messages)
+
+
+if __name__ == "__main__":
+    main()